@@ -0,0 +1,275 @@
+"""
+Load generator for the plugin server.
+
+Spawns ``boot-python`` exactly as boot-code does (``python -m boot_python.main``), reads
+the handshake, and drives it over gRPC from a client thread pool. Results are printed
+as a summary on stderr and as JSON on stdout (or ``--output``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent import futures
+from typing import Any, Dict, List, Optional, Sequence
+
+import grpc
+
+from boot_python import __version__
+from boot_python.generated import plugin_pb2, plugin_pb2_grpc
+
+SPEC_MIXES = ("same", "mixed", "unique")
+RPCS = ("unary", "stream")
+COMPRESSIONS = ("none", "gzip", "deflate")
+MIXED_DISTINCT_SPECS = 16
+
+
+def make_specs(mix: str, count: int, spec_bytes: int) -> List[str]:
+    """``count`` spec texts: one shared spec, a small rotating set, or all distinct."""
+
+    def spec(i: int) -> str:
+        head = f'[project]\nname = "bench-{i}"\nlanguage = "python"\ntype = "cli"\ndescription = "'
+        pad = max(0, spec_bytes - len(head) - 2)
+        return head + "x" * pad + '"\n'
+
+    if mix == "same":
+        return [spec(0)] * count
+    if mix == "mixed":
+        distinct = [spec(i) for i in range(MIXED_DISTINCT_SPECS)]
+        return [distinct[i % MIXED_DISTINCT_SPECS] for i in range(count)]
+    return [spec(i) for i in range(count)]
+
+
+def _percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _proc_status_kb(pid: int, field: str) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _proc_cpu_seconds(pid: int) -> Optional[float]:
+    """User + system CPU time the process has used so far."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server(server_args: Sequence[str] = ()) -> tuple[subprocess.Popen, str]:
+    """Spawns the plugin and returns ``(process, "host:port")`` parsed from its handshake."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "boot_python.main", *server_args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    line = proc.stdout.readline().strip() if proc.stdout else ""
+    parts = line.split("|")
+    if len(parts) != 5:
+        proc.kill()
+        raise RuntimeError(f"Invalid handshake from plugin: {line!r}")
+    return proc, parts[3]
+
+
+def _call(stub: plugin_pb2_grpc.BootCodePluginStub, rpc: str, spec: str) -> None:
+    req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content=spec)
+    if rpc == "stream":
+        for _ in stub.GetPromptComponentsStream(req):
+            pass
+    else:
+        stub.GetPromptComponents(req)
+
+
+def run_bench(
+    *,
+    requests: int = 2000,
+    concurrency: int = 8,
+    mix: str = "mixed",
+    spec_bytes: int = 512,
+    rpc: str = "unary",
+    warmup: int = 50,
+    server_args: Sequence[str] = (),
+    channels: int = 1,
+    compression: str = "none",
+) -> Dict[str, Any]:
+    if compression != "none":
+        server_args = [*server_args, "--compression", compression]
+    proc, target = start_server(server_args)
+    errors = 0
+    latencies: List[float] = []
+    lock = threading.Lock()
+    try:
+        # Separate channels mean separate connections, which --workers servers spread
+        # across processes; a single channel always lands on one worker.
+        options = [("grpc.use_local_subchannel_pool", 1)]
+        opened = [grpc.insecure_channel(target, options=options) for _ in range(max(1, channels))]
+        try:
+            stubs = [plugin_pb2_grpc.BootCodePluginStub(channel) for channel in opened]
+            for i, spec in enumerate(make_specs("same", warmup, spec_bytes)):
+                _call(stubs[i % len(stubs)], rpc, spec)
+            specs = make_specs(mix, requests, spec_bytes)
+            cpu_before = _proc_cpu_seconds(proc.pid)
+
+            def worker(index: int, part: Sequence[str]) -> None:
+                nonlocal errors
+                stub = stubs[index % len(stubs)]
+                local: List[float] = []
+                failed = 0
+                for spec in part:
+                    t0 = time.perf_counter()
+                    try:
+                        _call(stub, rpc, spec)
+                    except grpc.RpcError:
+                        failed += 1
+                        continue
+                    local.append(time.perf_counter() - t0)
+                with lock:
+                    latencies.extend(local)
+                    errors += failed
+
+            started = time.perf_counter()
+            with futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(worker, range(concurrency), [specs[i::concurrency] for i in range(concurrency)]))
+            elapsed = time.perf_counter() - started
+            cpu_after = _proc_cpu_seconds(proc.pid)
+        finally:
+            for channel in opened:
+                channel.close()
+        rss_kb = _proc_status_kb(proc.pid, "VmRSS")
+        peak_rss_kb = _proc_status_kb(proc.pid, "VmHWM")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    latencies.sort()
+    ms = 1000.0
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "grpcio": grpc.__version__,
+        "config": {
+            "requests": requests,
+            "concurrency": concurrency,
+            "mix": mix,
+            "spec_bytes": spec_bytes,
+            "rpc": rpc,
+            "server_args": list(server_args),
+            "channels": channels,
+            "compression": compression,
+        },
+        "completed": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50) * ms, 3),
+            "p95": round(_percentile(latencies, 95) * ms, 3),
+            "p99": round(_percentile(latencies, 99) * ms, 3),
+            "max": round((latencies[-1] if latencies else 0.0) * ms, 3),
+        },
+        # Server CPU per measured request: what compression costs (or saves).
+        "server_cpu_ms_per_request": (
+            round((cpu_after - cpu_before) * ms / len(latencies), 4)
+            if cpu_before is not None and cpu_after is not None and latencies
+            else None
+        ),
+        "server_rss_kb": rss_kb,
+        "server_peak_rss_kb": peak_rss_kb,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests (after warmup)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Client threads issuing requests")
+    parser.add_argument("--mix", choices=SPEC_MIXES, default="mixed", help="How many distinct specs to send")
+    parser.add_argument("--spec-bytes", type=int, default=512, help="Approximate size of each spec")
+    parser.add_argument("--rpc", choices=RPCS, default="unary", help="Which RPC to drive")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests sent first")
+    parser.add_argument(
+        "--channels",
+        type=int,
+        default=1,
+        help="Client connections to spread requests over (use >1 against --workers servers)",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=COMPRESSIONS,
+        default="none",
+        help="Start the server with this response compression",
+    )
+    parser.add_argument(
+        "--server-arg",
+        action="append",
+        default=[],
+        dest="server_args",
+        help="Extra argument for the spawned server (repeatable), e.g. --server-arg=--async",
+    )
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+
+
+def run_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    report = run_bench(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        mix=args.mix,
+        spec_bytes=args.spec_bytes,
+        rpc=args.rpc,
+        warmup=args.warmup,
+        server_args=args.server_args,
+        channels=args.channels,
+        compression=args.compression,
+    )
+    lat = report["latency_ms"]
+    logging.info(
+        "bench: %d ok / %d errors, %.1f rps, p50 %.3fms p95 %.3fms p99 %.3fms, "
+        "server cpu %s ms/req, rss %s kB",
+        report["completed"],
+        report["errors"],
+        report["rps"],
+        lat["p50"],
+        lat["p95"],
+        lat["p99"],
+        report["server_cpu_ms_per_request"],
+        report["server_rss_kb"],
+    )
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        sys.stdout.write(payload + "\n")
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="boot-python bench")
+    add_arguments(parser)
+    run_from_args(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(levelname)s %(message)s")
+    main()
@@ -0,0 +1,214 @@
+"""
+Prompt bundle: every prompt component and template packed into one indexed file.
+
+Layout (all integers little-endian)::
+
+    magic    b"BPB3"
+    manifest sha256 (32 raw bytes) of the sorted entry names, see manifest_digest()
+    count    u32
+    count x  name_len u16 | name (UTF-8) | offset u64 | length u64 | sha256 (32 raw bytes)
+             | mtime_ns i64 | size u64 (the source file's stat when the bundle was built)
+    payloads UTF-8 text, each referenced by absolute offset/length
+
+Payloads are content-addressed: files with identical text share one payload. Loading is
+one read of the file and no hashing, since the digests come from the index. The file is
+read rather than memory-mapped: the store decodes every text up front anyway (overlay
+merging and the token index need them all), so a mapping would only add a copy.
+
+The bundle is used when it still describes the prompt files next to it:
+
+* In an installed package (under site-packages) only the names are compared with the
+  manifest. Installers do not preserve mtimes, and nobody edits files there.
+* Anywhere else, e.g. a source checkout, every file's size and mtime must also match
+  the ones recorded at build time, so any edit falls back to reading the files.
+
+Build with ``python -m boot_python.bundle`` (or ``make bundle``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+BUNDLE_NAME = "prompts.bundle"
+MAGIC = b"BPB3"
+
+_COUNT = struct.Struct("<I")
+_NAME_LEN = struct.Struct("<H")
+_ENTRY = struct.Struct("<QQ32sqQ")
+_HEADER_LEN = len(MAGIC) + 32
+
+# (mtime_ns, size) of a source file
+FileStat = Tuple[int, int]
+
+
+class BundleError(ValueError):
+    """The bundle file is missing, truncated or not a prompt bundle."""
+
+
+def manifest_digest(names: Iterable[str]) -> bytes:
+    return hashlib.sha256("\n".join(sorted(names)).encode("utf-8")).digest()
+
+
+def pack(files: Mapping[str, str], stats: Optional[Mapping[str, FileStat]] = None) -> bytes:
+    """Serializes ``{name: text}`` into bundle bytes, recording ``stats`` for freshness checks."""
+    names = sorted(files)
+    payloads: Dict[bytes, Tuple[int, bytes]] = {}  # digest -> (offset relative to data, payload)
+    data_len = 0
+    entries = []
+    for name in names:
+        payload = files[name].encode("utf-8")
+        digest = hashlib.sha256(payload).digest()
+        if digest not in payloads:
+            payloads[digest] = (data_len, payload)
+            data_len += len(payload)
+        stat = (stats or {}).get(name, (0, 0))
+        entries.append((name.encode("utf-8"), payloads[digest][0], len(payload), digest, stat))
+
+    header_len = _HEADER_LEN + _COUNT.size + sum(_NAME_LEN.size + len(n) + _ENTRY.size for n, *_ in entries)
+    out = [MAGIC, manifest_digest(names), _COUNT.pack(len(entries))]
+    for name, rel_offset, length, digest, (mtime_ns, size) in entries:
+        out += [_NAME_LEN.pack(len(name)), name, _ENTRY.pack(header_len + rel_offset, length, digest, mtime_ns, size)]
+    out += [payload for _, payload in sorted(payloads.values())]
+    return b"".join(out)
+
+
+def unpack(buf) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Returns ``({name: text}, {name: sha256 hex})`` from bundle bytes."""
+    texts, digests = {}, {}
+    try:
+        for name, offset, length, digest, _ in _entries(buf):
+            texts[name] = bytes(buf[offset : offset + length]).decode("utf-8")
+            digests[name] = digest.hex()
+    except UnicodeDecodeError as e:
+        raise BundleError(f"corrupt prompt bundle: {e}") from e
+    return texts, digests
+
+
+def _entries(buf) -> Iterator[Tuple[str, int, int, bytes, FileStat]]:
+    if bytes(buf[: len(MAGIC)]) != MAGIC:
+        raise BundleError("not a prompt bundle (or one from another version; rebuild it)")
+    try:
+        (count,) = _COUNT.unpack_from(buf, _HEADER_LEN)
+        pos = _HEADER_LEN + _COUNT.size
+        for _ in range(count):
+            (name_len,) = _NAME_LEN.unpack_from(buf, pos)
+            pos += _NAME_LEN.size
+            name = bytes(buf[pos : pos + name_len]).decode("utf-8")
+            pos += name_len
+            offset, length, digest, mtime_ns, size = _ENTRY.unpack_from(buf, pos)
+            pos += _ENTRY.size
+            if offset + length > len(buf):
+                raise BundleError(f"entry {name!r} runs past the end of the bundle")
+            yield name, offset, length, digest, (mtime_ns, size)
+    except (struct.error, UnicodeDecodeError) as e:
+        raise BundleError(f"corrupt prompt bundle: {e}") from e
+
+
+def read_bundle(path: os.PathLike | str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    data = Path(path).read_bytes()
+    if not data:
+        raise BundleError("empty prompt bundle")
+    return unpack(data)
+
+
+def read_fresh_bundle(
+    path: os.PathLike | str, root: os.PathLike | str
+) -> Optional[Tuple[Dict[str, str], Dict[str, str]]]:
+    """Like :func:`read_bundle`, but None when the bundle does not describe the prompt files in ``root``."""
+    data = Path(path).read_bytes()
+    return unpack(data) if _describes(data, root) else None
+
+
+def is_fresh(bundle_path: os.PathLike | str, root: os.PathLike | str) -> bool:
+    try:
+        return _describes(Path(bundle_path).read_bytes(), root)
+    except (OSError, BundleError):
+        return False
+
+
+def _describes(buf, root: os.PathLike | str) -> bool:
+    installed = is_installed(root)
+    files = scan_prompt_files(root, stat=not installed)
+    if bytes(buf[:_HEADER_LEN]) != MAGIC + manifest_digest(files):
+        return False
+    return installed or all(files[name] == stat for name, _, _, _, stat in _entries(buf))
+
+
+def is_installed(root: os.PathLike | str) -> bool:
+    """Whether ``root`` lies in a site-packages directory (editable installs do not)."""
+    import site
+    import sysconfig
+
+    bases = [sysconfig.get_paths()[key] for key in ("purelib", "platlib")] + [site.getusersitepackages()]
+    root = os.path.realpath(root)
+    return any(root.startswith(os.path.realpath(base) + os.sep) for base in bases)
+
+
+def scan_prompt_files(root: os.PathLike | str, stat: bool = True) -> Dict[str, Optional[FileStat]]:
+    """
+    ``{name: (mtime_ns, size)}`` for the prompt files under ``root``, named as
+    ``iter_prompt_files`` names them. With ``stat=False`` the values are None and
+    only directory listings are read.
+    """
+    from boot_python.prompt_store import OVERLAYS_DIR, PROMPT_SUFFIX, TEMPLATE_SUFFIX
+
+    def found(entry: os.DirEntry) -> Optional[FileStat]:
+        if not stat:
+            return None
+        st = entry.stat()
+        return st.st_mtime_ns, st.st_size
+
+    files: Dict[str, Optional[FileStat]] = {}
+    for entry in _scandir(os.fspath(root)):
+        if entry.name.endswith((PROMPT_SUFFIX, TEMPLATE_SUFFIX)) and entry.is_file():
+            files[entry.name] = found(entry)
+        elif entry.name == OVERLAYS_DIR and entry.is_dir():
+            for field_dir in (e for e in _scandir(entry.path) if e.is_dir()):
+                for value_dir in (e for e in _scandir(field_dir.path) if e.is_dir()):
+                    for f in _scandir(value_dir.path):
+                        if f.name.endswith(PROMPT_SUFFIX) and f.is_file():
+                            files[f"{OVERLAYS_DIR}/{field_dir.name}/{value_dir.name}/{f.name}"] = found(f)
+    return files
+
+
+def _scandir(path: str) -> List[os.DirEntry]:
+    with os.scandir(path) as it:
+        return list(it)
+
+
+def source_files(directory: os.PathLike | str) -> Dict[str, str]:
+    """The prompt files, overlay packs included, under the names the store loads them by."""
+    from boot_python.prompt_store import iter_prompt_files
+
+    entries = sorted(iter_prompt_files(Path(directory)), key=lambda item: item[0])
+    return {name: entry.read_text(encoding="utf-8") for name, entry in entries}
+
+
+def build_bundle(directory: os.PathLike | str, output: Optional[os.PathLike | str] = None) -> Path:
+    """Packs the prompt files in ``directory``; writes atomically next to them by default."""
+    out = Path(output) if output else Path(directory) / BUNDLE_NAME
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_bytes(pack(source_files(directory), scan_prompt_files(directory)))  # type: ignore[arg-type]
+    os.replace(tmp, out)
+    return out
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m boot_python.bundle", description="Build the prompt bundle")
+    parser.add_argument("directory", nargs="?", help="Prompt directory (default: the packaged prompts)")
+    parser.add_argument("--output", help=f"Bundle path (default: <directory>/{BUNDLE_NAME})")
+    args = parser.parse_args(argv)
+    out = build_bundle(args.directory or Path(__file__).parent / "prompts", args.output)
+    logging.info("wrote %s (%d bytes)", out, out.stat().st_size)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(levelname)s %(message)s")
+    main()
@@ -0,0 +1,464 @@
+"""
+Python clients for the plugin.
+
+:class:`PluginClient` (and :class:`AsyncPluginClient` for asyncio) either spawns
+``boot-python`` and parses its handshake, or attaches to one that is already running.
+Calls go over a long-lived channel with keepalive; sync clients attached to the same
+target share one channel. Components are cached client-side by ``set_digest`` and
+component digest, so repeat calls send conditional requests and the server only
+returns what changed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import grpc
+
+from boot_python.generated import plugin_pb2, plugin_pb2_grpc
+from boot_python.server_config import (
+    DEFAULT_KEEPALIVE_TIME_MS,
+    DEFAULT_KEEPALIVE_TIMEOUT_MS,
+    DEFAULT_MAX_MESSAGE_BYTES,
+    MIN_CLIENT_PING_INTERVAL_MS,
+)
+
+# Batches are cut at whichever limit is reached first. The byte limit keeps a request, and
+# its response with one result (and rendered templates) per spec, well under gRPC's
+# default 4 MiB message limit even for large specs; a single larger spec goes alone.
+DEFAULT_MAX_BATCH_SIZE = 500
+DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+SPAWN_TIMEOUT = 30.0
+# Component sets (one per overlay selection and token budget) kept per client.
+DEFAULT_CACHE_SETS = 16
+# Specs whose last set_digest is remembered, to pick what to send as known_set_digest.
+SPEC_MEMORY = 1024
+
+
+def get_prompt_components_batch(
+    channel: grpc.Channel,
+    specs: Sequence[str],
+    *,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    timeout: Optional[float] = None,
+) -> plugin_pb2.GetPromptComponentsBatchResponse:
+    """
+    Derives user-spec prompts for ``specs`` with as few round trips as possible.
+
+    Specs are sent in slices of at most ``max_batch_size`` specs and ``max_batch_bytes``
+    of spec text. Only the first slice transfers the shared components; the rest send
+    its ``set_digest`` back and get ``not_modified``. The merged response has one result
+    per spec, in input order.
+    """
+    stub = plugin_pb2_grpc.BootCodePluginStub(channel)
+    merged = plugin_pb2.GetPromptComponentsBatchResponse()
+    for batch in _batches(specs, max_batch_size, max_batch_bytes):
+        request = plugin_pb2.GetPromptComponentsBatchRequest(
+            spec_toml_contents=batch,
+            known_set_digest=merged.set_digest,
+        )
+        response = stub.GetPromptComponentsBatch(request, timeout=timeout)
+        _merge_batch(merged, response)
+    return merged
+
+
+def _batches(specs: Sequence[str], max_size: int, max_bytes: int) -> List[List[str]]:
+    """Splits ``specs`` in order at ``max_size`` specs or ``max_bytes`` UTF-8 bytes; never empty."""
+    batches: List[List[str]] = [[]]
+    size = 0
+    for spec in specs:
+        spec_bytes = len(spec.encode("utf-8"))
+        batch = batches[-1]
+        if batch and (len(batch) >= max_size or size + spec_bytes > max_bytes):
+            batch = []
+            batches.append(batch)
+            size = 0
+        batch.append(spec)
+        size += spec_bytes
+    return batches
+
+
+def _merge_batch(
+    merged: plugin_pb2.GetPromptComponentsBatchResponse, response: plugin_pb2.GetPromptComponentsBatchResponse
+) -> None:
+    if not response.not_modified:
+        # Components changed mid-way (e.g. a prompt reload): take the newer set.
+        merged.components.clear()
+        merged.components.update(response.components)
+        merged.digests.clear()
+        merged.digests.update(response.digests)
+        merged.set_digest = response.set_digest
+    merged.results.extend(response.results)
+
+
+@dataclass(frozen=True)
+class Handshake:
+    """A parsed ``CORE|APP|NETWORK|ADDRESS|PROTOCOL`` handshake line."""
+
+    core_version: int
+    app_version: int
+    network: str
+    address: str
+    protocol: str
+
+    @property
+    def target(self) -> str:
+        """The address in gRPC target syntax."""
+        return f"unix:{self.address}" if self.network == "unix" else self.address
+
+
+def parse_handshake(line: str) -> Handshake:
+    parts = line.strip().split("|")
+    if len(parts) != 5 or parts[2] not in ("tcp", "unix") or parts[4] != "grpc":
+        raise ValueError(f"Invalid handshake from plugin: {line.strip()!r}")
+    try:
+        return Handshake(int(parts[0]), int(parts[1]), parts[2], parts[3], parts[4])
+    except ValueError:
+        raise ValueError(f"Invalid handshake from plugin: {line.strip()!r}") from None
+
+
+def spawn_plugin(
+    args: Sequence[str] = (), timeout: float = SPAWN_TIMEOUT
+) -> Tuple[subprocess.Popen, Handshake]:
+    """Starts ``boot-python`` with ``args`` and returns it with its parsed handshake."""
+    import select
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "boot_python.main", *args],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert proc.stdout is not None
+    ready, _, _ = select.select([proc.stdout], [], [], timeout)
+    line = proc.stdout.readline() if ready else ""
+    try:
+        return proc, parse_handshake(line)
+    except ValueError:
+        proc.kill()
+        proc.wait()
+        raise
+
+
+def channel_options(keepalive_time_ms: int = DEFAULT_KEEPALIVE_TIME_MS) -> List[Tuple[str, int]]:
+    # The server refuses pings more frequent than MIN_CLIENT_PING_INTERVAL_MS.
+    keepalive_time_ms = max(keepalive_time_ms, MIN_CLIENT_PING_INTERVAL_MS)
+    return [
+        ("grpc.keepalive_time_ms", keepalive_time_ms),
+        ("grpc.keepalive_timeout_ms", DEFAULT_KEEPALIVE_TIMEOUT_MS),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.max_receive_message_length", DEFAULT_MAX_MESSAGE_BYTES),
+    ]
+
+
+class _ChannelPool:
+    """One channel per (target, options), closed when its last user releases it."""
+
+    def __init__(self) -> None:
+        self._channels: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, target: str, options: Sequence[Tuple[str, int]]) -> grpc.Channel:
+        key = (target, tuple(options))
+        with self._lock:
+            entry = self._channels.get(key)
+            if entry is None:
+                entry = self._channels[key] = [grpc.insecure_channel(target, options=list(options)), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, channel: grpc.Channel) -> None:
+        with self._lock:
+            for key, entry in self._channels.items():
+                if entry[0] is channel:
+                    entry[1] -= 1
+                    if not entry[1]:
+                        del self._channels[key]
+                        channel.close()
+                    return
+
+
+_POOL = _ChannelPool()
+
+
+class ComponentCache:
+    """
+    Component texts by digest and component sets by ``set_digest``, plus the set each
+    recent spec resolved to. Thread-safe; shared by sync and async clients alike.
+    """
+
+    def __init__(self, max_sets: int = DEFAULT_CACHE_SETS) -> None:
+        self.max_sets = max_sets
+        self.hits = 0
+        self.misses = 0
+        self._sets: OrderedDict[str, Mapping[str, str]] = OrderedDict()
+        self._texts: Dict[str, str] = {}
+        self._spec_sets: OrderedDict[Tuple[str, int], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def known_fields(self, spec_toml_content: str, max_tokens: int = 0) -> Dict[str, object]:
+        """``known_set_digest`` / ``known_digests`` to send for this request."""
+        with self._lock:
+            set_digest = self._spec_sets.get((spec_toml_content, max_tokens))
+            if set_digest is None and self._sets:
+                # A new spec most likely selects the same overlays as the last one did.
+                set_digest = next(reversed(self._sets))
+            digests = self._sets.get(set_digest or "")
+            if digests is None:
+                return {}
+            return {"known_set_digest": set_digest, "known_digests": digests}
+
+    def complete(
+        self,
+        spec_toml_content: str,
+        max_tokens: int,
+        sent: Mapping[str, object],
+        response: plugin_pb2.GetPromptComponentsResponse,
+    ) -> bool:
+        """
+        Fills in the components, digests and set_digest the server left out of
+        ``response`` and remembers its set. False if a component is no longer cached,
+        in which case the request should be repeated without known digests.
+        """
+        with self._lock:
+            if response.not_modified:
+                set_digest = str(sent["known_set_digest"])
+                digests = self._sets.get(set_digest)
+                if digests is None:
+                    return False
+                self.hits += 1
+                response.not_modified = False
+                response.set_digest = set_digest
+                response.digests.update(digests)
+            else:
+                set_digest = response.set_digest
+                digests = dict(response.digests)
+                if len(response.components) < len(digests):
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                for name, text in response.components.items():
+                    self._texts[digests[name]] = text
+            missing = [n for n, d in digests.items() if n not in response.components and d not in self._texts]
+            if missing:
+                return False
+            for name, digest in digests.items():
+                if name not in response.components:
+                    response.components[name] = self._texts[digest]
+            self._remember(set_digest, digests, (spec_toml_content, max_tokens))
+            return True
+
+    def _remember(self, set_digest: str, digests: Mapping[str, str], spec_key: Tuple[str, int]) -> None:
+        self._sets[set_digest] = digests
+        self._sets.move_to_end(set_digest)
+        self._spec_sets[spec_key] = set_digest
+        self._spec_sets.move_to_end(spec_key)
+        while len(self._spec_sets) > SPEC_MEMORY:
+            self._spec_sets.popitem(last=False)
+        if len(self._sets) > self.max_sets:
+            self._sets.popitem(last=False)
+            live = {d for digests in self._sets.values() for d in digests.values()}
+            self._texts = {d: t for d, t in self._texts.items() if d in live}
+
+
+def _target(handshake_or_target: Union[Handshake, str]) -> str:
+    if isinstance(handshake_or_target, Handshake):
+        return handshake_or_target.target
+    if handshake_or_target.count("|") == 4:
+        return parse_handshake(handshake_or_target).target
+    return handshake_or_target
+
+
+class PluginClient:
+    """
+    Sync client. Use :meth:`spawn` to start a plugin owned by this client (stopped on
+    :meth:`close`) or :meth:`attach` for one that is already running.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        *,
+        process: Optional[subprocess.Popen] = None,
+        keepalive_time_ms: int = DEFAULT_KEEPALIVE_TIME_MS,
+        cache: Optional[ComponentCache] = None,
+    ) -> None:
+        self.target = target
+        self.process = process
+        self.cache = cache if cache is not None else ComponentCache()
+        self.channel = _POOL.acquire(target, channel_options(keepalive_time_ms))
+        self._stub = plugin_pb2_grpc.BootCodePluginStub(self.channel)
+        self._closed = False
+
+    @classmethod
+    def spawn(cls, args: Sequence[str] = (), *, timeout: float = SPAWN_TIMEOUT, **kwargs) -> "PluginClient":
+        proc, handshake = spawn_plugin(args, timeout)
+        return cls(handshake.target, process=proc, **kwargs)
+
+    @classmethod
+    def attach(cls, handshake_or_target: Union[Handshake, str], **kwargs) -> "PluginClient":
+        """Connects to a running plugin, given its handshake line or a gRPC target."""
+        return cls(_target(handshake_or_target), **kwargs)
+
+    def get_prompt_components(
+        self,
+        spec_toml_content: str = "",
+        *,
+        max_tokens: int = 0,
+        timeout: Optional[float] = None,
+    ) -> plugin_pb2.GetPromptComponentsResponse:
+        """Always returns the complete component set, however little went over the wire."""
+        known = self.cache.known_fields(spec_toml_content, max_tokens)
+        request = plugin_pb2.GetPromptComponentsRequest(
+            spec_toml_content=spec_toml_content, max_tokens=max_tokens, **known
+        )
+        response = self._stub.GetPromptComponents(request, timeout=timeout)
+        if not self.cache.complete(spec_toml_content, max_tokens, known, response):
+            request = plugin_pb2.GetPromptComponentsRequest(spec_toml_content=spec_toml_content, max_tokens=max_tokens)
+            response = self._stub.GetPromptComponents(request, timeout=timeout)
+            self.cache.complete(spec_toml_content, max_tokens, {}, response)
+        return response
+
+    def get_prompt_components_batch(
+        self,
+        specs: Sequence[str],
+        *,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        timeout: Optional[float] = None,
+    ) -> plugin_pb2.GetPromptComponentsBatchResponse:
+        return get_prompt_components_batch(
+            self.channel, specs, max_batch_size=max_batch_size, max_batch_bytes=max_batch_bytes, timeout=timeout
+        )
+
+    def assemble_prompt(
+        self,
+        spec_toml_content: str = "",
+        *,
+        components: Sequence[str] = (),
+        max_tokens: int = 0,
+        timeout: Optional[float] = None,
+    ) -> plugin_pb2.AssemblePromptResponse:
+        request = plugin_pb2.AssemblePromptRequest(
+            spec_toml_content=spec_toml_content, components=components, max_tokens=max_tokens
+        )
+        return self._stub.AssemblePrompt(request, timeout=timeout)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        _POOL.release(self.channel)
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+
+    def __enter__(self) -> "PluginClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AsyncPluginClient:
+    """
+    asyncio client with the same API as :class:`PluginClient`. Its channel belongs to
+    the event loop it was created on, so each client keeps one of its own.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        *,
+        process: Optional[subprocess.Popen] = None,
+        keepalive_time_ms: int = DEFAULT_KEEPALIVE_TIME_MS,
+        cache: Optional[ComponentCache] = None,
+    ) -> None:
+        self.target = target
+        self.process = process
+        self.cache = cache if cache is not None else ComponentCache()
+        self.channel = grpc.aio.insecure_channel(target, options=channel_options(keepalive_time_ms))
+        self._stub = plugin_pb2_grpc.BootCodePluginStub(self.channel)
+        self._closed = False
+
+    @classmethod
+    async def spawn(
+        cls, args: Sequence[str] = (), *, timeout: float = SPAWN_TIMEOUT, **kwargs
+    ) -> "AsyncPluginClient":
+        proc, handshake = await asyncio.to_thread(spawn_plugin, args, timeout)
+        return cls(handshake.target, process=proc, **kwargs)
+
+    @classmethod
+    def attach(cls, handshake_or_target: Union[Handshake, str], **kwargs) -> "AsyncPluginClient":
+        return cls(_target(handshake_or_target), **kwargs)
+
+    async def get_prompt_components(
+        self,
+        spec_toml_content: str = "",
+        *,
+        max_tokens: int = 0,
+        timeout: Optional[float] = None,
+    ) -> plugin_pb2.GetPromptComponentsResponse:
+        known = self.cache.known_fields(spec_toml_content, max_tokens)
+        request = plugin_pb2.GetPromptComponentsRequest(
+            spec_toml_content=spec_toml_content, max_tokens=max_tokens, **known
+        )
+        response = await self._stub.GetPromptComponents(request, timeout=timeout)
+        if not self.cache.complete(spec_toml_content, max_tokens, known, response):
+            request = plugin_pb2.GetPromptComponentsRequest(spec_toml_content=spec_toml_content, max_tokens=max_tokens)
+            response = await self._stub.GetPromptComponents(request, timeout=timeout)
+            self.cache.complete(spec_toml_content, max_tokens, {}, response)
+        return response
+
+    async def get_prompt_components_batch(
+        self,
+        specs: Sequence[str],
+        *,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        timeout: Optional[float] = None,
+    ) -> plugin_pb2.GetPromptComponentsBatchResponse:
+        merged = plugin_pb2.GetPromptComponentsBatchResponse()
+        for batch in _batches(specs, max_batch_size, max_batch_bytes):
+            request = plugin_pb2.GetPromptComponentsBatchRequest(
+                spec_toml_contents=batch,
+                known_set_digest=merged.set_digest,
+            )
+            response = await self._stub.GetPromptComponentsBatch(request, timeout=timeout)
+            _merge_batch(merged, response)
+        return merged
+
+    async def assemble_prompt(
+        self,
+        spec_toml_content: str = "",
+        *,
+        components: Sequence[str] = (),
+        max_tokens: int = 0,
+        timeout: Optional[float] = None,
+    ) -> plugin_pb2.AssemblePromptResponse:
+        request = plugin_pb2.AssemblePromptRequest(
+            spec_toml_content=spec_toml_content, components=components, max_tokens=max_tokens
+        )
+        return await self._stub.AssemblePrompt(request, timeout=timeout)
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        await self.channel.close()
+        if self.process is not None:
+            self.process.terminate()
+            await asyncio.to_thread(self.process.wait)
+
+    async def __aenter__(self) -> "AsyncPluginClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
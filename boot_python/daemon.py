@@ -0,0 +1,239 @@
+"""
+Persistent daemon mode.
+
+The first ``boot-python --daemon`` starts a detached server on a Unix domain socket in
+a per-user runtime directory. It and every later invocation then just print a handshake
+pointing at that socket, so they pay neither the gRPC imports nor prompt loading. The
+daemon holds an exclusive lock for its lifetime and exits after ``idle_timeout`` seconds
+without RPCs and without an attached ``--daemon`` process. Each attached process holds a
+shared lock on the sessions file, which the kernel drops when it dies, so a session that
+is quiet but still open keeps the daemon up and a crashed one never does.
+
+The socket, lock and sessions file are named after the version and a hash of the server
+arguments, so an invocation with different settings (``--max-spec-bytes``, prompt dirs,
+...) starts its own daemon instead of attaching to one configured otherwise.
+
+Only the standard library is imported at module level so the attach path stays cheap.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+from boot_python import __version__
+
+HANDSHAKE_UNIX = "1|1|unix|{path}|grpc"
+RUNTIME_DIR_ENV = "BOOT_PYTHON_RUNTIME_DIR"
+IDLE_TIMEOUT_ENV = "BOOT_PYTHON_DAEMON_IDLE_TIMEOUT"
+DEFAULT_IDLE_TIMEOUT = 600.0
+SPAWN_TIMEOUT = 10.0
+
+
+def runtime_dir() -> Path:
+    base = os.getenv(RUNTIME_DIR_ENV)
+    if base:
+        path = Path(base)
+    elif os.getenv("XDG_RUNTIME_DIR"):
+        path = Path(os.environ["XDG_RUNTIME_DIR"]) / "boot-python"
+    else:
+        path = Path("/tmp") / f"boot-python-{os.getuid()}"
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return path
+
+
+def config_key(server_args: Sequence[str]) -> str:
+    """Short hash identifying a daemon's settings; part of every path that daemon uses."""
+    return hashlib.sha256("\0".join(server_args).encode("utf-8")).hexdigest()[:16]
+
+
+def socket_path(key: str) -> Path:
+    # Versioned so an upgraded plugin never attaches to a daemon running older code.
+    return runtime_dir() / f"boot-python-{__version__}-{key}.sock"
+
+
+def lock_path(key: str) -> Path:
+    return runtime_dir() / f"boot-python-{__version__}-{key}.lock"
+
+
+def sessions_path(key: str) -> Path:
+    return runtime_dir() / f"boot-python-{__version__}-{key}.sessions"
+
+
+def join_session(key: str) -> int:
+    """Marks this process as attached until it exits (or closes the returned fd)."""
+    fd = os.open(sessions_path(key), os.O_RDWR | os.O_CREAT, 0o600)
+    fcntl.flock(fd, fcntl.LOCK_SH)
+    return fd
+
+
+def sessions_attached(key: str) -> bool:
+    fd = _try_lock(sessions_path(key), write_pid=False)
+    if fd is None:
+        return True
+    os.close(fd)
+    return False
+
+
+def idle_timeout_from_env(default: float = DEFAULT_IDLE_TIMEOUT) -> float:
+    raw = os.getenv(IDLE_TIMEOUT_ENV)
+    return float(raw) if raw else default
+
+
+def daemon_alive(path: Path) -> bool:
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+
+def _try_lock(path: Path, write_pid: bool = True) -> Optional[int]:
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    if write_pid:
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode("ascii"))
+    return fd
+
+
+def _lock_held(key: str) -> bool:
+    fd = _try_lock(lock_path(key), write_pid=False)
+    if fd is None:
+        return True
+    os.close(fd)
+    return False
+
+
+def spawn_daemon(server_args: Sequence[str] = ()) -> subprocess.Popen:
+    log = open(runtime_dir() / "daemon.log", "ab")
+    key = config_key(server_args)
+    try:
+        return subprocess.Popen(
+            [sys.executable, "-m", "boot_python.main", "--daemon-serve", "--daemon-key", key, *server_args],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            start_new_session=True,  # survive the session boot-code tears down
+        )
+    finally:
+        log.close()
+
+
+def ensure_daemon(server_args: Sequence[str] = (), timeout: float = SPAWN_TIMEOUT) -> Path:
+    """Returns the socket of a running daemon with these settings, starting one first if needed."""
+    key = config_key(server_args)
+    path = socket_path(key)
+    if daemon_alive(path):
+        return path
+    proc = spawn_daemon(server_args)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if daemon_alive(path):
+            return path
+        # A racing invocation may own the lock, in which case our child exits; keep waiting.
+        if proc.poll() is not None and not _lock_held(key):
+            break
+        time.sleep(0.02)
+    raise RuntimeError(f"boot-python daemon did not come up on {path}")
+
+
+def attach(server_args: Sequence[str] = (), exit_after_handshake: bool = False) -> None:
+    """Prints a handshake for the (possibly new) daemon and stays alive until signalled."""
+    if not exit_after_handshake:
+        # Joined before the daemon is looked up, so an idle one cannot exit in between.
+        join_session(config_key(server_args))
+    path = ensure_daemon(server_args)
+    sys.stdout.write(HANDSHAKE_UNIX.format(path=path) + "\n")
+    sys.stdout.flush()
+    if exit_after_handshake:
+        return
+    # boot-code owns this process's lifetime; the daemon outlives it.
+    signals = {signal.SIGINT, signal.SIGTERM}
+    signal.pthread_sigmask(signal.SIG_BLOCK, signals)
+    signal.sigwait(signals)
+
+
+def serve(
+    server, key: str, idle_timeout: float, activity, on_started: Optional[Callable[[], None]] = None
+) -> None:
+    """
+    Runs an already-built (not yet started) grpc server on ``socket_path(key)`` until
+    idle or signalled. ``activity`` exposes ``last_seen`` (monotonic time of the latest
+    RPC); an attached session counts as activity too. ``on_started`` runs once it listens.
+    """
+    path = socket_path(key)
+    lock_fd = _try_lock(lock_path(key))
+    if lock_fd is None:
+        logging.info("boot-python daemon already running; exiting")
+        return
+    stop = {"flag": False}
+
+    def _sigterm(*_):
+        stop["flag"] = True
+
+    signal.signal(signal.SIGINT, _sigterm)
+    signal.signal(signal.SIGTERM, _sigterm)
+    try:
+        if path.exists():
+            path.unlink()  # stale socket from a daemon that died without cleaning up
+        if not server.add_insecure_port(f"unix:{path}"):
+            raise RuntimeError(f"Failed to bind {path}")
+        server.start()
+        os.chmod(path, 0o600)
+        logging.info("boot-python daemon (pid %d) listening on %s", os.getpid(), path)
+        if on_started is not None:
+            on_started()
+        attached_seen = 0.0
+        while not stop["flag"]:
+            now = time.monotonic()
+            if idle_timeout > 0 and now - max(activity.last_seen, attached_seen) >= idle_timeout:
+                if not sessions_attached(key):
+                    logging.info("boot-python daemon idle for %.0fs; exiting", idle_timeout)
+                    break
+                # The idle clock restarts when the last session detaches.
+                attached_seen = now
+            time.sleep(0.5)
+    finally:
+        server.stop(grace=1.0).wait()
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        os.close(lock_fd)
+        logging.info("boot-python daemon stopped")
+
+
+def daemon_server_args(
+    reload_prompts: bool,
+    max_spec_bytes: int,
+    idle_timeout: float,
+    metrics_port: Optional[int] = None,
+    metrics_dump: Optional[str] = None,
+    extra_args: Sequence[str] = (),
+) -> List[str]:
+    args = ["--max-spec-bytes", str(max_spec_bytes), "--daemon-idle-timeout", str(idle_timeout)]
+    if reload_prompts:
+        args.append("--reload-prompts")
+    if metrics_port is not None:
+        args += ["--metrics-port", str(metrics_port)]
+    if metrics_dump:
+        args += ["--metrics-dump", os.path.abspath(metrics_dump)]
+    args.extend(extra_args)
+    return args
@@ -24,21 +24,67 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cplugin.proto\x12\x06plugin\"7\n\x1aGetPromptComponentsRequest\x12\x19\n\x11spec_toml_content\x18\x01 \x01(\t\"\xb3\x01\n\x1bGetPromptComponentsResponse\x12G\n\ncomponents\x18\x01 \x03(\x0b\x32\x33.plugin.GetPromptComponentsResponse.ComponentsEntry\x12\x18\n\x10user_spec_prompt\x18\x02 \x01(\t\x1a\x31\n\x0f\x43omponentsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x32r\n\x0e\x42ootCodePlugin\x12`\n\x13GetPromptComponents\x12\".plugin.GetPromptComponentsRequest\x1a#.plugin.GetPromptComponentsResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cplugin.proto\x12\x06plugin\"\xe7\x01\n\x1aGetPromptComponentsRequest\x12\x19\n\x11spec_toml_content\x18\x01 \x01(\t\x12K\n\rknown_digests\x18\x02 \x03(\x0b\x32\x34.plugin.GetPromptComponentsRequest.KnownDigestsEntry\x12\x18\n\x10known_set_digest\x18\x03 \x01(\t\x12\x12\n\nmax_tokens\x18\x04 \x01(\r\x1a\x33\n\x11KnownDigestsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\xf1\x03\n\x1bGetPromptComponentsResponse\x12G\n\ncomponents\x18\x01 \x03(\x0b\x32\x33.plugin.GetPromptComponentsResponse.ComponentsEntry\x12\x18\n\x10user_spec_prompt\x18\x02 \x01(\t\x12\x14\n\x0cnot_modified\x18\x03 \x01(\x08\x12\x41\n\x07\x64igests\x18\x04 \x03(\x0b\x32\x30.plugin.GetPromptComponentsResponse.DigestsEntry\x12\x12\n\nset_digest\x18\x05 \x01(\t\x12\x43\n\x08rendered\x18\x06 \x03(\x0b\x32\x31.plugin.GetPromptComponentsResponse.RenderedEntry\x12\x18\n\x10\x65stimated_tokens\x18\x07 \x01(\r\x12\x0f\n\x07trimmed\x18\x08 \x03(\t\x1a\x31\n\x0f\x43omponentsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a.\n\x0c\x44igestsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a/\n\rRenderedEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\xd2\x01\n\x14PromptComponentChunk\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\t\x12\x12\n\nlast_chunk\x18\x03 \x01(\x08\x12\x18\n\x10user_spec_prompt\x18\x04 \x01(\t\x12<\n\x08rendered\x18\x05 \x03(\x0b\x32*.plugin.PromptComponentChunk.RenderedEntry\x1a/\n\rRenderedEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\xde\x01\n\x1fGetPromptComponentsBatchRequest\x12\x1a\n\x12spec_toml_contents\x18\x01 \x03(\t\x12P\n\rknown_digests\x18\x02 \x03(\x0b\x32\x39.plugin.GetPromptComponentsBatchRequest.KnownDigestsEntry\x12\x18\n\x10known_set_digest\x18\x03 \x01(\t\x1a\x33\n\x11KnownDigestsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\xae\x01\n\x14UserSpecPromptResult\x12\x18\n\x10user_spec_prompt\x18\x01 \x01(\t\x12\r\n\x05\x65rror\x18\x02 \x01(\t\x12<\n\x08rendered\x18\x03 \x03(\x0b\x32*.plugin.UserSpecPromptResult.RenderedEntry\x1a/\n\rRenderedEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\xf4\x02\n GetPromptComponentsBatchResponse\x12L\n\ncomponents\x18\x01 \x03(\x0b\x32\x38.plugin.GetPromptComponentsBatchResponse.ComponentsEntry\x12-\n\x07results\x18\x02 \x03(\x0b\x32\x1c.plugin.UserSpecPromptResult\x12\x14\n\x0cnot_modified\x18\x03 \x01(\x08\x12\x46\n\x07\x64igests\x18\x04 \x03(\x0b\x32\x35.plugin.GetPromptComponentsBatchResponse.DigestsEntry\x12\x12\n\nset_digest\x18\x05 \x01(\t\x1a\x31\n\x0f\x43omponentsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a.\n\x0c\x44igestsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"Z\n\x15\x41ssemblePromptRequest\x12\x19\n\x11spec_toml_content\x18\x01 \x01(\t\x12\x12\n\nmax_tokens\x18\x02 \x01(\r\x12\x12\n\ncomponents\x18\x03 \x03(\t\"=\n\rPromptSegment\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0e\n\x06offset\x18\x02 \x01(\r\x12\x0e\n\x06length\x18\x03 \x01(\r\"\xaa\x01\n\x16\x41ssemblePromptResponse\x12\x0e\n\x06prompt\x18\x01 \x01(\t\x12\'\n\x08segments\x18\x02 \x03(\x0b\x32\x15.plugin.PromptSegment\x12\x15\n\rprefix_digest\x18\x03 \x01(\t\x12\x15\n\rprefix_length\x18\x04 \x01(\r\x12\x18\n\x10\x65stimated_tokens\x18\x05 \x01(\r\x12\x0f\n\x07trimmed\x18\x06 \x03(\t2\x99\x03\n\x0e\x42ootCodePlugin\x12`\n\x13GetPromptComponents\x12\".plugin.GetPromptComponentsRequest\x1a#.plugin.GetPromptComponentsResponse\"\x00\x12\x61\n\x19GetPromptComponentsStream\x12\".plugin.GetPromptComponentsRequest\x1a\x1c.plugin.PromptComponentChunk\"\x00\x30\x01\x12o\n\x18GetPromptComponentsBatch\x12\'.plugin.GetPromptComponentsBatchRequest\x1a(.plugin.GetPromptComponentsBatchResponse\"\x00\x12Q\n\x0e\x41ssemblePrompt\x12\x1d.plugin.AssemblePromptRequest\x1a\x1e.plugin.AssemblePromptResponse\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'plugin_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_GETPROMPTCOMPONENTSREQUEST_KNOWNDIGESTSENTRY']._loaded_options = None
+  _globals['_GETPROMPTCOMPONENTSREQUEST_KNOWNDIGESTSENTRY']._serialized_options = b'8\001'
   _globals['_GETPROMPTCOMPONENTSRESPONSE_COMPONENTSENTRY']._loaded_options = None
   _globals['_GETPROMPTCOMPONENTSRESPONSE_COMPONENTSENTRY']._serialized_options = b'8\001'
-  _globals['_GETPROMPTCOMPONENTSREQUEST']._serialized_start=24
-  _globals['_GETPROMPTCOMPONENTSREQUEST']._serialized_end=79
-  _globals['_GETPROMPTCOMPONENTSRESPONSE']._serialized_start=82
-  _globals['_GETPROMPTCOMPONENTSRESPONSE']._serialized_end=261
-  _globals['_GETPROMPTCOMPONENTSRESPONSE_COMPONENTSENTRY']._serialized_start=212
-  _globals['_GETPROMPTCOMPONENTSRESPONSE_COMPONENTSENTRY']._serialized_end=261
-  _globals['_BOOTCODEPLUGIN']._serialized_start=263
-  _globals['_BOOTCODEPLUGIN']._serialized_end=377
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_DIGESTSENTRY']._loaded_options = None
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_DIGESTSENTRY']._serialized_options = b'8\001'
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_RENDEREDENTRY']._loaded_options = None
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_RENDEREDENTRY']._serialized_options = b'8\001'
+  _globals['_PROMPTCOMPONENTCHUNK_RENDEREDENTRY']._loaded_options = None
+  _globals['_PROMPTCOMPONENTCHUNK_RENDEREDENTRY']._serialized_options = b'8\001'
+  _globals['_GETPROMPTCOMPONENTSBATCHREQUEST_KNOWNDIGESTSENTRY']._loaded_options = None
+  _globals['_GETPROMPTCOMPONENTSBATCHREQUEST_KNOWNDIGESTSENTRY']._serialized_options = b'8\001'
+  _globals['_USERSPECPROMPTRESULT_RENDEREDENTRY']._loaded_options = None
+  _globals['_USERSPECPROMPTRESULT_RENDEREDENTRY']._serialized_options = b'8\001'
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE_COMPONENTSENTRY']._loaded_options = None
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE_COMPONENTSENTRY']._serialized_options = b'8\001'
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE_DIGESTSENTRY']._loaded_options = None
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE_DIGESTSENTRY']._serialized_options = b'8\001'
+  _globals['_GETPROMPTCOMPONENTSREQUEST']._serialized_start=25
+  _globals['_GETPROMPTCOMPONENTSREQUEST']._serialized_end=256
+  _globals['_GETPROMPTCOMPONENTSREQUEST_KNOWNDIGESTSENTRY']._serialized_start=205
+  _globals['_GETPROMPTCOMPONENTSREQUEST_KNOWNDIGESTSENTRY']._serialized_end=256
+  _globals['_GETPROMPTCOMPONENTSRESPONSE']._serialized_start=259
+  _globals['_GETPROMPTCOMPONENTSRESPONSE']._serialized_end=756
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_COMPONENTSENTRY']._serialized_start=610
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_COMPONENTSENTRY']._serialized_end=659
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_DIGESTSENTRY']._serialized_start=661
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_DIGESTSENTRY']._serialized_end=707
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_RENDEREDENTRY']._serialized_start=709
+  _globals['_GETPROMPTCOMPONENTSRESPONSE_RENDEREDENTRY']._serialized_end=756
+  _globals['_PROMPTCOMPONENTCHUNK']._serialized_start=759
+  _globals['_PROMPTCOMPONENTCHUNK']._serialized_end=969
+  _globals['_PROMPTCOMPONENTCHUNK_RENDEREDENTRY']._serialized_start=709
+  _globals['_PROMPTCOMPONENTCHUNK_RENDEREDENTRY']._serialized_end=756
+  _globals['_GETPROMPTCOMPONENTSBATCHREQUEST']._serialized_start=972
+  _globals['_GETPROMPTCOMPONENTSBATCHREQUEST']._serialized_end=1194
+  _globals['_GETPROMPTCOMPONENTSBATCHREQUEST_KNOWNDIGESTSENTRY']._serialized_start=205
+  _globals['_GETPROMPTCOMPONENTSBATCHREQUEST_KNOWNDIGESTSENTRY']._serialized_end=256
+  _globals['_USERSPECPROMPTRESULT']._serialized_start=1197
+  _globals['_USERSPECPROMPTRESULT']._serialized_end=1371
+  _globals['_USERSPECPROMPTRESULT_RENDEREDENTRY']._serialized_start=709
+  _globals['_USERSPECPROMPTRESULT_RENDEREDENTRY']._serialized_end=756
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE']._serialized_start=1374
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE']._serialized_end=1746
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE_COMPONENTSENTRY']._serialized_start=610
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE_COMPONENTSENTRY']._serialized_end=659
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE_DIGESTSENTRY']._serialized_start=661
+  _globals['_GETPROMPTCOMPONENTSBATCHRESPONSE_DIGESTSENTRY']._serialized_end=707
+  _globals['_ASSEMBLEPROMPTREQUEST']._serialized_start=1748
+  _globals['_ASSEMBLEPROMPTREQUEST']._serialized_end=1838
+  _globals['_PROMPTSEGMENT']._serialized_start=1840
+  _globals['_PROMPTSEGMENT']._serialized_end=1901
+  _globals['_ASSEMBLEPROMPTRESPONSE']._serialized_start=1904
+  _globals['_ASSEMBLEPROMPTRESPONSE']._serialized_end=2074
+  _globals['_BOOTCODEPLUGIN']._serialized_start=2077
+  _globals['_BOOTCODEPLUGIN']._serialized_end=2486
 # @@protoc_insertion_point(module_scope)
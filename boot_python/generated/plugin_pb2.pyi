@@ -1,18 +1,32 @@
 from google.protobuf.internal import containers as _containers
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
-from typing import ClassVar as _ClassVar, Mapping as _Mapping, Optional as _Optional
+from collections.abc import Iterable as _Iterable, Mapping as _Mapping
+from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
 
 DESCRIPTOR: _descriptor.FileDescriptor
 
 class GetPromptComponentsRequest(_message.Message):
-    __slots__ = ("spec_toml_content",)
+    __slots__ = ("spec_toml_content", "known_digests", "known_set_digest", "max_tokens")
+    class KnownDigestsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
     SPEC_TOML_CONTENT_FIELD_NUMBER: _ClassVar[int]
+    KNOWN_DIGESTS_FIELD_NUMBER: _ClassVar[int]
+    KNOWN_SET_DIGEST_FIELD_NUMBER: _ClassVar[int]
+    MAX_TOKENS_FIELD_NUMBER: _ClassVar[int]
     spec_toml_content: str
-    def __init__(self, spec_toml_content: _Optional[str] = ...) -> None: ...
+    known_digests: _containers.ScalarMap[str, str]
+    known_set_digest: str
+    max_tokens: int
+    def __init__(self, spec_toml_content: _Optional[str] = ..., known_digests: _Optional[_Mapping[str, str]] = ..., known_set_digest: _Optional[str] = ..., max_tokens: _Optional[int] = ...) -> None: ...
 
 class GetPromptComponentsResponse(_message.Message):
-    __slots__ = ("components", "user_spec_prompt")
+    __slots__ = ("components", "user_spec_prompt", "not_modified", "digests", "set_digest", "rendered", "estimated_tokens", "trimmed")
     class ComponentsEntry(_message.Message):
         __slots__ = ("key", "value")
         KEY_FIELD_NUMBER: _ClassVar[int]
@@ -20,8 +34,153 @@ class GetPromptComponentsResponse(_message.Message):
         key: str
         value: str
         def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+    class DigestsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+    class RenderedEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
     COMPONENTS_FIELD_NUMBER: _ClassVar[int]
     USER_SPEC_PROMPT_FIELD_NUMBER: _ClassVar[int]
+    NOT_MODIFIED_FIELD_NUMBER: _ClassVar[int]
+    DIGESTS_FIELD_NUMBER: _ClassVar[int]
+    SET_DIGEST_FIELD_NUMBER: _ClassVar[int]
+    RENDERED_FIELD_NUMBER: _ClassVar[int]
+    ESTIMATED_TOKENS_FIELD_NUMBER: _ClassVar[int]
+    TRIMMED_FIELD_NUMBER: _ClassVar[int]
     components: _containers.ScalarMap[str, str]
     user_spec_prompt: str
-    def __init__(self, components: _Optional[_Mapping[str, str]] = ..., user_spec_prompt: _Optional[str] = ...) -> None: ...
+    not_modified: bool
+    digests: _containers.ScalarMap[str, str]
+    set_digest: str
+    rendered: _containers.ScalarMap[str, str]
+    estimated_tokens: int
+    trimmed: _containers.RepeatedScalarFieldContainer[str]
+    def __init__(self, components: _Optional[_Mapping[str, str]] = ..., user_spec_prompt: _Optional[str] = ..., not_modified: bool = ..., digests: _Optional[_Mapping[str, str]] = ..., set_digest: _Optional[str] = ..., rendered: _Optional[_Mapping[str, str]] = ..., estimated_tokens: _Optional[int] = ..., trimmed: _Optional[_Iterable[str]] = ...) -> None: ...
+
+class PromptComponentChunk(_message.Message):
+    __slots__ = ("name", "content", "last_chunk", "user_spec_prompt", "rendered")
+    class RenderedEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    CONTENT_FIELD_NUMBER: _ClassVar[int]
+    LAST_CHUNK_FIELD_NUMBER: _ClassVar[int]
+    USER_SPEC_PROMPT_FIELD_NUMBER: _ClassVar[int]
+    RENDERED_FIELD_NUMBER: _ClassVar[int]
+    name: str
+    content: str
+    last_chunk: bool
+    user_spec_prompt: str
+    rendered: _containers.ScalarMap[str, str]
+    def __init__(self, name: _Optional[str] = ..., content: _Optional[str] = ..., last_chunk: bool = ..., user_spec_prompt: _Optional[str] = ..., rendered: _Optional[_Mapping[str, str]] = ...) -> None: ...
+
+class GetPromptComponentsBatchRequest(_message.Message):
+    __slots__ = ("spec_toml_contents", "known_digests", "known_set_digest")
+    class KnownDigestsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+    SPEC_TOML_CONTENTS_FIELD_NUMBER: _ClassVar[int]
+    KNOWN_DIGESTS_FIELD_NUMBER: _ClassVar[int]
+    KNOWN_SET_DIGEST_FIELD_NUMBER: _ClassVar[int]
+    spec_toml_contents: _containers.RepeatedScalarFieldContainer[str]
+    known_digests: _containers.ScalarMap[str, str]
+    known_set_digest: str
+    def __init__(self, spec_toml_contents: _Optional[_Iterable[str]] = ..., known_digests: _Optional[_Mapping[str, str]] = ..., known_set_digest: _Optional[str] = ...) -> None: ...
+
+class UserSpecPromptResult(_message.Message):
+    __slots__ = ("user_spec_prompt", "error", "rendered")
+    class RenderedEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+    USER_SPEC_PROMPT_FIELD_NUMBER: _ClassVar[int]
+    ERROR_FIELD_NUMBER: _ClassVar[int]
+    RENDERED_FIELD_NUMBER: _ClassVar[int]
+    user_spec_prompt: str
+    error: str
+    rendered: _containers.ScalarMap[str, str]
+    def __init__(self, user_spec_prompt: _Optional[str] = ..., error: _Optional[str] = ..., rendered: _Optional[_Mapping[str, str]] = ...) -> None: ...
+
+class GetPromptComponentsBatchResponse(_message.Message):
+    __slots__ = ("components", "results", "not_modified", "digests", "set_digest")
+    class ComponentsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+    class DigestsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+    COMPONENTS_FIELD_NUMBER: _ClassVar[int]
+    RESULTS_FIELD_NUMBER: _ClassVar[int]
+    NOT_MODIFIED_FIELD_NUMBER: _ClassVar[int]
+    DIGESTS_FIELD_NUMBER: _ClassVar[int]
+    SET_DIGEST_FIELD_NUMBER: _ClassVar[int]
+    components: _containers.ScalarMap[str, str]
+    results: _containers.RepeatedCompositeFieldContainer[UserSpecPromptResult]
+    not_modified: bool
+    digests: _containers.ScalarMap[str, str]
+    set_digest: str
+    def __init__(self, components: _Optional[_Mapping[str, str]] = ..., results: _Optional[_Iterable[_Union[UserSpecPromptResult, _Mapping]]] = ..., not_modified: bool = ..., digests: _Optional[_Mapping[str, str]] = ..., set_digest: _Optional[str] = ...) -> None: ...
+
+class AssemblePromptRequest(_message.Message):
+    __slots__ = ("spec_toml_content", "max_tokens", "components")
+    SPEC_TOML_CONTENT_FIELD_NUMBER: _ClassVar[int]
+    MAX_TOKENS_FIELD_NUMBER: _ClassVar[int]
+    COMPONENTS_FIELD_NUMBER: _ClassVar[int]
+    spec_toml_content: str
+    max_tokens: int
+    components: _containers.RepeatedScalarFieldContainer[str]
+    def __init__(self, spec_toml_content: _Optional[str] = ..., max_tokens: _Optional[int] = ..., components: _Optional[_Iterable[str]] = ...) -> None: ...
+
+class PromptSegment(_message.Message):
+    __slots__ = ("name", "offset", "length")
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    LENGTH_FIELD_NUMBER: _ClassVar[int]
+    name: str
+    offset: int
+    length: int
+    def __init__(self, name: _Optional[str] = ..., offset: _Optional[int] = ..., length: _Optional[int] = ...) -> None: ...
+
+class AssemblePromptResponse(_message.Message):
+    __slots__ = ("prompt", "segments", "prefix_digest", "prefix_length", "estimated_tokens", "trimmed")
+    PROMPT_FIELD_NUMBER: _ClassVar[int]
+    SEGMENTS_FIELD_NUMBER: _ClassVar[int]
+    PREFIX_DIGEST_FIELD_NUMBER: _ClassVar[int]
+    PREFIX_LENGTH_FIELD_NUMBER: _ClassVar[int]
+    ESTIMATED_TOKENS_FIELD_NUMBER: _ClassVar[int]
+    TRIMMED_FIELD_NUMBER: _ClassVar[int]
+    prompt: str
+    segments: _containers.RepeatedCompositeFieldContainer[PromptSegment]
+    prefix_digest: str
+    prefix_length: int
+    estimated_tokens: int
+    trimmed: _containers.RepeatedScalarFieldContainer[str]
+    def __init__(self, prompt: _Optional[str] = ..., segments: _Optional[_Iterable[_Union[PromptSegment, _Mapping]]] = ..., prefix_digest: _Optional[str] = ..., prefix_length: _Optional[int] = ..., estimated_tokens: _Optional[int] = ..., trimmed: _Optional[_Iterable[str]] = ...) -> None: ...
@@ -39,6 +39,21 @@ class BootCodePluginStub(object):
                 request_serializer=plugin__pb2.GetPromptComponentsRequest.SerializeToString,
                 response_deserializer=plugin__pb2.GetPromptComponentsResponse.FromString,
                 _registered_method=True)
+        self.GetPromptComponentsStream = channel.unary_stream(
+                '/plugin.BootCodePlugin/GetPromptComponentsStream',
+                request_serializer=plugin__pb2.GetPromptComponentsRequest.SerializeToString,
+                response_deserializer=plugin__pb2.PromptComponentChunk.FromString,
+                _registered_method=True)
+        self.GetPromptComponentsBatch = channel.unary_unary(
+                '/plugin.BootCodePlugin/GetPromptComponentsBatch',
+                request_serializer=plugin__pb2.GetPromptComponentsBatchRequest.SerializeToString,
+                response_deserializer=plugin__pb2.GetPromptComponentsBatchResponse.FromString,
+                _registered_method=True)
+        self.AssemblePrompt = channel.unary_unary(
+                '/plugin.BootCodePlugin/AssemblePrompt',
+                request_serializer=plugin__pb2.AssemblePromptRequest.SerializeToString,
+                response_deserializer=plugin__pb2.AssemblePromptResponse.FromString,
+                _registered_method=True)
 
 
 class BootCodePluginServicer(object):
@@ -50,6 +65,27 @@ class BootCodePluginServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetPromptComponentsStream(self, request, context):
+        """Same content as GetPromptComponents, streamed one component (or chunk) at a time.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetPromptComponentsBatch(self, request, context):
+        """Derives one user_spec_prompt per spec while sending the shared components only once.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AssemblePrompt(self, request, context):
+        """The final prompt: the chosen components, then the spec-derived prompt.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_BootCodePluginServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +94,21 @@ def add_BootCodePluginServicer_to_server(servicer, server):
                     request_deserializer=plugin__pb2.GetPromptComponentsRequest.FromString,
                     response_serializer=plugin__pb2.GetPromptComponentsResponse.SerializeToString,
             ),
+            'GetPromptComponentsStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetPromptComponentsStream,
+                    request_deserializer=plugin__pb2.GetPromptComponentsRequest.FromString,
+                    response_serializer=plugin__pb2.PromptComponentChunk.SerializeToString,
+            ),
+            'GetPromptComponentsBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetPromptComponentsBatch,
+                    request_deserializer=plugin__pb2.GetPromptComponentsBatchRequest.FromString,
+                    response_serializer=plugin__pb2.GetPromptComponentsBatchResponse.SerializeToString,
+            ),
+            'AssemblePrompt': grpc.unary_unary_rpc_method_handler(
+                    servicer.AssemblePrompt,
+                    request_deserializer=plugin__pb2.AssemblePromptRequest.FromString,
+                    response_serializer=plugin__pb2.AssemblePromptResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'plugin.BootCodePlugin', rpc_method_handlers)
@@ -95,3 +146,84 @@ class BootCodePlugin(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetPromptComponentsStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/plugin.BootCodePlugin/GetPromptComponentsStream',
+            plugin__pb2.GetPromptComponentsRequest.SerializeToString,
+            plugin__pb2.PromptComponentChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetPromptComponentsBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/plugin.BootCodePlugin/GetPromptComponentsBatch',
+            plugin__pb2.GetPromptComponentsBatchRequest.SerializeToString,
+            plugin__pb2.GetPromptComponentsBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AssemblePrompt(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/plugin.BootCodePlugin/AssemblePrompt',
+            plugin__pb2.AssemblePromptRequest.SerializeToString,
+            plugin__pb2.AssemblePromptResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,158 @@
+"""
+``grpc.health.v1`` service and the start-up warmup that flips it to SERVING.
+
+The plugin answers NOT_SERVING until :func:`warm_up` has loaded and validated the
+prompts and pushed one synthetic ``GetPromptComponents`` through the real server
+(interceptors, serializers, spec parser, caches), so the first real request does not
+pay for lazy imports or cold caches. With ``--wait-ready`` the handshake itself waits
+for that.
+
+The stubs from ``grpcio-health-checking`` are used when it is installed; otherwise the
+equivalent ones generated from ``proto/health.proto``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import grpc
+
+try:
+    from grpc_health.v1 import health_pb2, health_pb2_grpc
+except ImportError:
+    from boot_python.generated import health_pb2, health_pb2_grpc
+
+from boot_python.generated import plugin_pb2, plugin_pb2_grpc
+from boot_python.prompt_store import PromptSet, PromptStore
+
+SERVICE_NAME = "plugin.BootCodePlugin"
+WARMUP_TIMEOUT = 30.0
+# Exercises spec parsing, overlay selection and template rendering on the way through.
+WARMUP_SPEC = '[project]\nname = "warmup"\nlanguage = "python"\ntype = "cli"\ndescription = "warmup"\n'
+
+SERVING = health_pb2.HealthCheckResponse.SERVING
+NOT_SERVING = health_pb2.HealthCheckResponse.NOT_SERVING
+SERVICE_UNKNOWN = health_pb2.HealthCheckResponse.SERVICE_UNKNOWN
+
+
+class HealthServicer(health_pb2_grpc.HealthServicer):
+    """Per-service serving status; ``""`` is the server as a whole."""
+
+    def __init__(self) -> None:
+        self._statuses: Dict[str, int] = {"": NOT_SERVING, SERVICE_NAME: NOT_SERVING}
+        self._changed = threading.Condition()
+
+    def set(self, status: int, services: Tuple[str, ...] = ("", SERVICE_NAME)) -> None:
+        with self._changed:
+            for service in services:
+                self._statuses[service] = status
+            self._changed.notify_all()
+        self._notify()
+
+    def status(self, service: str = "") -> Optional[int]:
+        with self._changed:
+            return self._statuses.get(service)
+
+    def _notify(self) -> None:
+        pass
+
+    def Check(self, request, context):
+        status = self.status(request.service)
+        if status is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"unknown service {request.service!r}")
+        return health_pb2.HealthCheckResponse(status=status)
+
+    def Watch(self, request, context):
+        last = None
+        while context.is_active():
+            with self._changed:
+                status = self._statuses.get(request.service, SERVICE_UNKNOWN)
+                if status == last:
+                    # Wake now and then to notice cancelled watchers.
+                    self._changed.wait(timeout=1.0)
+                    continue
+            last = status
+            yield health_pb2.HealthCheckResponse(status=status)
+
+
+class AsyncHealthServicer(HealthServicer):
+    """grpc.aio flavour; ``set()`` may still be called from any thread."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def _notify(self) -> None:
+        for loop, event in list(self._waiters):
+            loop.call_soon_threadsafe(event.set)
+
+    async def Check(self, request, context):  # type: ignore[override]
+        status = self.status(request.service)
+        if status is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, f"unknown service {request.service!r}")
+        return health_pb2.HealthCheckResponse(status=status)
+
+    async def Watch(self, request, context):  # type: ignore[override]
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.add(waiter)
+        try:
+            last = None
+            while True:
+                waiter[1].clear()
+                status = self.status(request.service)
+                status = SERVICE_UNKNOWN if status is None else status
+                if status != last:
+                    last = status
+                    yield health_pb2.HealthCheckResponse(status=status)
+                await waiter[1].wait()
+        finally:
+            self._waiters.discard(waiter)
+
+
+def add_HealthServicer_to_server(servicer: HealthServicer, server) -> None:
+    health_pb2_grpc.add_HealthServicer_to_server(servicer, server)
+
+
+def validate_prompts(prompts: PromptSet) -> List[str]:
+    """Problems that make the prompt set unfit to serve; empty when it is fine."""
+    from boot_python.templates import TemplateError, compile_template
+
+    problems = []
+    if not prompts.components:
+        problems.append("no prompt components were loaded")
+    for name, text in prompts.components.items():
+        if not text.strip():
+            problems.append(f"{name} is empty")
+    for name, source in prompts.templates.items():
+        try:
+            compile_template(source)
+        except TemplateError as e:
+            problems.append(f"{name}: {e}")
+    return problems
+
+
+def warm_up(store: PromptStore, target: str, health: HealthServicer) -> bool:
+    """
+    Loads and validates the prompts, sends one ``GetPromptComponents`` to ``target``
+    and marks ``health`` SERVING if all of that worked. Returns whether it did.
+    """
+    t0 = time.perf_counter()
+    problems = validate_prompts(store.snapshot)
+    if problems:
+        logging.error("Prompts failed validation; staying NOT_SERVING: %s", "; ".join(problems))
+        return False
+    try:
+        with grpc.insecure_channel(target) as channel:
+            stub = plugin_pb2_grpc.BootCodePluginStub(channel)
+            request = plugin_pb2.GetPromptComponentsRequest(spec_toml_content=WARMUP_SPEC)
+            stub.GetPromptComponents(request, timeout=WARMUP_TIMEOUT, wait_for_ready=True)
+    except grpc.RpcError as e:
+        logging.error("Warmup request failed; staying NOT_SERVING: %s", e)
+        return False
+    health.set(SERVING)
+    logging.info("Warmed up in %.1f ms; serving", (time.perf_counter() - t0) * 1000)
+    return True
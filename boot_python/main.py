@@ -1,38 +1,198 @@
+from __future__ import annotations
+
 import argparse
+import json
 import logging
 import os
 import signal
 import sys
+import threading
 import time
-from concurrent import futures
+from typing import TYPE_CHECKING, Sequence
+
+from boot_python.metrics import metrics_port_from_env
+from boot_python.prompt_store import PromptStore, prompts_dirs_from_env
+from boot_python.server_config import COMPRESSION_ALGORITHMS, ServerConfig, flag_from_env
+from boot_python.spec import SpecParser, max_spec_bytes_from_env
+from boot_python.startup import StartupMarks
+
+if TYPE_CHECKING:
+    import grpc
 
-import grpc
+    from boot_python.health import HealthServicer
 
-from boot_python.generated import plugin_pb2_grpc
-from boot_python.server import BootPluginServicer
+# grpc, the generated stubs and the servicer are imported inside the functions that build
+# servers, so paths that never serve (--daemon attach, bench, --profile-startup) skip them.
 
 # Send logs to STDERR so STDOUT stays clean for the handshake
 logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(levelname)s %(message)s")
 
 HANDSHAKE_PROTO = "1|1|tcp|{host}:{port}|grpc"
 DEFAULT_HOST = "127.0.0.1"
+WORKERS_ENV = "BOOT_PYTHON_WORKERS"
+WAIT_READY_ENV = "BOOT_PYTHON_WAIT_READY"
 
 
-def _bind_ephemeral_port(host: str = DEFAULT_HOST):
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
-    plugin_pb2_grpc.add_BootCodePluginServicer_to_server(BootPluginServicer(), server)
-    port = server.add_insecure_port(f"{host}:0")
-    if not port:
-        raise RuntimeError("Failed to bind gRPC port")
+def _build_server(
+    store: PromptStore | None = None,
+    spec_parser: SpecParser | None = None,
+    interceptors: Sequence[grpc.ServerInterceptor] = (),
+    config: ServerConfig | None = None,
+    health: HealthServicer | None = None,
+) -> grpc.Server:
+    from concurrent import futures
+
+    import grpc
+
+    from boot_python.server import (
+        BootPluginServicer,
+        CompressionInterceptor,
+        MetricsInterceptor,
+        add_BootPluginServicer_to_server,
+        grpc_compression,
+    )
+
+    config = config or ServerConfig.from_env()
+    interceptors = [MetricsInterceptor(), *interceptors]
+    if config.compression != "none":
+        interceptors.append(CompressionInterceptor(config.compression_min_bytes))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix="boot-python-rpc"),
+        interceptors=interceptors,
+        options=config.grpc_options(),
+        maximum_concurrent_rpcs=config.concurrency_limit,
+        compression=grpc_compression(config.compression),
+    )
+    add_BootPluginServicer_to_server(BootPluginServicer(store, spec_parser=spec_parser), server)
+    if health is not None:
+        from boot_python.health import add_HealthServicer_to_server
+
+        add_HealthServicer_to_server(health, server)
+    return server
+
+
+def _bind_ephemeral_port(
+    host: str = DEFAULT_HOST,
+    store: PromptStore | None = None,
+    spec_parser: SpecParser | None = None,
+    config: ServerConfig | None = None,
+    port: int = 0,
+    health: HealthServicer | None = None,
+):
+    server = _build_server(store, spec_parser, config=config, health=health)
+    port = _add_port(server, f"{host}:{port}")
     server.start()
     return server, port
 
 
+def _add_port(server, address: str) -> int:
+    port = server.add_insecure_port(address)
+    if not port:
+        raise RuntimeError("Failed to bind gRPC port")
+    return port
+
+
+def _warmup_target(server, host: str, port: int, shared: bool) -> str:
+    """
+    Where this process sends its warmup RPC. A ``--workers`` child shares its port with
+    its siblings, so the kernel could hand the warmup to any of them; it binds a
+    loopback port of its own for it instead. Call before the server starts.
+    """
+    if not shared:
+        return f"{host}:{port}"
+    return f"{host}:{_add_port(server, f'{host}:0')}"
+
+
 def _print_handshake(host: str, port: int) -> None:
     sys.stdout.write(HANDSHAKE_PROTO.format(host=host, port=port) + "\n")
     sys.stdout.flush()
 
 
+def _prompt_dir_args(args: argparse.Namespace) -> list[str]:
+    return [arg for d in args.prompts_dirs for arg in ("--prompts-dir", os.path.abspath(d))]
+
+
+def _start_warmup(store: PromptStore, target: str, health: HealthServicer, watch: bool) -> threading.Thread:
+    """
+    Warms the server up off the start-up path (see ``boot_python.health``), then (with
+    --reload-prompts) starts the watcher.
+    """
+
+    def load() -> None:
+        from boot_python.health import warm_up
+
+        warm_up(store, target, health)
+        if watch:
+            from boot_python.watcher import PromptWatcher
+
+            watcher = PromptWatcher(store).start()
+            logging.info("Watching prompt files for changes (%s)", watcher.mode)
+
+    thread = threading.Thread(target=load, name="boot-python-prompts", daemon=True)
+    thread.start()
+    return thread
+
+
+def _finish_startup_marks(loader, marks: StartupMarks) -> None:
+    loader.join()
+    marks.mark("warmed_up")
+    marks.emit()
+
+
+def _start_metrics(args: argparse.Namespace) -> None:
+    if args.metrics_port is not None:
+        from boot_python.metrics import start_http_server
+
+        start_http_server(args.metrics_port)
+
+
+def _dump_metrics(args: argparse.Namespace) -> None:
+    if args.metrics_dump:
+        from boot_python.metrics import write_snapshot
+
+        try:
+            write_snapshot(args.metrics_dump)
+        except OSError as e:
+            logging.warning("Could not write metrics to %s: %s", args.metrics_dump, e)
+
+
+def _server_config(args: argparse.Namespace) -> ServerConfig:
+    return ServerConfig(
+        max_workers=args.max_workers,
+        max_concurrent_rpcs=args.max_concurrent_rpcs,
+        keepalive_time_ms=args.keepalive_time_ms,
+        max_message_bytes=args.max_message_bytes,
+        reuse_port=args.worker_port is not None,
+        compression=args.compression,
+        compression_min_bytes=args.compression_min_bytes,
+    )
+
+
+def _run_workers(args: argparse.Namespace, exit_after_handshake: bool) -> None:
+    from boot_python import workers
+
+    server_args = [
+        "--max-spec-bytes",
+        str(args.max_spec_bytes),
+        *_server_config(args).cli_args(),
+        *_prompt_dir_args(args),
+    ]
+    if args.reload_prompts:
+        server_args.append("--reload-prompts")
+    if args.wait_ready:
+        server_args.append("--wait-ready")
+    if args.use_async:
+        server_args.append("--async")
+
+    def per_worker(index: int) -> list[str]:
+        if not args.metrics_dump:
+            return []
+        root, ext = os.path.splitext(os.path.abspath(args.metrics_dump))
+        return ["--metrics-dump", f"{root}.worker{index}{ext}"]
+
+    workers.supervise(DEFAULT_HOST, args.workers, server_args, exit_after_handshake, per_worker)
+
+
 def _run_server_until_signal(server: grpc.Server) -> None:
     stop = {"flag": False}
 
@@ -53,22 +213,327 @@ def _run_server_until_signal(server: grpc.Server) -> None:
         logging.info("boot-python stopped")
 
 
+async def _serve_async(
+    host: str,
+    store: PromptStore,
+    spec_parser: SpecParser,
+    exit_after_handshake: bool,
+    marks: StartupMarks,
+    config: ServerConfig,
+    port: int = 0,
+    watch: bool = False,
+    wait_ready: bool = False,
+) -> None:
+    import asyncio
+
+    import grpc
+
+    from boot_python.health import AsyncHealthServicer, add_HealthServicer_to_server
+    from boot_python.server import (
+        AsyncBootPluginServicer,
+        AsyncCompressionInterceptor,
+        AsyncMetricsInterceptor,
+        add_BootPluginServicer_to_server,
+        grpc_compression,
+    )
+
+    interceptors = [AsyncMetricsInterceptor()]
+    if config.compression != "none":
+        interceptors.append(AsyncCompressionInterceptor(config.compression_min_bytes))
+    # Handlers run on the event loop, so --max-workers does not apply here.
+    server = grpc.aio.server(
+        interceptors=interceptors,
+        options=config.grpc_options(),
+        maximum_concurrent_rpcs=config.concurrency_limit,
+        compression=grpc_compression(config.compression),
+    )
+    add_BootPluginServicer_to_server(AsyncBootPluginServicer(store, spec_parser=spec_parser), server)
+    health = AsyncHealthServicer()
+    add_HealthServicer_to_server(health, server)
+    shared = bool(port)
+    port = _add_port(server, f"{host}:{port}")
+    target = _warmup_target(server, host, port, shared)
+    await server.start()
+    marks.mark("server_started")
+    # The warmup RPC is served by this loop, so wait for it without blocking the loop.
+    loader = _start_warmup(store, target, health, watch)
+    if wait_ready:
+        await asyncio.to_thread(loader.join)
+    _print_handshake(host, port)
+    marks.mark("handshake")
+
+    if exit_after_handshake:
+        await asyncio.to_thread(_finish_startup_marks, loader, marks)
+        await server.stop(0)
+        return
+    marks.emit()
+
+    # Signals wake the loop directly; no polling.
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await stop.wait()
+        await server.stop(grace=None)
+    finally:
+        logging.info("boot-python stopped")
+
+
+def _run_daemon(args: argparse.Namespace, exit_after_handshake: bool) -> None:
+    from boot_python import daemon
+
+    idle_timeout = args.daemon_idle_timeout
+    if idle_timeout is None:
+        idle_timeout = daemon.idle_timeout_from_env()
+    if args.daemon:
+        server_args = daemon.daemon_server_args(
+            args.reload_prompts,
+            args.max_spec_bytes,
+            idle_timeout,
+            args.metrics_port,
+            args.metrics_dump,
+            [*_server_config(args).cli_args(), *_prompt_dir_args(args)],
+        )
+        daemon.attach(server_args, exit_after_handshake)
+        return
+
+    from boot_python.health import HealthServicer
+    from boot_python.server import ActivityInterceptor
+
+    activity = ActivityInterceptor()
+    # The daemon is long-lived, so load prompts before serving rather than lazily.
+    store = PromptStore(extra_dirs=args.prompts_dirs)
+    health = HealthServicer()
+    server = _build_server(
+        store, SpecParser(max_bytes=args.max_spec_bytes), [activity], _server_config(args), health
+    )
+    target = f"unix:{daemon.socket_path(args.daemon_key)}"
+
+    def warm_up() -> None:
+        _start_warmup(store, target, health, args.reload_prompts)
+
+    _start_metrics(args)
+    try:
+        daemon.serve(server, args.daemon_key, idle_timeout, activity, on_started=warm_up)
+    finally:
+        _dump_metrics(args)
+
+
 def main() -> None:
+    marks = StartupMarks()
     parser = argparse.ArgumentParser(prog="boot-python")
     parser.add_argument("--check", action="store_true", help="Print handshake and exit")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--reload-prompts",
+        action="store_true",
+        help="Watch prompt files (inotify, else mtime polling) and reload them in the background",
+    )
+    parser.add_argument(
+        "--wait-ready",
+        action="store_true",
+        default=flag_from_env(WAIT_READY_ENV),
+        help="Print the handshake only once prompts are loaded and a warmup RPC has succeeded "
+        "(env BOOT_PYTHON_WAIT_READY)",
+    )
+    parser.add_argument(
+        "--prompts-dir",
+        action="append",
+        dest="prompts_dirs",
+        default=prompts_dirs_from_env(),
+        metavar="DIR",
+        help="Extra prompt directory layered over the packaged prompts (repeatable; "
+        "env BOOT_PYTHON_PROMPTS_DIRS, os.pathsep-separated)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Serve on a grpc.aio event loop instead of a thread pool",
+    )
+    parser.add_argument(
+        "--max-spec-bytes",
+        type=int,
+        default=max_spec_bytes_from_env(),
+        help="Reject specs larger than this many bytes (0 disables; env BOOT_PYTHON_MAX_SPEC_BYTES)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        type=int,
+        nargs="?",
+        const=5,
+        metavar="RUNS",
+        help="Spawn the plugin RUNS times (default 5) and report import and time-to-handshake breakdowns",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Attach to (or start) a shared daemon on a Unix socket and hand boot-code its address",
+    )
+    parser.add_argument(
+        "--daemon-idle-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Daemon exits after this long without RPCs (0 = never; env BOOT_PYTHON_DAEMON_IDLE_TIMEOUT)",
+    )
+    parser.add_argument("--daemon-serve", action="store_true", help=argparse.SUPPRESS)
+    # Set by the attaching process: names the socket and lock of a daemon with its settings.
+    parser.add_argument("--daemon-key", default="", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=metrics_port_from_env(),
+        metavar="PORT",
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics (0 picks a port; env BOOT_PYTHON_METRICS_PORT)",
+    )
+    parser.add_argument(
+        "--metrics-dump",
+        metavar="PATH",
+        help="Write a metrics snapshot to PATH on shutdown (JSON if PATH ends in .json, else Prometheus text)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv(WORKERS_ENV) or 1),
+        metavar="N",
+        help="Serve from N processes sharing one port via SO_REUSEPORT (env BOOT_PYTHON_WORKERS)",
+    )
+    parser.add_argument("--worker-port", type=int, default=None, help=argparse.SUPPRESS)
+    env_config = ServerConfig.from_env()
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=env_config.max_workers,
+        metavar="N",
+        help="RPC handler threads (default: derived from CPU count; env BOOT_PYTHON_MAX_WORKERS)",
+    )
+    parser.add_argument(
+        "--max-concurrent-rpcs",
+        type=int,
+        default=env_config.max_concurrent_rpcs,
+        metavar="N",
+        help="Reject RPCs beyond N in progress with RESOURCE_EXHAUSTED "
+        "(default: 4 per worker; 0 disables; env BOOT_PYTHON_MAX_CONCURRENT_RPCS)",
+    )
+    parser.add_argument(
+        "--keepalive-time-ms",
+        type=int,
+        default=env_config.keepalive_time_ms,
+        metavar="MS",
+        help="Ping idle clients this often (0 disables; env BOOT_PYTHON_KEEPALIVE_TIME_MS)",
+    )
+    parser.add_argument(
+        "--max-message-bytes",
+        type=int,
+        default=env_config.max_message_bytes,
+        metavar="BYTES",
+        help="Largest request message accepted (env BOOT_PYTHON_MAX_MESSAGE_BYTES)",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=COMPRESSION_ALGORITHMS,
+        default=env_config.compression,
+        help="Compress responses (default: none; env BOOT_PYTHON_COMPRESSION)",
+    )
+    parser.add_argument(
+        "--compression-min-bytes",
+        type=int,
+        default=env_config.compression_min_bytes,
+        metavar="BYTES",
+        help="Send smaller responses uncompressed (env BOOT_PYTHON_COMPRESSION_MIN_BYTES)",
+    )
+    commands = parser.add_subparsers(dest="command")
+    # Sub-command modules are imported only when used; their options are parsed by them.
+    commands.add_parser("bench", help="Benchmark a freshly spawned plugin server", add_help=False)
+    args, rest = parser.parse_known_args()
+
+    if args.command == "bench":
+        from boot_python import bench
+
+        bench.main(rest)
+        return
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    if args.profile_startup:
+        from boot_python.startup import profile_startup
+
+        report = profile_startup(args.profile_startup, ["--async"] if args.use_async else [])
+        sys.stdout.write(json.dumps(report, indent=2) + "\n")
+        return
+    marks.mark("args_parsed")
+
+    exit_after_handshake = bool(args.check or os.getenv("BOOT_PYTHON_TEST_EXIT_AFTER_HANDSHAKE"))
+    if args.workers > 1:
+        if args.daemon or args.daemon_serve:
+            parser.error("--workers cannot be combined with --daemon")
+        if args.metrics_port is not None:
+            parser.error("--metrics-port is per process; use --metrics-dump with --workers")
+    if args.daemon or args.daemon_serve:
+        _run_daemon(args, exit_after_handshake)
+        return
+    if args.workers > 1 and args.worker_port is None:
+        _run_workers(args, exit_after_handshake)
+        return
+    if args.worker_port is not None:
+        from boot_python.workers import exit_with_parent
+
+        exit_with_parent()
+
+    # Prompts load in the background once the handshake is out; an early RPC just waits for them.
+    store = PromptStore(lazy=True, extra_dirs=args.prompts_dirs)
+    spec_parser = SpecParser(max_bytes=args.max_spec_bytes)
+    _start_metrics(args)
+    if args.use_async:
+        import asyncio
+
+        try:
+            asyncio.run(
+                _serve_async(
+                    DEFAULT_HOST,
+                    store,
+                    spec_parser,
+                    exit_after_handshake,
+                    marks,
+                    _server_config(args),
+                    args.worker_port or 0,
+                    args.reload_prompts,
+                    args.wait_ready,
+                )
+            )
+        finally:
+            _dump_metrics(args)
+        return
+
+    from boot_python.health import HealthServicer
 
-    server, port = _bind_ephemeral_port(DEFAULT_HOST)
+    health = HealthServicer()
+    server = _build_server(store, spec_parser, config=_server_config(args), health=health)
+    port = _add_port(server, f"{DEFAULT_HOST}:{args.worker_port or 0}")
+    target = _warmup_target(server, DEFAULT_HOST, port, args.worker_port is not None)
+    server.start()
+    marks.mark("server_started")
+    loader = _start_warmup(store, target, health, args.reload_prompts)
+    if args.wait_ready:
+        loader.join()
     _print_handshake(DEFAULT_HOST, port)
+    marks.mark("handshake")
 
     # For check/CI paths: stop and WAIT so the process fully exits
-    if args.check or os.getenv("BOOT_PYTHON_TEST_EXIT_AFTER_HANDSHAKE"):
+    if exit_after_handshake:
+        _finish_startup_marks(loader, marks)
         fut = server.stop(0)  # immediate stop
         if fut is not None:
             fut.wait()
+        _dump_metrics(args)
         return
+    marks.emit()
 
-    _run_server_until_signal(server)
+    try:
+        _run_server_until_signal(server)
+    finally:
+        _dump_metrics(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,273 @@
+"""
+Minimal Prometheus-style metrics.
+
+Standard library only, so the parser, caches and prompt store can record into it without
+pulling gRPC onto the start-up path. The gRPC interceptors live in ``boot_python.server``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+METRICS_PORT_ENV = "BOOT_PYTHON_METRICS_PORT"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_LabelKey = Tuple[str, ...]
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> _LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[_LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = [{"labels": dict(zip(self.labelnames, k)), "value": v} for k, v in sorted(self._values.items())]
+        return {"type": self.kind, "help": self.documentation, "samples": samples}
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label key -> [per-bucket counts..., sum, count]
+        self._values: Dict[_LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def count(self, **labels: str) -> float:
+        with self._lock:
+            row = self._values.get(self._key(labels))
+            return row[-1] if row else 0.0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = self._header()
+        for key, row in items:
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                le = f'le="{_fmt_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {_fmt_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(row[-2])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {_fmt_value(row[-1])}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        samples = []
+        for key, row in items:
+            buckets, cumulative = {}, 0.0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                buckets[_fmt_value(bound)] = cumulative
+            samples.append(
+                {"labels": dict(zip(self.labelnames, key)), "count": row[-1], "sum": row[-2], "buckets": buckets}
+            )
+        return {"type": self.kind, "help": self.documentation, "samples": samples}
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> Any:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())  # type: ignore[attr-defined]
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.snapshot() for m in metrics}  # type: ignore[attr-defined]
+
+
+REGISTRY = Registry()
+
+RPC_DURATION = REGISTRY.register(
+    Histogram("boot_python_rpc_duration_seconds", "Server-side RPC latency.", ["method"])
+)
+RPC_IN_FLIGHT = REGISTRY.register(Gauge("boot_python_rpc_in_flight", "RPCs currently being handled.", ["method"]))
+RPC_ERRORS = REGISTRY.register(
+    Counter("boot_python_rpc_errors_total", "RPCs that ended with a non-OK status.", ["method", "code"])
+)
+RPC_REQUEST_BYTES = REGISTRY.register(
+    Histogram("boot_python_rpc_request_bytes", "Serialized request size.", ["method"], SIZE_BUCKETS)
+)
+RPC_RESPONSE_BYTES = REGISTRY.register(
+    Histogram("boot_python_rpc_response_bytes", "Serialized size per response message.", ["method"], SIZE_BUCKETS)
+)
+SERIALIZE_SECONDS = REGISTRY.register(
+    Histogram("boot_python_serialize_seconds", "Time spent serializing response messages.", ["method"])
+)
+TOML_PARSE_SECONDS = REGISTRY.register(
+    Histogram("boot_python_toml_parse_seconds", "Time spent decoding spec TOML (cache misses only).")
+)
+PROMPT_LOAD_SECONDS = REGISTRY.register(
+    Histogram("boot_python_prompt_load_seconds", "Time spent reading prompt files from disk.")
+)
+PROMPT_RELOADS = REGISTRY.register(
+    Counter("boot_python_prompt_reloads_total", "Background prompt reloads by result.", ["result"])
+)
+PROMPT_RELOAD_SECONDS = REGISTRY.register(
+    Histogram("boot_python_prompt_reload_seconds", "Time from detecting a prompt change to serving it.")
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter("boot_python_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"])
+)
+COALESCED_REQUESTS = REGISTRY.register(
+    Counter(
+        "boot_python_coalesced_requests_total",
+        "Requests that waited for an identical in-flight computation instead of repeating it.",
+        ["group"],
+    )
+)
+
+
+def write_snapshot(path: str, registry: Registry = REGISTRY) -> None:
+    """Writes JSON when ``path`` ends in ``.json``, Prometheus text otherwise."""
+    payload = json.dumps(registry.snapshot(), indent=2) + "\n" if path.endswith(".json") else registry.render()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(payload)
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt: str, *args: Any) -> None:
+            logging.debug("metrics: " + fmt, *args)
+
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="boot-python-metrics", daemon=True).start()
+    logging.info("metrics on http://%s:%d/metrics", host, httpd.server_address[1])
+    return httpd
+
+
+def metrics_port_from_env(default: Optional[int] = None) -> Optional[int]:
+    raw = os.getenv(METRICS_PORT_ENV)
+    return int(raw) if raw else default
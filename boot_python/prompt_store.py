@@ -0,0 +1,416 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from boot_python.metrics import PROMPT_LOAD_SECONDS
+
+if TYPE_CHECKING:
+    from boot_python.tokens import ComponentTokens, TokenEstimator
+
+PROMPTS_PKG = "boot_python.prompts"
+PROMPT_SUFFIX = ".txt"
+# Rendered per request against the spec (see boot_python.templates) rather than sent raw.
+TEMPLATE_SUFFIX = ".template"
+PROMPTS_DIRS_ENV = "BOOT_PYTHON_PROMPTS_DIRS"
+# Overlay packs live in ``overlays/<field>/<value>/*.txt`` next to the base prompts.
+OVERLAYS_DIR = "overlays"
+# Spec fields that select overlay packs, in merge order: base, then language, then type.
+OVERLAY_FIELDS = ("language", "type")
+
+# (name, mtime_ns, size) for every prompt file; None when the package is not on a real filesystem.
+_Signature = Optional[Tuple[Tuple[str, int, int], ...]]
+
+
+@dataclass(frozen=True)
+class PromptSet:
+    """Immutable snapshot of the prompt components served to clients."""
+
+    components: Mapping[str, str]
+    # SHA-256 hex digest per component; ``version`` is the digest of the whole set.
+    digests: Mapping[str, str]
+    version: str
+    templates: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    template_digests: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    # Every overlay selection, merged once at load time and keyed by one entry per
+    # OVERLAY_FIELDS: a pack name, "" (no pack for that value) or None (field not given).
+    variants: Mapping[Tuple[Optional[str], ...], PromptSet] = field(default_factory=lambda: MappingProxyType({}))
+    overlay_values: Mapping[str, FrozenSet[str]] = field(default_factory=lambda: MappingProxyType({}))
+    # Per-section token estimates keyed by component digest (see boot_python.tokens).
+    tokens: Mapping[str, ComponentTokens] = field(default_factory=lambda: MappingProxyType({}))
+
+    def select(self, language: str, project_type: str) -> PromptSet:
+        """The precomputed variant for a spec; a dictionary lookup, nothing is merged here."""
+        if not self.variants:
+            return self
+        key = tuple(
+            _variant_value(value, self.overlay_values.get(name, frozenset()))
+            for name, value in zip(OVERLAY_FIELDS, (language, project_type))
+        )
+        return self.variants.get(key, self)
+
+
+def _variant_value(value: str, packs: FrozenSet[str]) -> Optional[str]:
+    if not value:
+        return None
+    return value if value in packs else ""
+
+
+def prompts_dirs_from_env() -> List[str]:
+    return [d for d in os.getenv(PROMPTS_DIRS_ENV, "").split(os.pathsep) if d]
+
+
+def load_prompts(package: str = PROMPTS_PKG, suffix: str = PROMPT_SUFFIX) -> Dict[str, str]:
+    # importlib.resources is imported here, not at module level, to keep it off the start-up path.
+    from importlib import resources as ir
+
+    files = {}
+    try:
+        # Iterate package resources
+        for entry in ir.files(package).iterdir():
+            if entry.is_file() and entry.name.endswith(suffix):
+                files[entry.name] = entry.read_text(encoding="utf-8")
+    except Exception as e:  # noqa: BLE001
+        logging.warning("Failed to load prompts: %s", e)
+    return files
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _set_version(digests: Mapping[str, str]) -> str:
+    h = hashlib.sha256()
+    for name in sorted(digests):
+        h.update(f"{name}\0{digests[name]}\0".encode("utf-8"))
+    return h.hexdigest()
+
+
+def build_prompt_set(
+    components: Mapping[str, str],
+    templates: Optional[Mapping[str, str]] = None,
+    known_digests: Optional[Mapping[str, str]] = None,
+    overlays: Optional[Mapping[str, str]] = None,
+) -> PromptSet:
+    """
+    ``known_digests`` (e.g. from a bundle index) skips hashing the texts it covers.
+    ``overlays`` maps ``overlays/<field>/<value>/<component>`` names to pack texts; the
+    returned set is the one for a spec that names no overlay field, with every other
+    selection precomputed in ``variants``.
+    """
+    if overlays:
+        return _build_variants(components, templates or {}, known_digests or {}, overlays)
+    known = known_digests or {}
+
+    def digest(name: str, text: str) -> str:
+        return known.get(name) or _digest(text)
+
+    digests = {name: digest(name, text) for name, text in components.items()}
+    template_digests = {name: digest(name, text) for name, text in (templates or {}).items()}
+    return PromptSet(
+        components=MappingProxyType(dict(components)),
+        digests=MappingProxyType(digests),
+        # Templates count towards the version so cached responses never outlive a template edit.
+        version=_set_version({**digests, **template_digests}),
+        templates=MappingProxyType(dict(templates or {})),
+        template_digests=MappingProxyType(template_digests),
+    )
+
+
+def _build_variants(
+    components: Mapping[str, str],
+    templates: Mapping[str, str],
+    known: Mapping[str, str],
+    overlays: Mapping[str, str],
+) -> PromptSet:
+    packs: Dict[str, Dict[str, Dict[str, str]]] = {}  # field -> value -> {component: text}
+    for name, text in overlays.items():
+        _, field_name, value, component = name.split("/", 3)
+        if field_name not in OVERLAY_FIELDS:
+            logging.warning("Ignoring overlay %s: unknown field %r", name, field_name)
+            continue
+        packs.setdefault(field_name, {}).setdefault(value, {})[component] = text
+
+    base = build_prompt_set(components, templates, known)
+    base_known = {**base.digests, **base.template_digests}
+    # A pack is appended to the base component of the same name (or added as a new one).
+    # A field that is not given gets all of its packs, so such specs see the full text.
+    choices = [(None, "", *sorted(packs.get(name, {}))) for name in OVERLAY_FIELDS]
+    merged: Dict[Tuple[Tuple[str, str], ...], PromptSet] = {}
+    variants = {}
+    for key in itertools.product(*choices):
+        applied = tuple(
+            (name, value)
+            for name, selected in zip(OVERLAY_FIELDS, key)
+            for value in (sorted(packs.get(name, {})) if selected is None else [selected] if selected else [])
+        )
+        if applied not in merged:
+            texts = dict(components)
+            for name, value in applied:
+                for component, text in sorted(packs[name][value].items()):
+                    texts[component] = _append(texts.get(component), text)
+            touched = {component for name, value in applied for component in packs[name][value]}
+            unchanged = {n: d for n, d in base_known.items() if n not in touched}
+            merged[applied] = build_prompt_set(texts, templates, unchanged)
+        variants[key] = merged[applied]
+    default = variants[(None,) * len(OVERLAY_FIELDS)]
+    return dataclasses.replace(
+        default,
+        variants=MappingProxyType(variants),
+        overlay_values=MappingProxyType({name: frozenset(packs.get(name, {})) for name in OVERLAY_FIELDS}),
+    )
+
+
+def _append(base: Optional[str], text: str) -> str:
+    return text if base is None else f"{base.rstrip()}\n\n{text}"
+
+
+def iter_prompt_files(root: Any) -> Iterator[Tuple[str, Any]]:
+    """
+    ``(name, entry)`` for every prompt file under ``root`` (a ``Path`` or an
+    importlib.resources ``Traversable``): top-level ``*.txt`` / ``*.template`` files
+    and overlay packs, the latter named relative to ``root``.
+    """
+    for entry in root.iterdir():
+        if entry.name.endswith((PROMPT_SUFFIX, TEMPLATE_SUFFIX)) and entry.is_file():
+            yield entry.name, entry
+        elif entry.name == OVERLAYS_DIR and entry.is_dir():
+            for field_dir in entry.iterdir():
+                for value_dir in field_dir.iterdir() if field_dir.is_dir() else ():
+                    for f in value_dir.iterdir() if value_dir.is_dir() else ():
+                        if f.name.endswith(PROMPT_SUFFIX) and f.is_file():
+                            yield f"{OVERLAYS_DIR}/{field_dir.name}/{value_dir.name}/{f.name}", f
+
+
+def _overlay_dirs(root: Path) -> List[Path]:
+    overlays = root / OVERLAYS_DIR
+    if not overlays.is_dir():
+        return []
+    dirs = [overlays]
+    for field_dir in sorted(p for p in overlays.iterdir() if p.is_dir()):
+        dirs.append(field_dir)
+        dirs.extend(sorted(p for p in field_dir.iterdir() if p.is_dir()))
+    return dirs
+
+
+def _stat_entries(root: Any) -> _Signature:
+    entries = []
+    for name, entry in iter_prompt_files(root):
+        if not isinstance(entry, os.PathLike):
+            return None  # zipped/frozen resources cannot change underneath us
+        st = os.stat(entry)
+        entries.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(sorted(entries))
+
+
+def _signature(package: str) -> _Signature:
+    from importlib import resources as ir
+
+    try:
+        return _stat_entries(ir.files(package))
+    except OSError as e:
+        logging.warning("Failed to stat prompts: %s", e)
+        return None
+
+
+def load_directory(directory: os.PathLike | str) -> Dict[str, str]:
+    """Every prompt file in a plain directory (e.g. a ``--prompts-dir``), keyed as by ``iter_prompt_files``."""
+    try:
+        return {name: entry.read_text(encoding="utf-8") for name, entry in iter_prompt_files(Path(directory))}
+    except OSError as e:
+        logging.warning("Failed to load prompts from %s: %s", directory, e)
+        return {}
+
+
+def _dir_signature(directory: os.PathLike | str) -> Tuple[Tuple[str, int, int], ...]:
+    try:
+        return _stat_entries(Path(directory)) or ()
+    except OSError:
+        return ()  # a missing directory simply contributes nothing
+
+
+def _load_package(package: str) -> Dict[str, str]:
+    from importlib import resources as ir
+
+    try:
+        return {name: entry.read_text(encoding="utf-8") for name, entry in iter_prompt_files(ir.files(package))}
+    except Exception as e:  # noqa: BLE001
+        logging.warning("Failed to load prompts: %s", e)
+        return {}
+
+
+def prompt_set_from_files(files: Mapping[str, str], known_digests: Optional[Mapping[str, str]] = None) -> PromptSet:
+    """Builds the set from names as produced by ``iter_prompt_files``."""
+    components, templates, overlays = {}, {}, {}
+    for name, text in files.items():
+        if name.startswith(OVERLAYS_DIR + "/"):
+            overlays[name] = text
+        elif name.endswith(TEMPLATE_SUFFIX):
+            templates[name] = text
+        else:
+            components[name] = text
+    return build_prompt_set(components, templates, known_digests, overlays)
+
+
+def _load_bundle(package: str) -> Optional[Tuple[Dict[str, str], Dict[str, str]]]:
+    """``(texts, digests)`` from the package's bundle, or None if it is absent, stale or unreadable."""
+    from importlib import resources as ir
+
+    from boot_python.bundle import BUNDLE_NAME, BundleError, read_fresh_bundle, unpack
+
+    try:
+        path = ir.files(package) / BUNDLE_NAME
+        if not path.is_file():
+            return None
+        if isinstance(path, os.PathLike):
+            bundled = read_fresh_bundle(path, Path(path).parent)
+            if bundled is None:
+                logging.info("Prompt bundle does not match the prompt files; reading the files")
+                return None
+            texts, digests = bundled
+        else:
+            texts, digests = unpack(path.read_bytes())
+    except (OSError, BundleError) as e:
+        logging.warning("Ignoring prompt bundle: %s", e)
+        return None
+    return texts, digests
+
+
+class PromptStore:
+    """
+    Loads prompt components once and serves them from an immutable snapshot.
+
+    With ``auto_reload`` the files are re-stat'ed at most once per ``check_interval``
+    seconds and the snapshot is rebuilt only when a name, mtime or size changed.
+
+    With ``lazy`` nothing is read until the first snapshot access; readers arriving
+    mid-load wait for it to finish.
+
+    Files in ``extra_dirs`` are layered over the package's, later directories winning
+    on name clashes. ``boot_python.watcher`` can drive ``reload()`` from a background
+    thread instead of ``auto_reload``'s checks on the request path.
+
+    Each snapshot carries a token index built with ``estimator`` (by default the one
+    named by ``BOOT_PYTHON_TOKEN_ESTIMATOR``, see ``boot_python.tokens``).
+    """
+
+    def __init__(
+        self,
+        package: str = PROMPTS_PKG,
+        *,
+        auto_reload: bool = False,
+        check_interval: float = 1.0,
+        lazy: bool = False,
+        extra_dirs: Sequence[os.PathLike | str] = (),
+        estimator: Optional[TokenEstimator] = None,
+    ) -> None:
+        self._package = package
+        self._estimator = estimator
+        self._extra_dirs = tuple(Path(d) for d in extra_dirs)
+        self._auto_reload = auto_reload
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._sig: Optional[Tuple[_Signature, ...]] = None
+        self._snapshot = build_prompt_set({})
+        self._loaded = False
+        if not lazy:
+            self.reload()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def estimator(self) -> TokenEstimator:
+        """The token estimator snapshots are indexed with."""
+        if self._estimator is None:
+            from boot_python.tokens import estimator_from_env
+
+            self._estimator = estimator_from_env()
+        return self._estimator
+
+    @property
+    def snapshot(self) -> PromptSet:
+        if not self._loaded:
+            self._ensure_loaded()
+        if self._auto_reload and time.monotonic() >= self._next_check:
+            self._check_stale()
+        return self._snapshot
+
+    def reload(self) -> PromptSet:
+        with self._lock:
+            return self._reload_locked()
+
+    def signature(self) -> Tuple[_Signature, ...]:
+        """Cheap fingerprint (names, mtimes, sizes) of every prompt file the store reads."""
+        return (_signature(self._package), *(_dir_signature(d) for d in self._extra_dirs))
+
+    def watch_dirs(self) -> List[Path]:
+        """Directories holding the store's prompt files (zipped packages have none)."""
+        from importlib import resources as ir
+
+        roots: List[Path] = []
+        try:
+            for entry in ir.files(self._package).iterdir():
+                if isinstance(entry, os.PathLike) and Path(entry).parent not in roots:
+                    roots.append(Path(entry).parent)
+        except OSError as e:
+            logging.warning("Cannot list prompt package %s: %s", self._package, e)
+        roots.extend(d for d in self._extra_dirs if d.is_dir())
+        # Overlay pack directories are watched too; inotify does not recurse.
+        return [d for root in roots for d in (root, *_overlay_dirs(root))]
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if not self._loaded:
+                self._reload_locked()
+
+    def _load(self) -> PromptSet:
+        # A reload means the files changed; an installed bundle would not notice an edit in place.
+        bundled = None if self._loaded else _load_bundle(self._package)
+        files, known = bundled if bundled is not None else (_load_package(self._package), {})
+        for directory in self._extra_dirs:
+            extra = load_directory(directory)
+            for name in extra:
+                known.pop(name, None)
+            files.update(extra)
+        from boot_python.tokens import index_prompt_set
+
+        return index_prompt_set(prompt_set_from_files(files, known), self.estimator)
+
+    def _reload_locked(self) -> PromptSet:
+        sig = self.signature() if self._auto_reload else None
+        with PROMPT_LOAD_SECONDS.time():
+            snapshot = self._load()
+        # Readers never lock: they see either the old or the new immutable snapshot.
+        self._snapshot = snapshot
+        self._sig = sig
+        self._next_check = time.monotonic() + self._check_interval
+        self._loaded = True
+        return self._snapshot
+
+    def _check_stale(self) -> None:
+        # Only one caller pays for the stat; everyone else keeps serving the current snapshot.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() < self._next_check:
+                return
+            sig = self.signature()
+            if sig[0] is not None and sig != self._sig:
+                logging.info("Prompt files changed on disk; reloading")
+                self._reload_locked()
+            else:
+                self._next_check = time.monotonic() + self._check_interval
+        finally:
+            self._lock.release()
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import hashlib
+
+from boot_python.lru import LRUCache
+
+DEFAULT_MAXSIZE = 256
+
+
+def spec_cache_key(spec_toml: str, version: str, variant: str = "") -> str:
+    digest = hashlib.sha256(spec_toml.encode("utf-8")).hexdigest()
+    return f"{digest}:{version}:{variant}"
+
+
+class ResponseCache(LRUCache[bytes]):
+    """
+    Thread-safe LRU of already-serialized responses.
+
+    Keys combine the spec digest with the prompt-set version, so a prompt reload
+    naturally stops hitting old entries and they age out of the LRU.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        super().__init__(maxsize, name="response")
@@ -1,57 +1,752 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
-from importlib import resources as ir
-from typing import Dict
+import time
+from typing import Any, AsyncIterator, Callable, Dict, FrozenSet, Iterator, List, Mapping, Optional, Tuple
 
 import grpc
 
 from boot_python.generated import plugin_pb2, plugin_pb2_grpc
+from boot_python.lru import LRUCache
+from boot_python.metrics import (
+    RPC_DURATION,
+    RPC_ERRORS,
+    RPC_IN_FLIGHT,
+    RPC_REQUEST_BYTES,
+    RPC_RESPONSE_BYTES,
+    SERIALIZE_SECONDS,
+)
+from boot_python.prompt_store import (
+    PROMPTS_PKG,
+    TEMPLATE_SUFFIX,
+    PromptSet,
+    PromptStore,
+    build_prompt_set,
+    load_prompts,
+)
+from boot_python.response_cache import ResponseCache, spec_cache_key
+from boot_python.singleflight import Cancelled, SingleFlight
+from boot_python.spec import SpecError, SpecParser
+from boot_python.templates import TemplateError, TemplateRenderer
+from boot_python.tokens import DEFAULT_PRIORITY, Fit, fit_components
 
-try:
-    import tomllib  # Python 3.11+
-except ModuleNotFoundError:  # Python ≤3.10
-    import tomli as tomllib  # type: ignore[no-redef]
+# Components larger than this many characters are split across several stream messages.
+STREAM_CHUNK_CHARS = 64 * 1024
+# Chunked component lists kept for streaming, one per prompt-set (overlay variant) version.
+STREAM_CACHE_SIZE = 16
+# Trimmed component sets kept per (prompt-set version, max_tokens, component list).
+FIT_CACHE_SIZE = 64
+# Serialized component fields kept per (prompt-set version, conditional-fetch variant).
+STATIC_CACHE_SIZE = 64
+# Assembled prompt prefixes kept per (prompt-set version, component list).
+PREFIX_CACHE_SIZE = 64
+# Segment name of the spec-derived suffix in AssemblePrompt responses.
+SPEC_SEGMENT = "user_spec_prompt"
+SEGMENT_SEPARATOR = b"\n\n"
 
-PROMPTS_PKG = "boot_python.prompts"
+_FALLBACK_SPEC_PROMPT = "User requests a python project. Description: (unavailable)"
+_DEFAULT_SPEC_PARSER = SpecParser()
 
 
 def _load_prompts() -> Dict[str, str]:
-    files = {}
-    try:
-        # Iterate package resources
-        for entry in ir.files(PROMPTS_PKG).iterdir():
-            if entry.is_file() and entry.name.endswith(".txt"):
-                files[entry.name] = entry.read_text(encoding="utf-8")
-    except Exception as e:  # noqa: BLE001
-        logging.warning("Failed to load prompts: %s", e)
-    return files
+    return load_prompts(PROMPTS_PKG)
 
 
-def _derive_user_spec_prompt(spec_toml: str) -> str:
+def _spec_prompt_result(spec_toml: str, parser: Optional[SpecParser] = None) -> Tuple[str, str]:
+    """Returns ``(prompt, error)``; on error the prompt is the generic fallback."""
     if not spec_toml:
-        return "User requests a python project. Description: (unavailable)"
+        return _FALLBACK_SPEC_PROMPT, ""
+    try:
+        spec = (parser or _DEFAULT_SPEC_PARSER).parse(spec_toml)
+    except SpecError as e:
+        return _FALLBACK_SPEC_PROMPT, str(e)
+    return f"User requests a {spec.language} project named '{spec.name}'. Description: {spec.description}", ""
+
+
+def _derive_user_spec_prompt(spec_toml: str, parser: Optional[SpecParser] = None) -> str:
+    prompt, error = _spec_prompt_result(spec_toml, parser)
+    if error:
+        logging.warning("%s", error)
+    return prompt
+
+
+def _select_prompts(spec_toml: str, prompts: PromptSet, parser: SpecParser) -> PromptSet:
+    """The overlay variant of ``prompts`` for the spec's language and project type."""
+    if not prompts.variants or not spec_toml:
+        return prompts
+    try:
+        spec = parser.parse(spec_toml)
+    except SpecError:
+        return prompts  # reported through user_spec_prompt / error
+    return prompts.select(spec.language, spec.project_type)
+
+
+def _render_templates(
+    spec_toml: str, prompts: PromptSet, parser: SpecParser, renderer: TemplateRenderer
+) -> Dict[str, str]:
+    """Renders every template against the spec, keyed by output filename; {} without a usable spec."""
+    if not spec_toml or not prompts.templates:
+        return {}
     try:
-        data = tomllib.loads(spec_toml)
-        project = data.get("project", {}) if isinstance(data, dict) else {}
-        name = project.get("name", "(unknown)")
-        lang = project.get("language", "python")
-        descr = project.get("description", "")
-        return f"User requests a {lang} project named '{name}'. Description: {descr}"
-    except Exception as e:  # noqa: BLE001
-        logging.warning("Failed to parse spec TOML: %s", e)
-        return "User requests a python project. Description: (unavailable)"
+        spec = parser.parse(spec_toml)
+    except SpecError:
+        return {}  # already reported through user_spec_prompt / error
+    context = {"spec": spec.data}
+    rendered = {}
+    for name, source in prompts.templates.items():
+        try:
+            text = renderer.render(source, prompts.template_digests[name], context, spec.digest)
+        except TemplateError as e:
+            logging.warning("Cannot render %s: %s", name, e)
+            continue
+        rendered[name[: -len(TEMPLATE_SUFFIX)]] = text
+    return rendered
+
+
+def _chunk_components(
+    components: Mapping[str, str], chunk_chars: int
+) -> Tuple[plugin_pb2.PromptComponentChunk, ...]:
+    chunks = []
+    for name in sorted(components):
+        text = components[name]
+        pieces = [text[i : i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+        for i, piece in enumerate(pieces):
+            chunks.append(
+                plugin_pb2.PromptComponentChunk(name=name, content=piece, last_chunk=i == len(pieces) - 1)
+            )
+    return tuple(chunks)
+
+
+def _unchanged_components(request: Any, prompts: PromptSet) -> FrozenSet[str]:
+    """Names of components the client already holds at their current digest."""
+    if request.known_set_digest and request.known_set_digest == prompts.version:
+        return frozenset(prompts.components)
+    known = request.known_digests
+    return frozenset(name for name, digest in prompts.digests.items() if known.get(name) == digest)
+
+
+def _component_fields(request: Any, prompts: PromptSet) -> Dict[str, Any]:
+    """Response fields describing the shared components, honouring the request's known digests."""
+    if request.known_set_digest and request.known_set_digest == prompts.version:
+        return {"not_modified": True}
+    components = prompts.components
+    if request.known_digests:
+        unchanged = _unchanged_components(request, prompts)
+        components = {k: v for k, v in components.items() if k not in unchanged}
+    return {"components": components, "digests": prompts.digests, "set_digest": prompts.version}
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+# Key of AssemblePromptResponse.prompt: field 1, length-delimited.
+_PROMPT_KEY = _varint(plugin_pb2.AssemblePromptResponse.PROMPT_FIELD_NUMBER << 3 | 2)
+
+# (response cache key, cached payload or None, builder for a miss)
+_Lookup = Tuple[str, Optional[bytes], Callable[[], bytes]]
 
 
 class BootPluginServicer(plugin_pb2_grpc.BootCodePluginServicer):
+    def __init__(
+        self,
+        store: Optional[PromptStore] = None,
+        response_cache: Optional[ResponseCache] = None,
+        stream_chunk_chars: int = STREAM_CHUNK_CHARS,
+        spec_parser: Optional[SpecParser] = None,
+        renderer: Optional[TemplateRenderer] = None,
+    ) -> None:
+        # Prompts are read once here; RPCs only ever see the store's current snapshot.
+        self.store = store if store is not None else PromptStore()
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
+        self.spec_parser = spec_parser if spec_parser is not None else SpecParser()
+        self.renderer = renderer if renderer is not None else TemplateRenderer()
+        self.stream_chunk_chars = stream_chunk_chars
+        self._stream_cache: LRUCache[Tuple[plugin_pb2.PromptComponentChunk, ...]] = LRUCache(STREAM_CACHE_SIZE)
+        self._fit_cache: LRUCache[Tuple[PromptSet, Fit]] = LRUCache(FIT_CACHE_SIZE, name="fit")
+        self._static_cache: LRUCache[bytes] = LRUCache(STATIC_CACHE_SIZE, name="static")
+        self._prefix_cache: LRUCache[Tuple[bytes, bytes]] = LRUCache(PREFIX_CACHE_SIZE, name="prefix")
+        # Identical requests that miss the response cache at the same time build it once.
+        self._inflight: SingleFlight[bytes] = SingleFlight(name="response")
+
+    def _build_response(
+        self, request: plugin_pb2.GetPromptComponentsRequest
+    ) -> plugin_pb2.GetPromptComponentsResponse:
+        prompts, budget = self._resolve(request)
+        return plugin_pb2.GetPromptComponentsResponse(
+            **self._spec_fields(request, prompts),
+            **budget,
+            **_component_fields(request, prompts),
+        )
+
+    def _spec_fields(self, request: plugin_pb2.GetPromptComponentsRequest, prompts: PromptSet) -> Dict[str, Any]:
+        """Response fields that depend on the request's spec."""
+        return {
+            "user_spec_prompt": _derive_user_spec_prompt(request.spec_toml_content or "", self.spec_parser),
+            "rendered": self._rendered(request.spec_toml_content, prompts),
+        }
+
+    def _resolve(
+        self, request: plugin_pb2.GetPromptComponentsRequest, names: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[PromptSet, Dict[str, Any]]:
+        """
+        The component set a request is answered from (its overlay variant, trimmed to
+        budget) and the budget fields to report with it. With ``names``, the budget goes
+        to just those components, in that order.
+        """
+        prompts = _select_prompts(request.spec_toml_content or "", self.store.snapshot, self.spec_parser)
+        if not request.max_tokens:
+            return prompts, {}
+        prompts, fit = self._fit(prompts, request.max_tokens, names)
+        return prompts, {"estimated_tokens": fit.tokens, "trimmed": fit.trimmed}
+
+    def _prompts_for(self, request: plugin_pb2.GetPromptComponentsRequest) -> PromptSet:
+        return self._resolve(request)[0]
+
+    def _fit(
+        self, prompts: PromptSet, max_tokens: int, names: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[PromptSet, Fit]:
+        key = (prompts.version, max_tokens, names)
+        cached = self._fit_cache.get(key)
+        if cached is None:
+            fit = fit_components(prompts, max_tokens, only=names, estimator=self.store.estimator)
+            if fit.trimmed:
+                known = {n: d for n, d in prompts.digests.items() if n in fit.components and n not in fit.trimmed}
+                trimmed = build_prompt_set(fit.components, prompts.templates, {**known, **prompts.template_digests})
+            else:
+                trimmed = prompts
+            cached = (trimmed, fit)
+            self._fit_cache.put(key, cached)
+        return cached
+
+    def _rendered(self, spec_toml: str, prompts: PromptSet) -> Dict[str, str]:
+        return _render_templates(spec_toml or "", prompts, self.spec_parser, self.renderer)
+
+    def _final_chunk(
+        self, request: plugin_pb2.GetPromptComponentsRequest, prompts: PromptSet
+    ) -> plugin_pb2.PromptComponentChunk:
+        return plugin_pb2.PromptComponentChunk(**self._spec_fields(request, prompts))
+
+    def _serialized_response(
+        self,
+        request: plugin_pb2.GetPromptComponentsRequest,
+        is_active: Optional[Callable[[], bool]] = None,
+    ) -> bytes:
+        key, payload, build = self._serialized_lookup(request)
+        return payload if payload is not None else self._inflight.do(key, build, is_active)
+
+    def _serialized_lookup(self, request: plugin_pb2.GetPromptComponentsRequest) -> _Lookup:
+        """The response cache key, the cached payload if any, and how to build it on a miss."""
+        prompts, budget = self._resolve(request)
+        # Conditional requests differ only in which components get omitted, so that set is the key.
+        if request.known_set_digest and request.known_set_digest == prompts.version:
+            variant = "*"
+        else:
+            variant = ",".join(sorted(_unchanged_components(request, prompts)))
+        # The response also reports estimated_tokens / trimmed when a budget was given.
+        key = spec_cache_key(request.spec_toml_content, prompts.version, variant + ("|budget" if budget else ""))
+
+        def build() -> bytes:
+            # Concatenated protobuf messages parse as one merged message, so the component
+            # fields are serialized once per set and only the spec-dependent rest per spec.
+            dynamic = plugin_pb2.GetPromptComponentsResponse(**self._spec_fields(request, prompts), **budget)
+            built = self._static_payload(request, prompts, variant) + dynamic.SerializeToString()
+            # Cached before the flight lands, so later arrivals hit the cache instead.
+            self.response_cache.put(key, built)
+            return built
+
+        return key, self.response_cache.get(key), build
+
+    def _static_payload(
+        self, request: plugin_pb2.GetPromptComponentsRequest, prompts: PromptSet, variant: str
+    ) -> bytes:
+        key = (prompts.version, variant)
+        payload = self._static_cache.get(key)
+        if payload is None:
+            payload = plugin_pb2.GetPromptComponentsResponse(**_component_fields(request, prompts)).SerializeToString()
+            self._static_cache.put(key, payload)
+        return payload
+
+    def _assembled_response(
+        self,
+        request: plugin_pb2.AssemblePromptRequest,
+        is_active: Optional[Callable[[], bool]] = None,
+    ) -> bytes:
+        key, payload, build = self._assembled_lookup(request)
+        return payload if payload is not None else self._inflight.do(key, build, is_active)
+
+    def _assembled_lookup(self, request: plugin_pb2.AssemblePromptRequest) -> _Lookup:
+        names = tuple(request.components) or DEFAULT_PRIORITY
+        prompts, budget = self._resolve(request, names)  # type: ignore[arg-type]
+        variant = "@assemble:" + ",".join(names) + ("|budget" if budget else "")
+        key = spec_cache_key(request.spec_toml_content, prompts.version, variant)
+
+        def build() -> bytes:
+            prefix, fields = self._assembly_prefix(prompts, names)
+            suffix = _derive_user_spec_prompt(request.spec_toml_content or "", self.spec_parser).encode("utf-8")
+            segment = plugin_pb2.PromptSegment(name=SPEC_SEGMENT, offset=len(prefix), length=len(suffix))
+            dynamic = plugin_pb2.AssemblePromptResponse(segments=[segment], **budget)
+            # The prompt field is framed by hand so the prefix is copied as is, never re-encoded.
+            prompt = _PROMPT_KEY + _varint(len(prefix) + len(suffix))
+            built = b"".join((prompt, prefix, suffix, fields, dynamic.SerializeToString()))
+            self.response_cache.put(key, built)
+            return built
+
+        return key, self.response_cache.get(key), build
+
+    def _assembly_prefix(self, prompts: PromptSet, names: Tuple[str, ...]) -> Tuple[bytes, bytes]:
+        """
+        The spec-independent start of the assembled prompt, UTF-8 encoded, and the
+        serialized response fields describing it. Built once per (prompt-set version, names).
+        """
+        key = (prompts.version, names)
+        cached = self._prefix_cache.get(key)
+        if cached is None:
+            parts: List[bytes] = []
+            segments = []
+            offset = 0
+            for name in (n for n in names if n in prompts.components):
+                text = prompts.components[name].strip().encode("utf-8")
+                segments.append(plugin_pb2.PromptSegment(name=name, offset=offset, length=len(text)))
+                parts += (text, SEGMENT_SEPARATOR)
+                offset += len(text) + len(SEGMENT_SEPARATOR)
+            prefix = b"".join(parts)
+            fields = plugin_pb2.AssemblePromptResponse(
+                segments=segments,
+                prefix_digest=hashlib.sha256(prefix).hexdigest(),
+                prefix_length=len(prefix),
+            ).SerializeToString()
+            cached = (prefix, fields)
+            self._prefix_cache.put(key, cached)
+        return cached
+
+    def _oversized(self, request: plugin_pb2.GetPromptComponentsRequest) -> str:
+        """Details for an INVALID_ARGUMENT abort when the spec exceeds the size limit, else ''."""
+        if self.spec_parser.too_large(request.spec_toml_content):
+            return f"spec_toml_content exceeds the {self.spec_parser.max_bytes}-byte limit"
+        return ""
+
+    def _build_batch_response(
+        self, request: plugin_pb2.GetPromptComponentsBatchRequest
+    ) -> plugin_pb2.GetPromptComponentsBatchResponse:
+        # The components are shared by every spec in the batch, so no overlay variant applies.
+        prompts = self.store.snapshot
+        specs = list(request.spec_toml_contents)
+        unique = list(dict.fromkeys(specs))  # identical specs are parsed once
+        # Serially: tomllib is pure Python and holds the GIL, so threads only add overhead.
+        by_spec = {spec: _spec_prompt_result(spec, self.spec_parser) for spec in unique}
+        rendered = {spec: self._rendered(spec, prompts) for spec in unique} if prompts.templates else {}
+        results = []
+        for spec in specs:
+            prompt, error = by_spec[spec]
+            results.append(
+                plugin_pb2.UserSpecPromptResult(user_spec_prompt=prompt, error=error, rendered=rendered.get(spec))
+            )
+        return plugin_pb2.GetPromptComponentsBatchResponse(results=results, **_component_fields(request, prompts))
+
+    def _stream_chunks(self, prompts: PromptSet) -> Tuple[plugin_pb2.PromptComponentChunk, ...]:
+        # Chunked once per prompt-set version; concurrent rebuilds after a reload are harmless.
+        chunks = self._stream_cache.get(prompts.version)
+        if chunks is None:
+            chunks = _chunk_components(prompts.components, self.stream_chunk_chars)
+            self._stream_cache.put(prompts.version, chunks)
+        return chunks
+
     def GetPromptComponents(
         self,
         request: plugin_pb2.GetPromptComponentsRequest,
         context: grpc.ServicerContext,
     ) -> plugin_pb2.GetPromptComponentsResponse:
-        components = _load_prompts()
-        user_spec_prompt = _derive_user_spec_prompt(request.spec_toml_content or "")
-        return plugin_pb2.GetPromptComponentsResponse(
-            components=components,
-            user_spec_prompt=user_spec_prompt,
-        )
\ No newline at end of file
+        details = self._oversized(request)
+        if details:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, details)
+        return self._build_response(request)
+
+    def GetPromptComponentsStream(
+        self,
+        request: plugin_pb2.GetPromptComponentsRequest,
+        context: grpc.ServicerContext,
+    ) -> Iterator[plugin_pb2.PromptComponentChunk]:
+        details = self._oversized(request)
+        if details:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, details)
+        prompts = self._prompts_for(request)
+        unchanged = _unchanged_components(request, prompts)
+        for chunk in self._stream_chunks(prompts):
+            if chunk.name not in unchanged:
+                yield chunk
+        yield self._final_chunk(request, prompts)
+
+    def GetPromptComponentsSerialized(
+        self,
+        request: plugin_pb2.GetPromptComponentsRequest,
+        context: grpc.ServicerContext,
+    ) -> bytes:
+        """Wire-format variant of GetPromptComponents, served from the response cache."""
+        details = self._oversized(request)
+        if details:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, details)
+        try:
+            return self._serialized_response(request, getattr(context, "is_active", None))
+        except Cancelled:
+            context.abort(grpc.StatusCode.CANCELLED, "request cancelled while waiting for an identical one")
+
+    def GetPromptComponentsBatch(
+        self,
+        request: plugin_pb2.GetPromptComponentsBatchRequest,
+        context: grpc.ServicerContext,
+    ) -> plugin_pb2.GetPromptComponentsBatchResponse:
+        return self._build_batch_response(request)
+
+    def AssemblePrompt(
+        self,
+        request: plugin_pb2.AssemblePromptRequest,
+        context: grpc.ServicerContext,
+    ) -> plugin_pb2.AssemblePromptResponse:
+        return plugin_pb2.AssemblePromptResponse.FromString(self.AssemblePromptSerialized(request, context))
+
+    def AssemblePromptSerialized(
+        self,
+        request: plugin_pb2.AssemblePromptRequest,
+        context: grpc.ServicerContext,
+    ) -> bytes:
+        """Wire-format variant of AssemblePrompt, served from the response cache."""
+        details = self._oversized(request)  # type: ignore[arg-type]
+        if details:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, details)
+        try:
+            return self._assembled_response(request, getattr(context, "is_active", None))
+        except Cancelled:
+            context.abort(grpc.StatusCode.CANCELLED, "request cancelled while waiting for an identical one")
+
+
+class AsyncBootPluginServicer(BootPluginServicer):
+    """
+    grpc.aio flavour of the servicer. Cache hits are answered on the event loop. Anything
+    that may parse a spec (up to its size limit) or render templates runs on a worker
+    thread instead, so one cold spec does not stall every other RPC on the loop.
+    """
+
+    async def GetPromptComponents(  # type: ignore[override]
+        self,
+        request: plugin_pb2.GetPromptComponentsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> plugin_pb2.GetPromptComponentsResponse:
+        details = self._oversized(request)
+        if details:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, details)
+        return await asyncio.to_thread(self._build_response, request)
+
+    async def GetPromptComponentsSerialized(  # type: ignore[override]
+        self,
+        request: plugin_pb2.GetPromptComponentsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> bytes:
+        details = self._oversized(request)
+        if details:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, details)
+        return await self._answer(request, self._serialized_lookup)
+
+    async def GetPromptComponentsStream(  # type: ignore[override]
+        self,
+        request: plugin_pb2.GetPromptComponentsRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> AsyncIterator[plugin_pb2.PromptComponentChunk]:
+        details = self._oversized(request)
+        if details:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, details)
+        prompts = await asyncio.to_thread(self._prompts_for, request)
+        unchanged = _unchanged_components(request, prompts)
+        for chunk in self._stream_chunks(prompts):
+            if chunk.name not in unchanged:
+                yield chunk
+        yield await asyncio.to_thread(self._final_chunk, request, prompts)
+
+    async def GetPromptComponentsBatch(  # type: ignore[override]
+        self,
+        request: plugin_pb2.GetPromptComponentsBatchRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> plugin_pb2.GetPromptComponentsBatchResponse:
+        # Batches can be large; keep the event loop free while they are parsed.
+        return await asyncio.to_thread(self._build_batch_response, request)
+
+    async def AssemblePrompt(  # type: ignore[override]
+        self,
+        request: plugin_pb2.AssemblePromptRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> plugin_pb2.AssemblePromptResponse:
+        return plugin_pb2.AssemblePromptResponse.FromString(await self.AssemblePromptSerialized(request, context))
+
+    async def AssemblePromptSerialized(  # type: ignore[override]
+        self,
+        request: plugin_pb2.AssemblePromptRequest,
+        context: grpc.aio.ServicerContext,
+    ) -> bytes:
+        details = self._oversized(request)  # type: ignore[arg-type]
+        if details:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, details)
+        return await self._answer(request, self._assembled_lookup)
+
+    async def _answer(self, request, lookup: Callable[[Any], _Lookup]) -> bytes:
+        spec = request.spec_toml_content
+        if spec and not self.spec_parser.is_cached(spec):
+            # Even computing the cache key would parse the spec here.
+            key, payload, build = await asyncio.to_thread(lookup, request)
+        else:
+            key, payload, build = lookup(request)
+        if payload is None:
+            # A cancelled RPC stops awaiting; the build still finishes for the other waiters.
+            payload = await asyncio.to_thread(self._inflight.do, key, build)
+        return payload
+
+
+class ActivityInterceptor(grpc.ServerInterceptor):
+    """Records when the latest RPC arrived; the daemon uses it for its idle timeout."""
+
+    def __init__(self) -> None:
+        self.last_seen = time.monotonic()
+
+    def intercept_service(self, continuation, handler_call_details):
+        self.last_seen = time.monotonic()
+        return continuation(handler_call_details)
+
+
+def _rpc_finished(method: str, started: float, context, failed: bool) -> None:
+    RPC_DURATION.observe(time.perf_counter() - started, method=method)
+    RPC_IN_FLIGHT.dec(method=method)
+    code = context.code()
+    if code is None and failed:
+        code = grpc.StatusCode.UNKNOWN
+    if code is not None and code is not grpc.StatusCode.OK:
+        RPC_ERRORS.inc(method=method, code=code.name)
+
+
+def _measured_codec(method: str, handler):
+    """Wraps the handler's (de)serializers to record message sizes and encode time."""
+
+    def deserialize(data: bytes):
+        RPC_REQUEST_BYTES.observe(len(data), method=method)
+        return handler.request_deserializer(data)
+
+    def serialize(message) -> bytes:
+        t0 = time.perf_counter()
+        data = handler.response_serializer(message)
+        SERIALIZE_SECONDS.observe(time.perf_counter() - t0, method=method)
+        RPC_RESPONSE_BYTES.observe(len(data), method=method)
+        return data
+
+    return {
+        "request_deserializer": deserialize if handler.request_deserializer else None,
+        "response_serializer": serialize if handler.response_serializer else None,
+    }
+
+
+def grpc_compression(name: str) -> grpc.Compression:
+    """Maps a ``ServerConfig.compression`` name to grpc's enum."""
+    return {"gzip": grpc.Compression.Gzip, "deflate": grpc.Compression.Deflate}.get(
+        name, grpc.Compression.NoCompression
+    )
+
+
+def _message_size(message) -> int:
+    return len(message) if isinstance(message, bytes) else message.ByteSize()
+
+
+class CompressionInterceptor(grpc.ServerInterceptor):
+    """
+    Sends messages smaller than ``min_bytes`` uncompressed. The server's ``compression``
+    argument picks the algorithm for everything else.
+    """
+
+    def __init__(self, min_bytes: int) -> None:
+        self.min_bytes = min_bytes
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        min_bytes = self.min_bytes
+
+        if handler.unary_unary is not None:
+            behavior = handler.unary_unary
+
+            def unary_unary(request, context):
+                response = behavior(request, context)
+                if _message_size(response) < min_bytes:
+                    context.disable_next_message_compression()
+                return response
+
+            return handler._replace(unary_unary=unary_unary)
+        if handler.unary_stream is not None:
+            behavior = handler.unary_stream
+
+            def unary_stream(request, context):
+                for message in behavior(request, context):
+                    if _message_size(message) < min_bytes:
+                        context.disable_next_message_compression()
+                    yield message
+
+            return handler._replace(unary_stream=unary_stream)
+        return handler
+
+
+class AsyncCompressionInterceptor(grpc.aio.ServerInterceptor):
+    """grpc.aio counterpart of :class:`CompressionInterceptor`."""
+
+    def __init__(self, min_bytes: int) -> None:
+        self.min_bytes = min_bytes
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        min_bytes = self.min_bytes
+
+        if handler.unary_unary is not None:
+            behavior = handler.unary_unary
+
+            async def unary_unary(request, context):
+                response = await behavior(request, context)
+                if _message_size(response) < min_bytes:
+                    context.disable_next_message_compression()
+                return response
+
+            return handler._replace(unary_unary=unary_unary)
+        if handler.unary_stream is not None:
+            behavior = handler.unary_stream
+
+            async def unary_stream(request, context):
+                async for message in behavior(request, context):
+                    if _message_size(message) < min_bytes:
+                        context.disable_next_message_compression()
+                    yield message
+
+            return handler._replace(unary_stream=unary_stream)
+        return handler
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Records latency, in-flight count, message sizes and error codes per method."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        codec = _measured_codec(method, handler)
+
+        if handler.unary_unary is not None:
+            behavior = handler.unary_unary
+
+            def unary_unary(request, context):
+                RPC_IN_FLIGHT.inc(method=method)
+                started, failed = time.perf_counter(), True
+                try:
+                    response = behavior(request, context)
+                    failed = False
+                    return response
+                finally:
+                    _rpc_finished(method, started, context, failed)
+
+            return handler._replace(unary_unary=unary_unary, **codec)
+        if handler.unary_stream is not None:
+            behavior = handler.unary_stream
+
+            def unary_stream(request, context):
+                RPC_IN_FLIGHT.inc(method=method)
+                started, failed = time.perf_counter(), True
+                try:
+                    yield from behavior(request, context)
+                    failed = False
+                finally:
+                    _rpc_finished(method, started, context, failed)
+
+            return handler._replace(unary_stream=unary_stream, **codec)
+        return handler
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """grpc.aio counterpart of :class:`MetricsInterceptor`."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        codec = _measured_codec(method, handler)
+
+        if handler.unary_unary is not None:
+            behavior = handler.unary_unary
+
+            async def unary_unary(request, context):
+                RPC_IN_FLIGHT.inc(method=method)
+                started, failed = time.perf_counter(), True
+                try:
+                    response = await behavior(request, context)
+                    failed = False
+                    return response
+                finally:
+                    _rpc_finished(method, started, context, failed)
+
+            return handler._replace(unary_unary=unary_unary, **codec)
+        if handler.unary_stream is not None:
+            behavior = handler.unary_stream
+
+            async def unary_stream(request, context):
+                RPC_IN_FLIGHT.inc(method=method)
+                started, failed = time.perf_counter(), True
+                try:
+                    async for message in behavior(request, context):
+                        yield message
+                    failed = False
+                finally:
+                    _rpc_finished(method, started, context, failed)
+
+            return handler._replace(unary_stream=unary_stream, **codec)
+        return handler
+
+
+def _serialize_response(response) -> bytes:
+    if isinstance(response, bytes):
+        return response
+    return response.SerializeToString()
+
+
+def add_BootPluginServicer_to_server(servicer: BootPluginServicer, server) -> None:
+    """
+    Mirror of the generated ``add_BootCodePluginServicer_to_server`` that routes
+    GetPromptComponents and AssemblePrompt through the cached, pre-serialized paths.
+    Works for both ``grpc.server`` and ``grpc.aio.server``.
+    """
+    rpc_method_handlers = {
+        "GetPromptComponents": grpc.unary_unary_rpc_method_handler(
+            servicer.GetPromptComponentsSerialized,
+            request_deserializer=plugin_pb2.GetPromptComponentsRequest.FromString,
+            response_serializer=_serialize_response,
+        ),
+        "GetPromptComponentsStream": grpc.unary_stream_rpc_method_handler(
+            servicer.GetPromptComponentsStream,
+            request_deserializer=plugin_pb2.GetPromptComponentsRequest.FromString,
+            response_serializer=_serialize_response,
+        ),
+        "GetPromptComponentsBatch": grpc.unary_unary_rpc_method_handler(
+            servicer.GetPromptComponentsBatch,
+            request_deserializer=plugin_pb2.GetPromptComponentsBatchRequest.FromString,
+            response_serializer=_serialize_response,
+        ),
+        "AssemblePrompt": grpc.unary_unary_rpc_method_handler(
+            servicer.AssemblePromptSerialized,
+            request_deserializer=plugin_pb2.AssemblePromptRequest.FromString,
+            response_serializer=_serialize_response,
+        ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler("plugin.BootCodePlugin", rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers("plugin.BootCodePlugin", rpc_method_handlers)
@@ -0,0 +1,128 @@
+"""
+gRPC server sizing and admission control.
+
+Standard library only: ``main`` builds a ``ServerConfig`` from flags and environment
+before gRPC is imported, and the server builders turn it into executor size, channel
+options and ``maximum_concurrent_rpcs``.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+MAX_WORKERS_ENV = "BOOT_PYTHON_MAX_WORKERS"
+MAX_CONCURRENT_RPCS_ENV = "BOOT_PYTHON_MAX_CONCURRENT_RPCS"
+KEEPALIVE_TIME_MS_ENV = "BOOT_PYTHON_KEEPALIVE_TIME_MS"
+MAX_MESSAGE_BYTES_ENV = "BOOT_PYTHON_MAX_MESSAGE_BYTES"
+COMPRESSION_ENV = "BOOT_PYTHON_COMPRESSION"
+COMPRESSION_MIN_BYTES_ENV = "BOOT_PYTHON_COMPRESSION_MIN_BYTES"
+
+# Admitted-but-waiting RPCs allowed per executor thread before new ones are shed.
+CONCURRENT_RPCS_PER_WORKER = 4
+DEFAULT_KEEPALIVE_TIME_MS = 60_000
+DEFAULT_KEEPALIVE_TIMEOUT_MS = 20_000
+# Clients may ping an idle connection this often without being sent GOAWAY.
+MIN_CLIENT_PING_INTERVAL_MS = 10_000
+DEFAULT_MAX_MESSAGE_BYTES = 4 * 1024 * 1024
+COMPRESSION_ALGORITHMS = ("none", "gzip", "deflate")
+# Smaller responses are sent uncompressed: below this the CPU outweighs the bytes saved.
+DEFAULT_COMPRESSION_MIN_BYTES = 1024
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def default_max_workers() -> int:
+    # Handlers are short and mostly hold the GIL, so threads beyond a few per core only
+    # add contention; the floor keeps small machines responsive while one RPC parses.
+    return max(4, min(32, available_cpus() * 2))
+
+
+def _int_from_env(name: str, default: Optional[int]) -> Optional[int]:
+    raw = os.getenv(name)
+    return int(raw) if raw else default
+
+
+def flag_from_env(name: str) -> bool:
+    """True for ``1``, ``true``, ``yes`` or ``on`` (any case); unset, empty or anything else is False."""
+    return (os.getenv(name) or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    """
+    ``max_concurrent_rpcs`` of 0 disables load shedding; ``None`` derives it from
+    ``max_workers``. RPCs over the limit fail fast with RESOURCE_EXHAUSTED.
+    """
+
+    max_workers: int
+    max_concurrent_rpcs: Optional[int] = None
+    keepalive_time_ms: int = DEFAULT_KEEPALIVE_TIME_MS
+    keepalive_timeout_ms: int = DEFAULT_KEEPALIVE_TIMEOUT_MS
+    max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES
+    # Set for --workers children, which all bind the same port.
+    reuse_port: bool = False
+    # Response compression; messages under compression_min_bytes are never compressed.
+    compression: str = "none"
+    compression_min_bytes: int = DEFAULT_COMPRESSION_MIN_BYTES
+
+    def __post_init__(self) -> None:
+        if self.compression not in COMPRESSION_ALGORITHMS:
+            raise ValueError(f"compression must be one of {', '.join(COMPRESSION_ALGORITHMS)}")
+
+    @classmethod
+    def from_env(cls) -> ServerConfig:
+        return cls(
+            max_workers=_int_from_env(MAX_WORKERS_ENV, None) or default_max_workers(),
+            max_concurrent_rpcs=_int_from_env(MAX_CONCURRENT_RPCS_ENV, None),
+            keepalive_time_ms=_int_from_env(KEEPALIVE_TIME_MS_ENV, DEFAULT_KEEPALIVE_TIME_MS),
+            max_message_bytes=_int_from_env(MAX_MESSAGE_BYTES_ENV, DEFAULT_MAX_MESSAGE_BYTES),
+            compression=os.getenv(COMPRESSION_ENV) or "none",
+            compression_min_bytes=_int_from_env(COMPRESSION_MIN_BYTES_ENV, DEFAULT_COMPRESSION_MIN_BYTES),
+        )
+
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+        """Value for grpc's ``maximum_concurrent_rpcs`` (``None`` means unlimited)."""
+        if self.max_concurrent_rpcs is None:
+            return self.max_workers * CONCURRENT_RPCS_PER_WORKER
+        return self.max_concurrent_rpcs or None
+
+    def grpc_options(self) -> List[Tuple[str, int]]:
+        options = [
+            ("grpc.max_receive_message_length", self.max_message_bytes),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.min_ping_interval_without_data_ms", MIN_CLIENT_PING_INTERVAL_MS),
+        ]
+        if self.keepalive_time_ms > 0:
+            options += [
+                ("grpc.keepalive_time_ms", self.keepalive_time_ms),
+                ("grpc.keepalive_timeout_ms", self.keepalive_timeout_ms),
+            ]
+        if self.reuse_port:
+            options.append(("grpc.so_reuseport", 1))
+        return options
+
+    def cli_args(self) -> List[str]:
+        """Flags that recreate this config in a child process (daemon, workers)."""
+        args = [
+            "--max-workers",
+            str(self.max_workers),
+            "--keepalive-time-ms",
+            str(self.keepalive_time_ms),
+            "--max-message-bytes",
+            str(self.max_message_bytes),
+            "--compression",
+            self.compression,
+            "--compression-min-bytes",
+            str(self.compression_min_bytes),
+        ]
+        if self.max_concurrent_rpcs is not None:
+            args += ["--max-concurrent-rpcs", str(self.max_concurrent_rpcs)]
+        return args
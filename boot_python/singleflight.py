@@ -0,0 +1,95 @@
+"""
+Request coalescing ("single flight") for identical concurrent work.
+
+The first caller for a key runs the computation; callers arriving while it is in
+flight wait for it and share its result or its error instead of repeating it. Nothing
+is kept once the call finishes; caching the result is up to the caller.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+from typing import Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from boot_python.metrics import COALESCED_REQUESTS
+
+V = TypeVar("V")
+
+# How often a waiter checks whether its own RPC was cancelled.
+CANCEL_POLL_SECONDS = 0.05
+
+
+class Cancelled(Exception):
+    """Raised to a waiter whose own request went away before the shared call finished."""
+
+
+class _Call(Generic[V]):
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Optional[V] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[V]):
+    """
+    Thread-safe. A named group reports coalesced callers to
+    ``boot_python_coalesced_requests_total``.
+    """
+
+    def __init__(self, name: str = "") -> None:
+        self.name = name
+        self.coalesced = 0
+        self._calls: Dict[Hashable, _Call[V]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[[], V], is_active: Optional[Callable[[], bool]] = None) -> V:
+        """
+        Returns ``fn()``, or the result of the identical call already in flight.
+
+        A waiter stops waiting with :class:`Cancelled` once ``is_active()`` turns false.
+        The running call is never interrupted, since the other waiters still need it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            if self.name:
+                COALESCED_REQUESTS.inc(group=self.name)
+            return self._wait(call, is_active)
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value  # type: ignore[return-value]
+
+    @staticmethod
+    def _wait(call: _Call[V], is_active: Optional[Callable[[], bool]]) -> V:
+        if is_active is None:
+            call.done.wait()
+        else:
+            while not call.done.wait(CANCEL_POLL_SECONDS):
+                if not is_active():
+                    raise Cancelled()
+        if call.error is not None:
+            # Each waiter raises its own copy, so concurrent raises don't share a traceback.
+            try:
+                error = copy.copy(call.error)
+            except Exception:  # noqa: BLE001
+                error = call.error
+            raise error.with_traceback(None) from call.error
+        return call.value  # type: ignore[return-value]
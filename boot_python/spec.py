@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple, Union
+
+from boot_python.lru import LRUCache
+from boot_python.metrics import TOML_PARSE_SECONDS
+
+DEFAULT_MAX_SPEC_BYTES = 256 * 1024
+DEFAULT_SPEC_CACHE_SIZE = 1024
+MAX_SPEC_BYTES_ENV = "BOOT_PYTHON_MAX_SPEC_BYTES"
+
+
+class SpecError(ValueError):
+    """The spec could not be turned into a ProjectSpec."""
+
+
+class SpecTooLargeError(SpecError):
+    """The spec exceeds the configured size limit and was not parsed."""
+
+
+@dataclass(frozen=True)
+class ProjectSpec:
+    name: str = "(unknown)"
+    language: str = "python"
+    description: str = ""
+    project_type: str = ""
+    version: str = ""
+    dependencies: Tuple[str, ...] = ()
+    # Digest of the spec text this was parsed from; handy as a cache key downstream.
+    digest: str = ""
+    # The full decoded TOML document, for consumers that need more than the fields above.
+    data: Mapping[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+
+def _toml_loads(text: str) -> Dict[str, Any]:
+    # Imported on first use: the TOML parser is not needed before the handshake.
+    try:
+        import tomllib  # Python 3.11+
+    except ModuleNotFoundError:  # Python ≤3.10
+        import tomli as tomllib  # type: ignore[no-redef]
+    return tomllib.loads(text)
+
+
+def spec_digest(spec_toml: str) -> str:
+    return hashlib.sha256(spec_toml.encode("utf-8")).hexdigest()
+
+
+def _names(value: Any) -> Tuple[str, ...]:
+    # Dependencies may be a list of requirement strings or a {name = version} table.
+    if isinstance(value, dict):
+        return tuple(str(k) for k in value)
+    if isinstance(value, list):
+        return tuple(str(v) for v in value)
+    return ()
+
+
+def _str(value: Any, default: str) -> str:
+    return default if value is None else str(value)
+
+
+def extract_spec(data: Mapping[str, Any], digest: str = "") -> ProjectSpec:
+    project = data.get("project", {})
+    if not isinstance(project, dict):
+        project = {}
+    deps = project.get("dependencies", data.get("dependencies"))
+    return ProjectSpec(
+        name=_str(project.get("name"), "(unknown)"),
+        language=_str(project.get("language"), "python"),
+        description=_str(project.get("description"), ""),
+        project_type=_str(project.get("type", project.get("project_type")), ""),
+        version=_str(project.get("version"), ""),
+        dependencies=_names(deps),
+        digest=digest,
+        data=MappingProxyType(dict(data)),
+    )
+
+
+def max_spec_bytes_from_env(default: int = DEFAULT_MAX_SPEC_BYTES) -> int:
+    raw = os.getenv(MAX_SPEC_BYTES_ENV)
+    return int(raw) if raw else default
+
+
+class SpecParser:
+    """
+    Size-limited, memoizing spec parser.
+
+    Results (including parse failures) are cached by the SHA-256 of the spec text, so a
+    hot spec is decoded once. Specs above ``max_bytes`` are rejected before hashing or
+    parsing so a pathological input cannot tie up a worker.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_SPEC_BYTES, cache_size: int = DEFAULT_SPEC_CACHE_SIZE) -> None:
+        self.max_bytes = max_bytes
+        # Failures are cached as their message so a bad spec is not re-parsed either.
+        self.cache: LRUCache[Union[ProjectSpec, str]] = LRUCache(cache_size, name="spec")
+
+    def too_large(self, spec_toml: str) -> bool:
+        if self.max_bytes <= 0:
+            return False
+        # A str never has more characters than UTF-8 bytes, and never more than 4 bytes per character.
+        if len(spec_toml) > self.max_bytes:
+            return True
+        if len(spec_toml) * 4 <= self.max_bytes:
+            return False
+        return len(spec_toml.encode("utf-8")) > self.max_bytes
+
+    def is_cached(self, spec_toml: str) -> bool:
+        """True when ``parse`` would answer from the cache without decoding the TOML."""
+        return spec_digest(spec_toml) in self.cache
+
+    def parse(self, spec_toml: str) -> ProjectSpec:
+        if self.too_large(spec_toml):
+            raise SpecTooLargeError(f"Spec is larger than the {self.max_bytes}-byte limit")
+        digest = spec_digest(spec_toml)
+        cached = self.cache.get(digest)
+        if cached is None:
+            try:
+                with TOML_PARSE_SECONDS.time():
+                    data = _toml_loads(spec_toml)
+                cached = extract_spec(data, digest)
+            except Exception as e:  # noqa: BLE001
+                cached = f"Failed to parse spec TOML: {e}"
+            self.cache.put(digest, cached)
+        if isinstance(cached, str):
+            raise SpecError(cached)
+        return cached
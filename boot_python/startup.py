@@ -0,0 +1,107 @@
+"""
+Start-up timing.
+
+``StartupMarks`` records phase timestamps inside a plugin process. ``profile_startup``
+spawns the plugin the way boot-code does, with ``-X importtime``, and reports the
+wall-clock time to the handshake line together with the slowest imports.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+MARKS_ENV = "BOOT_PYTHON_STARTUP_MARKS"
+MARKS_PREFIX = "startup-marks "
+
+
+class StartupMarks:
+    """Milliseconds since ``main()`` was entered, per named phase."""
+
+    def __init__(self) -> None:
+        self._t0 = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        self.marks[phase] = round((time.perf_counter() - self._t0) * 1000.0, 3)
+
+    def emit(self) -> None:
+        if os.getenv(MARKS_ENV):
+            logging.info("%s%s", MARKS_PREFIX, json.dumps(self.marks))
+
+
+def _parse_importtime(lines: List[str]) -> List[Dict[str, Any]]:
+    # Lines look like: "import time:   self [us] |  cumulative | imported package"
+    rows = []
+    for line in lines:
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:") :].split("|", 2)
+            rows.append(
+                {
+                    "module": module.strip(),
+                    "depth": (len(module) - len(module.lstrip()) - 1) // 2,
+                    "self_ms": int(self_us) / 1000.0,
+                    "cumulative_ms": int(cumulative_us) / 1000.0,
+                }
+            )
+        except ValueError:
+            continue
+    return rows
+
+
+def _run_once(extra_args: List[str]) -> Dict[str, Any]:
+    env = dict(os.environ, **{MARKS_ENV: "1", "BOOT_PYTHON_TEST_EXIT_AFTER_HANDSHAKE": "1"})
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-X", "importtime", "-m", "boot_python.main", *extra_args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+    )
+    handshake = proc.stdout.readline() if proc.stdout else ""
+    to_handshake = time.perf_counter() - t0
+    _, stderr = proc.communicate(timeout=30)
+
+    lines = stderr.splitlines()
+    marks: Dict[str, float] = {}
+    for line in lines:
+        idx = line.find(MARKS_PREFIX)
+        if idx >= 0:
+            marks = json.loads(line[idx + len(MARKS_PREFIX) :])
+    imports = _parse_importtime(lines)
+    top_level = [row for row in imports if row["depth"] == 0]
+    return {
+        "handshake": handshake.strip(),
+        "time_to_handshake_ms": round(to_handshake * 1000.0, 3),
+        "import_ms": round(sum(row["cumulative_ms"] for row in top_level), 3),
+        "phases_ms": marks,
+        "imports": imports,
+    }
+
+
+def profile_startup(runs: int = 5, extra_args: Optional[List[str]] = None) -> Dict[str, Any]:
+    results = [_run_once(list(extra_args or [])) for _ in range(max(1, runs))]
+    handshake_ms = sorted(r["time_to_handshake_ms"] for r in results)
+    best = min(results, key=lambda r: r["time_to_handshake_ms"])
+    slowest = sorted(best["imports"], key=lambda row: row["self_ms"], reverse=True)[:15]
+    return {
+        "runs": len(results),
+        "time_to_handshake_ms": {
+            "min": handshake_ms[0],
+            "median": handshake_ms[len(handshake_ms) // 2],
+            "max": handshake_ms[-1],
+        },
+        # Breakdown of the fastest run: total import time, phase marks inside main(),
+        # and the imports with the highest self time.
+        "import_ms": best["import_ms"],
+        "phases_ms": best["phases_ms"],
+        "slowest_imports": slowest,
+    }
@@ -0,0 +1,352 @@
+"""
+Small template engine for prompt templates (``*.template``).
+
+Supports ``{{ spec.project.name }}`` lookups (dotted paths, integer indexes and a few
+``| filters``), ``{% if %}/{% elif %}/{% else %}/{% endif %}`` with ``not``, ``and``,
+``or``, ``==`` and ``!=``, and ``{% for x in path %}...{% endfor %}`` with
+``loop.index``/``loop.first``/``loop.last``. Missing values render as an empty string. A
+block tag followed by a newline swallows that newline, so tags can sit on their own lines.
+
+Templates are compiled once into a tree of closures. ``TemplateRenderer`` caches the
+compiled form by template digest and the rendered text by (template, spec) digest.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from boot_python.lru import LRUCache
+
+DEFAULT_COMPILED_CACHE_SIZE = 64
+DEFAULT_RENDER_CACHE_SIZE = 1024
+
+_TAG_RE = re.compile(r"\{\{(.*?)\}\}|\{%(.*?)%\}(\n)?", re.DOTALL)
+_EXPR_TOKEN_RE = re.compile(
+    r"""\s*(?:("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|(-?\d+)|(==|!=|\(|\)|\||,)|([A-Za-z_][\w.]*))"""
+)
+
+_Context = Dict[str, Any]
+_Expr = Callable[[_Context], Any]
+_Node = Callable[[_Context, List[str]], None]
+
+
+class TemplateError(ValueError):
+    """The template could not be compiled."""
+
+
+class _Missing:
+    def __str__(self) -> str:
+        return ""
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+
+MISSING = _Missing()
+
+
+def _lookup(value: Any, key: str) -> Any:
+    if isinstance(value, Mapping):
+        return value.get(key, MISSING)
+    if isinstance(value, (list, tuple)) and key.lstrip("-").isdigit():
+        idx = int(key)
+        return value[idx] if -len(value) <= idx < len(value) else MISSING
+    # Only data is reachable from a template: no attribute access on arbitrary objects.
+    return MISSING
+
+
+def _to_text(value: Any) -> str:
+    if value is None or value is MISSING:
+        return ""
+    if value is True or value is False:
+        return "true" if value else "false"
+    return str(value)
+
+
+FILTERS: Dict[str, Callable[..., Any]] = {
+    "default": lambda value, fallback="": value if value not in (None, "", MISSING) else fallback,
+    "join": lambda value, sep=", ": sep.join(_to_text(v) for v in value),
+    "length": lambda value: len(value) if value is not MISSING else 0,
+    "lower": lambda value: _to_text(value).lower(),
+    "upper": lambda value: _to_text(value).upper(),
+    "title": lambda value: _to_text(value).title(),
+}
+
+
+class _ExprParser:
+    """Recursive-descent parser turning one tag expression into a closure."""
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.tokens: List[Tuple[str, str]] = []
+        pos = 0
+        while pos < len(source):
+            if source[pos:].strip() == "":
+                break
+            m = _EXPR_TOKEN_RE.match(source, pos)
+            if not m:
+                raise TemplateError(f"Unexpected character in expression {source!r}")
+            string, number, op, name = m.groups()
+            if string is not None:
+                self.tokens.append(("str", re.sub(r"\\(.)", r"\1", string[1:-1])))
+            elif number is not None:
+                self.tokens.append(("num", number))
+            elif op is not None:
+                self.tokens.append(("op", op))
+            else:
+                self.tokens.append(("name", name))
+            pos = m.end()
+        self.pos = 0
+
+    def parse(self) -> _Expr:
+        expr = self._or()
+        if self.pos != len(self.tokens):
+            raise TemplateError(f"Unexpected {self.tokens[self.pos][1]!r} in expression {self.source!r}")
+        return expr
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _accept(self, kind: str, value: Optional[str] = None) -> bool:
+        tok = self._peek()
+        if tok and tok[0] == kind and (value is None or tok[1] == value):
+            self.pos += 1
+            return True
+        return False
+
+    def _or(self) -> _Expr:
+        left = self._and()
+        while self._accept("name", "or"):
+            a, b = left, self._and()
+            left = lambda ctx, a=a, b=b: a(ctx) or b(ctx)  # noqa: E731
+        return left
+
+    def _and(self) -> _Expr:
+        left = self._not()
+        while self._accept("name", "and"):
+            a, b = left, self._not()
+            left = lambda ctx, a=a, b=b: a(ctx) and b(ctx)  # noqa: E731
+        return left
+
+    def _not(self) -> _Expr:
+        if self._accept("name", "not"):
+            inner = self._not()
+            return lambda ctx: not inner(ctx)
+        return self._compare()
+
+    def _compare(self) -> _Expr:
+        left = self._filtered()
+        tok = self._peek()
+        if tok in (("op", "=="), ("op", "!=")):
+            self.pos += 1
+            right = self._filtered()
+            if tok[1] == "==":
+                return lambda ctx: _to_text(left(ctx)) == _to_text(right(ctx))
+            return lambda ctx: _to_text(left(ctx)) != _to_text(right(ctx))
+        return left
+
+    def _filtered(self) -> _Expr:
+        expr = self._atom()
+        while self._accept("op", "|"):
+            tok = self._peek()
+            if not tok or tok[0] != "name" or tok[1] not in FILTERS:
+                raise TemplateError(f"Unknown filter in expression {self.source!r}")
+            self.pos += 1
+            func = FILTERS[tok[1]]
+            args: List[_Expr] = []
+            if self._accept("op", "(") and not self._accept("op", ")"):
+                while True:
+                    args.append(self._atom())
+                    if self._accept("op", ")"):
+                        break
+                    if not self._accept("op", ","):
+                        raise TemplateError(f"Bad filter arguments in {self.source!r}")
+            expr = lambda ctx, e=expr, f=func, a=tuple(args): f(e(ctx), *(x(ctx) for x in a))  # noqa: E731
+        return expr
+
+    def _atom(self) -> _Expr:
+        tok = self._peek()
+        if tok is None:
+            raise TemplateError(f"Incomplete expression {self.source!r}")
+        self.pos += 1
+        kind, value = tok
+        if kind == "str":
+            return lambda ctx: value
+        if kind == "num":
+            number = int(value)
+            return lambda ctx: number
+        if kind == "op" and value == "(":
+            inner = self._or()
+            if not self._accept("op", ")"):
+                raise TemplateError(f"Missing ')' in expression {self.source!r}")
+            return inner
+        if kind == "name":
+            if value in ("true", "false"):
+                flag = value == "true"
+                return lambda ctx: flag
+            head, *rest = value.split(".")
+            if not head or "" in rest:
+                raise TemplateError(f"Bad name {value!r} in expression {self.source!r}")
+
+            def lookup(ctx: _Context, head=head, rest=tuple(rest)) -> Any:
+                cur = ctx.get(head, MISSING)
+                for key in rest:
+                    if cur is MISSING or cur is None:
+                        return MISSING
+                    cur = _lookup(cur, key)
+                return cur
+
+            return lookup
+        raise TemplateError(f"Unexpected {value!r} in expression {self.source!r}")
+
+
+def _compile_expr(source: str) -> _Expr:
+    return _ExprParser(source.strip()).parse()
+
+
+def _text_node(text: str) -> _Node:
+    return lambda ctx, out: out.append(text)
+
+
+def _var_node(expr: _Expr) -> _Node:
+    return lambda ctx, out: out.append(_to_text(expr(ctx)))
+
+
+def _run(body: Sequence[_Node], ctx: _Context, out: List[str]) -> None:
+    for node in body:
+        node(ctx, out)
+
+
+def _if_node(branches: Sequence[Tuple[Optional[_Expr], Sequence[_Node]]]) -> _Node:
+    def render(ctx: _Context, out: List[str]) -> None:
+        for cond, body in branches:
+            if cond is None or cond(ctx):
+                _run(body, ctx, out)
+                return
+
+    return render
+
+
+def _for_node(target: str, iterable: _Expr, body: Sequence[_Node], empty: Sequence[_Node]) -> _Node:
+    def render(ctx: _Context, out: List[str]) -> None:
+        value = iterable(ctx)
+        items = list(value) if value is not None else []
+        if not items:
+            _run(empty, ctx, out)
+            return
+        inner = dict(ctx)
+        last = len(items) - 1
+        for i, item in enumerate(items):
+            inner[target] = item
+            inner["loop"] = {"index": i + 1, "index0": i, "first": i == 0, "last": i == last}
+            _run(body, inner, out)
+
+    return render
+
+
+class Template:
+    """A compiled template; ``render`` never re-parses the source."""
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        self._body = self._compile(source)
+
+    def render(self, context: Mapping[str, Any]) -> str:
+        out: List[str] = []
+        _run(self._body, dict(context), out)
+        return "".join(out)
+
+    @staticmethod
+    def _compile(source: str) -> List[_Node]:
+        # Stack of open blocks: (tag, body being filled, block state).
+        root: List[_Node] = []
+        stack: List[Tuple[str, List[_Node], Dict[str, Any]]] = []
+        body = root
+        pos = 0
+        for m in _TAG_RE.finditer(source):
+            if m.start() > pos:
+                body.append(_text_node(source[pos : m.start()]))
+            pos = m.end()
+            var, block = m.group(1), m.group(2)
+            if var is not None:
+                body.append(_var_node(_compile_expr(var)))
+                continue
+            words = block.strip().split(None, 1)
+            keyword = words[0] if words else ""
+            arg = words[1] if len(words) > 1 else ""
+            if keyword == "if":
+                state = {"branches": [(_compile_expr(arg), [])]}
+                stack.append(("if", body, state))
+                body = state["branches"][-1][1]
+            elif keyword in ("elif", "else") and stack and stack[-1][0] == "if":
+                state = stack[-1][2]
+                if state["branches"][-1][0] is None:
+                    raise TemplateError(f"'{{% {keyword} %}}' after '{{% else %}}'")
+                state["branches"].append((_compile_expr(arg) if keyword == "elif" else None, []))
+                body = state["branches"][-1][1]
+            elif keyword == "endif" and stack and stack[-1][0] == "if":
+                _, body, state = stack.pop()
+                body.append(_if_node(state["branches"]))
+            elif keyword == "for":
+                target, sep, iterable = arg.partition(" in ")
+                if not sep or not target.strip().isidentifier():
+                    raise TemplateError(f"Expected '{{% for name in expr %}}', got {block.strip()!r}")
+                state = {"target": target.strip(), "iterable": _compile_expr(iterable), "body": [], "empty": []}
+                stack.append(("for", body, state))
+                body = state["body"]
+            elif keyword == "else" and stack and stack[-1][0] == "for":
+                body = stack[-1][2]["empty"]
+            elif keyword == "endfor" and stack and stack[-1][0] == "for":
+                _, body, state = stack.pop()
+                body.append(_for_node(state["target"], state["iterable"], state["body"], state["empty"]))
+            else:
+                raise TemplateError(f"Unexpected tag {{% {block.strip()} %}}")
+        if stack:
+            raise TemplateError(f"Unclosed {{% {stack[-1][0]} %}} block")
+        if pos < len(source):
+            body.append(_text_node(source[pos:]))
+        return root
+
+
+def compile_template(source: str) -> Template:
+    return Template(source)
+
+
+class TemplateRenderer:
+    """Compiles each distinct template once and memoizes renders per spec digest."""
+
+    def __init__(
+        self,
+        compiled_cache_size: int = DEFAULT_COMPILED_CACHE_SIZE,
+        render_cache_size: int = DEFAULT_RENDER_CACHE_SIZE,
+    ) -> None:
+        # A template that fails to compile is cached as its error message, so a broken
+        # file costs one compile per version rather than one per request.
+        self._compiled: LRUCache[Union[Template, str]] = LRUCache(compiled_cache_size, name="template")
+        self._rendered: LRUCache[str] = LRUCache(render_cache_size, name="render")
+
+    def compiled(self, source: str, digest: str) -> Template:
+        template = self._compiled.get(digest)
+        if template is None:
+            try:
+                template = compile_template(source)
+            except TemplateError as e:
+                template = str(e)
+            self._compiled.put(digest, template)
+        if isinstance(template, str):
+            raise TemplateError(template)
+        return template
+
+    def render(self, source: str, digest: str, context: Mapping[str, Any], context_digest: str) -> str:
+        key = f"{digest}:{context_digest}"
+        text = self._rendered.get(key)
+        if text is None:
+            text = self.compiled(source, digest).render(context)
+            self._rendered.put(key, text)
+        return text
@@ -0,0 +1,156 @@
+"""
+Token estimates for prompt components, and trimming a component set to a budget.
+
+The index is built once per prompt set at load time: each component is split into
+sections (at heading lines) and the estimator runs once per section. A request with
+``max_tokens`` then only walks the components in priority order and bisects each
+one's cumulative section counts, so nothing is re-tokenized on the request path.
+
+The default estimator is the usual ~4 characters per token rule of thumb. Point
+``BOOT_PYTHON_TOKEN_ESTIMATOR`` at a ``module:callable`` taking a string and returning
+an int to use a real tokenizer instead.
+"""
+
+from __future__ import annotations
+
+import bisect
+import dataclasses
+import importlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from boot_python.prompt_store import PromptSet
+
+TokenEstimator = Callable[[str], int]
+
+TOKEN_ESTIMATOR_ENV = "BOOT_PYTHON_TOKEN_ESTIMATOR"
+# Components kept first when trimming; the rest follow in name order.
+DEFAULT_PRIORITY = ("base_instructions.txt", "language_rules.txt")
+
+# "GENERAL BEST PRACTICES", "WEB APIS (FastAPI)", "CRITICAL RULES:" or a markdown heading;
+# not a sentence that merely starts with a shouted word ("AVOID iterating over rows.").
+_HEADING = re.compile(r"^(?:#{1,6} \S.*|[A-Z][A-Z0-9]+\b(?:.*[^.\s])?)$", re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def estimator_from_env() -> TokenEstimator:
+    target = os.getenv(TOKEN_ESTIMATOR_ENV, "")
+    if not target:
+        return estimate_tokens
+    module, _, attr = target.partition(":")
+    try:
+        return getattr(importlib.import_module(module), attr or "estimate_tokens")
+    except (ImportError, AttributeError) as e:
+        logging.warning("Cannot load token estimator %r (%s); using the default", target, e)
+        return estimate_tokens
+
+
+@dataclass(frozen=True)
+class ComponentTokens:
+    """Running token totals for one component, one entry per section."""
+
+    # Tokens of the text up to the end of each section, and where that section ends.
+    cumulative: Tuple[int, ...]
+    ends: Tuple[int, ...]
+
+    @property
+    def total(self) -> int:
+        return self.cumulative[-1] if self.cumulative else 0
+
+    def prefix(self, budget: int) -> Tuple[int, int]:
+        """``(end offset, tokens)`` of the longest run of leading sections within ``budget``."""
+        n = bisect.bisect_right(self.cumulative, budget)
+        return (self.ends[n - 1], self.cumulative[n - 1]) if n else (0, 0)
+
+
+def section_bounds(text: str) -> List[int]:
+    """End offsets of the sections of ``text``; a section starts at each heading line."""
+    starts = [m.start() for m in _HEADING.finditer(text) if m.start() > 0]
+    return [*starts, len(text)]
+
+
+def index_component(text: str, estimator: TokenEstimator = estimate_tokens) -> ComponentTokens:
+    cumulative, ends, start, total = [], [], 0, 0
+    for end in section_bounds(text):
+        total += estimator(text[start:end])
+        cumulative.append(total)
+        ends.append(end)
+        start = end
+    return ComponentTokens(tuple(cumulative), tuple(ends))
+
+
+def index_prompt_set(prompts: PromptSet, estimator: TokenEstimator = estimate_tokens) -> PromptSet:
+    """
+    Attaches a token index, keyed by component digest, to ``prompts`` and each of its
+    variants. Variants share most components, so each distinct text is indexed once.
+    """
+    index: Dict[str, ComponentTokens] = {}
+    for variant in (prompts, *prompts.variants.values()):
+        for name, text in variant.components.items():
+            digest = variant.digests[name]
+            if digest not in index:
+                index[digest] = index_component(text, estimator)
+    tokens = MappingProxyType(index)
+    indexed: Dict[int, PromptSet] = {}
+
+    def attach(variant: PromptSet) -> PromptSet:
+        if id(variant) not in indexed:
+            indexed[id(variant)] = dataclasses.replace(variant, tokens=tokens)
+        return indexed[id(variant)]
+
+    variants = MappingProxyType({key: attach(v) for key, v in prompts.variants.items()})
+    return dataclasses.replace(prompts, tokens=tokens, variants=variants)
+
+
+@dataclass(frozen=True)
+class Fit:
+    components: Mapping[str, str]
+    tokens: int
+    # Components truncated or left out, in priority order.
+    trimmed: Tuple[str, ...]
+
+
+def fit_components(
+    prompts: PromptSet,
+    max_tokens: int,
+    priority: Sequence[str] = DEFAULT_PRIORITY,
+    only: Optional[Sequence[str]] = None,
+    estimator: TokenEstimator = estimate_tokens,
+) -> Fit:
+    """
+    Keeps components whole, in priority order, while they fit. One that does not is cut
+    back to its leading sections that still fit (or dropped), and later components
+    still get a chance at the remaining budget.
+
+    With ``only``, just those components are fitted, in that order; the others are
+    left out without being reported as trimmed. ``estimator`` only counts components
+    missing from the set's token index.
+    """
+    if only is not None:
+        names = [n for n in dict.fromkeys(only) if n in prompts.components]
+    else:
+        names = [n for n in priority if n in prompts.components]
+        names += sorted(n for n in prompts.components if n not in priority)
+    kept: Dict[str, str] = {}
+    trimmed: List[str] = []
+    remaining = max_tokens
+    for name in names:
+        text = prompts.components[name]
+        tokens = prompts.tokens.get(prompts.digests[name]) or index_component(text, estimator)
+        if tokens.total <= remaining:
+            kept[name] = text
+            remaining -= tokens.total
+            continue
+        trimmed.append(name)
+        end, used = tokens.prefix(remaining)
+        if end:
+            kept[name] = text[:end].rstrip() + "\n"
+            remaining -= used
+    return Fit(MappingProxyType(kept), max_tokens - remaining, tuple(trimmed))
@@ -0,0 +1,164 @@
+"""
+Background prompt watcher.
+
+Watches the prompt directories and rebuilds the store's snapshot off the request path
+whenever a prompt file changes. On Linux it blocks on inotify (through ctypes, no extra
+dependency). Elsewhere, or if inotify is unavailable, it polls file mtimes instead.
+RPCs keep reading whichever immutable ``PromptSet`` is current; a reload builds a new
+one and swaps the reference.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import select
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+from boot_python.metrics import PROMPT_RELOAD_SECONDS, PROMPT_RELOADS
+from boot_python.prompt_store import PromptStore
+
+DEFAULT_POLL_INTERVAL = 1.0
+# Editors often write a file in several steps; wait this long after the first event.
+DEBOUNCE = 0.05
+
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_WATCH_MASK = (
+    _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+)
+
+
+class _Inotify:
+    """Minimal inotify handle; only reports *that* something changed, not what."""
+
+    def __init__(self, dirs: Sequence[Path]) -> None:
+        import ctypes
+
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            self.add(dirs)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def add(self, dirs: Sequence[Path]) -> None:
+        """Watches ``dirs``; re-adding an already watched directory is a no-op."""
+        for d in dirs:
+            if self._libc.inotify_add_watch(self.fd, os.fsencode(d), _WATCH_MASK) < 0:
+                raise OSError(self._ctypes.get_errno(), f"inotify_add_watch failed for {d}")
+
+    def wait(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        self._drain()
+        return True
+
+    def _drain(self) -> None:
+        try:
+            while os.read(self.fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PromptWatcher:
+    """
+    Reloads ``store`` when its prompt files change. ``mode`` is ``"auto"`` (inotify when
+    available), ``"inotify"`` or ``"poll"``.
+    """
+
+    def __init__(self, store: PromptStore, *, mode: str = "auto", poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.store = store
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self._last_sig: tuple = ()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        if mode in ("auto", "inotify"):
+            try:
+                self._inotify = _Inotify(store.watch_dirs())
+            except (OSError, AttributeError) as e:
+                if mode == "inotify":
+                    raise
+                logging.info("inotify unavailable (%s); polling prompt files every %.1fs", e, poll_interval)
+        self.mode = "inotify" if self._inotify is not None else "poll"
+
+    def start(self) -> PromptWatcher:
+        # Baseline taken before returning, so edits made right after start() are not missed.
+        self._last_sig = self.store.signature()
+        self._thread = threading.Thread(target=self._run, name="boot-python-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                # Wake periodically so stop() is honoured without a wake-up pipe.
+                if not self._inotify.wait(0.5):
+                    continue
+                self._stop.wait(DEBOUNCE)
+                self._inotify.wait(0)
+                # Before the signature, so files created in a new directory are not missed.
+                self._watch_new_dirs()
+            elif self._stop.wait(self.poll_interval):
+                break
+            sig = self.store.signature()
+            if sig == self._last_sig:
+                continue
+            self._last_sig = sig
+            self._reload()
+
+    def _watch_new_dirs(self) -> None:
+        # Overlay pack directories can appear while running, and inotify does not recurse.
+        try:
+            self._inotify.add(self.store.watch_dirs())
+        except OSError as e:
+            logging.warning("Cannot watch new prompt directories: %s", e)
+
+    def _reload(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            snapshot = self.store.reload()
+        except Exception as e:  # noqa: BLE001
+            PROMPT_RELOADS.inc(result="error")
+            logging.warning("Prompt reload failed; keeping the previous prompts: %s", e)
+            return
+        PROMPT_RELOAD_SECONDS.observe(time.perf_counter() - t0)
+        PROMPT_RELOADS.inc(result="ok")
+        self.reloads += 1
+        logging.info("Reloaded prompts (version %s, %d components)", snapshot.version[:12], len(snapshot.components))
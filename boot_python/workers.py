@@ -0,0 +1,203 @@
+"""
+Multi-process server mode.
+
+``boot-python --workers N`` reserves a port, starts N plugin processes that all bind it
+with ``SO_REUSEPORT`` (the kernel spreads incoming connections across them), and prints
+a single handshake once every worker is serving. The parent only supervises: it
+restarts workers that die and forwards SIGTERM/SIGINT to all of them on shutdown.
+
+Workers are spawned as fresh interpreters rather than forked, because gRPC's core
+threads do not survive ``fork()``. Only the standard library is imported here.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, List, Optional, Sequence
+
+HANDSHAKE_TCP = "1|1|tcp|{address}|grpc"
+READY_TIMEOUT = 15.0
+STOP_GRACE = 5.0
+# A worker that dies sooner than this after starting counts as crash-looping.
+MIN_HEALTHY_UPTIME = 5.0
+MAX_RESTART_DELAY = 5.0
+
+
+def reserve_port(host: str) -> socket.socket:
+    """
+    Binds (without listening) an ``SO_REUSEPORT`` socket so the port stays ours while
+    workers come and go. A non-listening socket never receives connections.
+    """
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, 0))
+    return sock
+
+
+class _Worker:
+    def __init__(self, index: int, argv: List[str]) -> None:
+        self.index = index
+        self.argv = argv
+        self.proc: Optional[subprocess.Popen] = None
+        self.started = 0.0
+        self.ready = False
+        self.restart_delay = 0.0
+        self.restart_at = 0.0
+
+    def spawn(self) -> None:
+        self.proc = subprocess.Popen(self.argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, text=True)
+        self.started = time.monotonic()
+        self.ready = False
+
+    def wait_ready(self, timeout: float) -> str:
+        """Returns the worker's own handshake line (empty if it exited first)."""
+        assert self.proc is not None and self.proc.stdout is not None
+        line = self.proc.stdout.readline() if _readable(self.proc.stdout, timeout) else ""
+        self.proc.stdout.close()
+        return line.strip()
+
+    def poll_ready(self, expected: str, now: float) -> Optional[bool]:
+        """
+        Non-blocking handshake check: None while the worker is still starting, else
+        whether it announced ``expected`` before exiting or running out of time.
+        """
+        assert self.proc is not None and self.proc.stdout is not None
+        if _readable(self.proc.stdout, 0):
+            self.ready = _serves(self.wait_ready(0), expected)
+            return self.ready
+        if now - self.started < READY_TIMEOUT:
+            return None
+        self.proc.stdout.close()
+        return False
+
+
+def _readable(stream, timeout: float) -> bool:
+    import select
+
+    ready, _, _ = select.select([stream], [], [], timeout)
+    return bool(ready)
+
+
+def _serves(handshake: str, expected: str) -> bool:
+    return handshake.split("|")[3:4] == [expected]
+
+
+def _worker_argv(port: int, server_args: Sequence[str]) -> List[str]:
+    return [sys.executable, "-m", "boot_python.main", "--worker-port", str(port), *server_args]
+
+
+def exit_with_parent() -> None:
+    """Asks Linux to SIGTERM this worker if the supervisor dies without cleaning up."""
+    try:
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.prctl(1, signal.SIGTERM)  # PR_SET_PDEATHSIG
+    except (OSError, AttributeError):
+        pass
+
+
+def _stop_all(workers: Sequence[_Worker]) -> None:
+    procs = [w.proc for w in workers if w.proc is not None and w.proc.poll() is None]
+    for proc in procs:
+        proc.terminate()
+    deadline = time.monotonic() + STOP_GRACE
+    for proc in procs:
+        try:
+            proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def _tend(w: _Worker, expected: str, now: float) -> None:
+    """
+    One supervisor step for ``w``; never blocks. Restarts it once its backoff has
+    passed, checks a restarted worker's handshake, and schedules the next restart
+    when it exits. A worker that fails its handshake is killed and backs off like a
+    crash-looping one.
+    """
+    if w.proc is None:
+        if now >= w.restart_at:
+            w.spawn()
+        return
+    if not w.ready:
+        ready = w.poll_ready(expected, now)
+        if ready is None:
+            return
+        if not ready:
+            logging.warning("boot-python worker %d (pid %d) failed its handshake", w.index, w.proc.pid)
+            w.proc.kill()
+            w.proc.wait()
+    code = w.proc.poll()
+    if code is None:
+        return
+    healthy = w.ready and now - w.started >= MIN_HEALTHY_UPTIME
+    w.restart_delay = 0.0 if healthy else min(MAX_RESTART_DELAY, max(0.1, w.restart_delay * 2))
+    logging.warning(
+        "boot-python worker %d (pid %d) exited with %s; restarting in %.1fs",
+        w.index,
+        w.proc.pid,
+        code,
+        w.restart_delay,
+    )
+    w.proc = None
+    w.restart_at = now + w.restart_delay
+
+
+def supervise(
+    host: str,
+    count: int,
+    server_args: Sequence[str] = (),
+    exit_after_handshake: bool = False,
+    worker_args: Optional[Callable[[int], Sequence[str]]] = None,
+) -> None:
+    """
+    Runs ``count`` workers until signalled. ``worker_args(index)`` may return extra
+    arguments for an individual worker (e.g. a per-worker metrics dump path).
+    """
+    reservation = reserve_port(host)
+    port = reservation.getsockname()[1]
+    expected = f"{host}:{port}"
+    workers = [
+        _Worker(i, _worker_argv(port, [*server_args, *(worker_args(i) if worker_args else ())]))
+        for i in range(count)
+    ]
+    stop = {"flag": False}
+
+    def _sigterm(*_):
+        stop["flag"] = True
+
+    signal.signal(signal.SIGINT, _sigterm)
+    signal.signal(signal.SIGTERM, _sigterm)
+    try:
+        for w in workers:
+            w.spawn()
+        deadline = time.monotonic() + READY_TIMEOUT
+        for w in workers:
+            line = w.wait_ready(max(0.0, deadline - time.monotonic()))
+            if not _serves(line, expected):
+                raise RuntimeError(f"worker {w.index} failed to start (handshake {line!r})")
+            w.ready = True
+
+        sys.stdout.write(HANDSHAKE_TCP.format(address=expected) + "\n")
+        sys.stdout.flush()
+        logging.info("boot-python supervising %d workers on %s (pid %d)", count, expected, os.getpid())
+        if exit_after_handshake:
+            return
+
+        while not stop["flag"]:
+            now = time.monotonic()
+            for w in workers:
+                _tend(w, expected, now)
+            time.sleep(0.2)
+    finally:
+        _stop_all(workers)
+        reservation.close()
+        logging.info("boot-python stopped")
@@ -2,10 +2,31 @@
 """
 Usage
 python concat_files.py
+
+Streams every matching file into one output file. The walk prunes ignored directories
+(and anything a .gitignore excludes, including the .gitignore files between the top of
+the git work tree and each --folders root) before descending, files are read on a thread
+pool, and the output is written as results arrive, in sorted path order. Only a
+bounded window of files is held in memory at once, however large the tree is.
+
+--chunk-bytes / --chunk-tokens split the output into numbered chunk files
+(all_code.001.txt, ...) that stay within the budget, plus all_code.index.json mapping
+each path to its chunk. A file larger than the budget gets a chunk of its own.
+
+--incremental keeps a manifest of path -> (size, mtime, digest) and one cached segment
+per file in <output>.cache/. Files whose size and mtime are unchanged are not read
+again, and output files whose segments are all unchanged are not rewritten.
 """
 
 import argparse
+import collections
+import hashlib
+import json
+import os
 import pathlib
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
 
 # --- Configuration ---
 # List of directories to always ignore during the file search.
@@ -42,9 +63,465 @@ DEFAULT_IGNORE_FILES = [
     "poetry.lock",
 ]
 
+# Files larger than this are skipped (0 disables the limit).
+DEFAULT_MAX_BYTES = 1024 * 1024
+# A NUL byte in the first block marks a file as binary, as git does.
+BINARY_SNIFF_BYTES = 8192
+# Files read ahead of the writer, per worker thread.
+READ_AHEAD_PER_JOB = 4
+# Bumped whenever the segment format changes, which invalidates existing caches.
+MANIFEST_VERSION = 1
+
+
+class GitIgnore:
+    """The rules of one .gitignore file, applied to paths below its directory."""
+
+    def __init__(self, base: str, lines: list[str]):
+        self.base = base
+        self.rules: list[tuple[re.Pattern, bool, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            # A slash anywhere but the end anchors the pattern to this directory.
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if line:
+                self.rules.append((_glob_regex(line), negate, dir_only, anchored))
+
+    @classmethod
+    def from_dir(cls, directory: str) -> Optional["GitIgnore"]:
+        try:
+            with open(os.path.join(directory, ".gitignore"), encoding="utf-8") as f:
+                return cls(directory, f.readlines())
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a ``!`` rule, None if no rule matches."""
+        rel = os.path.relpath(path, self.base).replace(os.sep, "/")
+        name = rel.rsplit("/", 1)[-1]
+        result = None
+        for regex, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel if anchored else name):
+                result = not negate
+        return result
+
+
+def _glob_regex(pattern: str) -> re.Pattern:
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1 :]:
+            end = pattern.index("]", i + 1)
+            body = pattern[i + 1 : end]
+            # Only a leading "!" negates the class; anything else in it is literal.
+            negate = body.startswith("!")
+            if negate:
+                body = body[1:]
+            body = body.replace("\\", "\\\\").replace("^", "\\^").replace("[", "\\[")
+            out.append("[" + ("^" if negate else "") + body + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out))
+
+
+def _ignored(path: str, is_dir: bool, gitignores: list[GitIgnore]) -> bool:
+    ignored = False
+    # Deeper .gitignore files come later and override shallower ones.
+    for gitignore in gitignores:
+        result = gitignore.match(path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def iter_files(
+    search_path: str, file_types: list[str], use_gitignore: bool = True
+) -> Iterator[tuple[str, os.stat_result]]:
+    """
+    Yields ``(path, stat)`` for every file to include, depth-first with entries sorted
+    by name, which is the order of ``sorted(Path(search_path).rglob("*"))``. Ignored
+    directories are never entered.
+    """
+    if any(part in DEFAULT_IGNORE_DIRS for part in pathlib.Path(search_path).parts):
+        return
+    gitignores = _enclosing_gitignores(search_path) if use_gitignore else []
+    if gitignores is None:
+        return
+    yield from _walk(search_path, file_types, gitignores, use_gitignore)
+
+
+def _enclosing_gitignores(search_path: str) -> Optional[list[GitIgnore]]:
+    """
+    The .gitignore files above ``search_path``, from the top of its git work tree down,
+    or None when they exclude ``search_path`` itself. Outside a work tree there are none.
+    """
+    target = os.path.abspath(search_path)
+    top = target
+    while not os.path.exists(os.path.join(top, ".git")):
+        parent = os.path.dirname(top)
+        if parent == top:
+            return []
+        top = parent
+    gitignores: list[GitIgnore] = []
+    directory = top
+    for part in pathlib.Path(target).relative_to(top).parts:
+        own = GitIgnore.from_dir(directory)
+        if own is not None:
+            gitignores.append(own)
+        directory = os.path.join(directory, part)
+        if _ignored(directory, True, gitignores):
+            return None
+    return gitignores
+
+
+def _walk(
+    directory: str,
+    file_types: list[str],
+    gitignores: list[GitIgnore],
+    use_gitignore: bool,
+) -> Iterator[tuple[str, os.stat_result]]:
+    if use_gitignore:
+        own = GitIgnore.from_dir(directory)
+        if own is not None:
+            gitignores = [*gitignores, own]
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError as e:
+        print(f"  ✗ Could not list {directory}: {e}")
+        return
+    for entry in entries:
+        path = entry.name if directory == "." else entry.path
+        if entry.name in DEFAULT_IGNORE_DIRS:
+            continue
+        try:
+            # Symlinked directories are not followed, as with rglob.
+            if entry.is_dir(follow_symlinks=False):
+                if not _ignored(path, True, gitignores):
+                    yield from _walk(path, file_types, gitignores, use_gitignore)
+                continue
+            if not entry.is_file() or entry.name in DEFAULT_IGNORE_FILES:
+                continue
+            if file_types and os.path.splitext(entry.name)[1] not in file_types:
+                continue
+            if _ignored(path, False, gitignores):
+                continue
+            st = entry.stat()
+        except OSError as e:
+            print(f"  ✗ Could not stat {path}: {e}")
+            continue
+        yield path, st
+
+
+def read_file(path: str, size: int, max_bytes: int) -> tuple[Optional[str], str]:
+    """
+    Returns ``(block, "")`` with the file wrapped in its START/END markers, or
+    ``(None, reason)`` when it is skipped.
+    """
+    if max_bytes and size > max_bytes:
+        return None, f"larger than {max_bytes} bytes"
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return None, f"Could not read file {path}: {e}"
+    if b"\0" in data[:BINARY_SNIFF_BYTES]:
+        return None, "binary"
+    try:
+        # Same newline handling as reading in text mode.
+        content = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    except UnicodeDecodeError as e:
+        return None, f"Could not read file {path}: {e}"
+    header = f"\n--- START OF FILE: {path} ---\n"
+    footer = f"\n--- END OF FILE: {path} ---\n"
+    return header + content + footer, ""
+
+
+def estimate_tokens(text: str) -> int:
+    # The same ~4 characters per token rule of thumb as boot_python.tokens.
+    return (len(text) + 3) // 4
+
+
+def _ordered(
+    pool: ThreadPoolExecutor, fn: Callable, items: Iterable[tuple], window: int
+) -> Iterator[tuple[tuple, object]]:
+    """Yields ``(item, fn(*item))`` in input order, with at most ``window`` calls in flight."""
+    pending: collections.deque[tuple[tuple, Future]] = collections.deque()
+    for item in items:
+        pending.append((item, pool.submit(fn, *item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+class Layout:
+    """Where the output, chunk, index and cache files of one output name live."""
+
+    def __init__(self, output_file: str, chunked: bool):
+        self.output = os.path.abspath(output_file)
+        self.chunked = chunked
+        root, self.suffix = os.path.splitext(self.output)
+        self.root = root
+        self.index = f"{root}.index.json"
+        self.cache = f"{self.output}.cache"
+        self.manifest = os.path.join(self.cache, "manifest.json")
+        self.segments = os.path.join(self.cache, "segments")
+        self._chunk_name = re.compile(re.escape(os.path.basename(root)) + r"\.\d{3,}" + re.escape(self.suffix))
+
+    def chunk(self, n: int) -> str:
+        return f"{self.root}.{n + 1:03d}{self.suffix}" if self.chunked else self.output
+
+    def owns(self, path: str) -> bool:
+        """Whether ``path`` is one of our own outputs, which must never be concatenated."""
+        path = os.path.abspath(path)
+        if path in (self.output, self.index) or path.startswith(self.cache + os.sep):
+            return True
+        return os.path.dirname(path) == os.path.dirname(self.output) and bool(
+            self._chunk_name.fullmatch(os.path.basename(path))
+        )
+
+
+class Packer:
+    """Assigns blocks, in order, to chunks that stay within a byte and/or token budget."""
+
+    def __init__(self, max_bytes: int = 0, max_tokens: int = 0):
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.chunks: list[dict] = []
+
+    def place(self, path: str, nbytes: int, tokens: int) -> int:
+        chunk = self.chunks[-1] if self.chunks else None
+        if chunk is not None and chunk["paths"]:
+            # Blocks are joined with a newline, which counts against the budget too.
+            over_bytes = self.max_bytes and chunk["bytes"] + 1 + nbytes > self.max_bytes
+            over_tokens = self.max_tokens and chunk["tokens"] + tokens > self.max_tokens
+            if over_bytes or over_tokens:
+                chunk = None
+        if chunk is None:
+            chunk = {"paths": [], "bytes": 0, "tokens": 0}
+            self.chunks.append(chunk)
+        if chunk["paths"]:
+            chunk["bytes"] += 1
+        chunk["paths"].append(path)
+        chunk["bytes"] += nbytes
+        chunk["tokens"] += tokens
+        return len(self.chunks) - 1
+
+
+def _write_index(layout: Layout, packer: Packer, previous: list[str]) -> None:
+    chunks = [
+        {"file": os.path.basename(layout.chunk(n)), **chunk} for n, chunk in enumerate(packer.chunks)
+    ]
+    files = {path: c["file"] for c in chunks for path in c["paths"]}
+    _write_json(layout.index, {"chunks": chunks, "files": files})
+    current = {layout.chunk(n) for n in range(len(chunks))}
+    for stale in previous:
+        if stale not in current and os.path.exists(stale):
+            os.remove(stale)
+
+
+def _previous_chunks(layout: Layout) -> list[str]:
+    index = _read_json(layout.index) or {}
+    out_dir = os.path.dirname(layout.output)
+    paths = [os.path.join(out_dir, c["file"]) for c in index.get("chunks", [])]
+    # Only ever delete files named like our own chunks.
+    return [path for path in paths if layout.owns(path)]
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _report_skip(path: str, reason: str) -> None:
+    if reason.startswith("Could not read"):
+        print(f"  ✗ {reason}")
+    else:
+        print(f"  - Skipped {path}: {reason}")
+
+
+def _concatenate_streaming(
+    files: Iterable[tuple],
+    layout: Layout,
+    packer: Packer,
+    pool: ThreadPoolExecutor,
+    window: int,
+    max_bytes: int,
+) -> tuple[int, int]:
+    previous = _previous_chunks(layout) if layout.chunked else []
+    written = skipped = 0
+    out = None
+    current = -1
+    try:
+        jobs = ((path, st.st_size, max_bytes) for path, st in files)
+        for (path, _, _), (block, reason) in _ordered(pool, read_file, jobs, window):
+            if block is None:
+                skipped += 1
+                _report_skip(path, reason)
+                continue
+            n = packer.place(path, len(block.encode("utf-8")), estimate_tokens(block))
+            if n != current:
+                if out is not None:
+                    out.close()
+                out = open(layout.chunk(n), "w", encoding="utf-8")
+                current = n
+            elif written:
+                out.write("\n")
+            out.write(block)
+            written += 1
+            print(f"  ✓ Added: {path}")
+        if out is None:
+            # Nothing matched; still leave an (empty) output behind, as before.
+            open(layout.chunk(0), "w", encoding="utf-8").close()
+    finally:
+        if out is not None:
+            out.close()
+    if layout.chunked:
+        _write_index(layout, packer, previous)
+    return written, skipped
+
+
+def cache_segment(path: str, st: os.stat_result, max_bytes: int, segments: str) -> dict:
+    """
+    Reads ``path`` into its START/END block and stores that under its digest in
+    ``segments``. Returns the manifest entry, which records why the file was skipped
+    instead when it was.
+    """
+    entry: dict = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    block, reason = read_file(path, st.st_size, max_bytes)
+    if block is None:
+        entry["skipped"] = reason
+        return entry
+    data = block.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    segment = os.path.join(segments, digest)
+    if not os.path.exists(segment):
+        tmp = f"{segment}.{os.getpid()}.{id(data)}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, segment)
+    entry.update(digest=digest, bytes=len(data), tokens=estimate_tokens(block))
+    return entry
+
+
+def _concatenate_incremental(
+    files: Iterable[tuple],
+    layout: Layout,
+    packer: Packer,
+    pool: ThreadPoolExecutor,
+    window: int,
+    max_bytes: int,
+) -> tuple[int, int]:
+    os.makedirs(layout.segments, exist_ok=True)
+    manifest = _read_json(layout.manifest) or {}
+    options = {"version": MANIFEST_VERSION, "max_bytes": max_bytes}
+    old_files = manifest.get("files", {}) if manifest.get("options") == options else {}
+    previous = _previous_chunks(layout) if layout.chunked else []
+
+    def entry_for(path: str, st: os.stat_result) -> dict:
+        old = old_files.get(path)
+        if (
+            old is not None
+            and old["size"] == st.st_size
+            and old["mtime_ns"] == st.st_mtime_ns
+            and ("skipped" in old or os.path.exists(os.path.join(layout.segments, old["digest"])))
+        ):
+            return old
+        return cache_segment(path, st, max_bytes, layout.segments)
+
+    # First pass: only metadata is kept, so memory stays flat however big the tree is.
+    new_files: dict[str, dict] = {}
+    written = skipped = reread = 0
+    for (path, _), entry in _ordered(pool, entry_for, files, window):
+        if entry is not old_files.get(path):
+            reread += 1
+        if "skipped" in entry:
+            skipped += 1
+            _report_skip(path, entry["skipped"])
+            if entry["skipped"].startswith("Could not read"):
+                continue  # Try again next time.
+        else:
+            packer.place(path, entry["bytes"], entry["tokens"])
+            written += 1
+        new_files[path] = entry
+
+    # Second pass: rewrite only the chunks whose segments changed.
+    old_chunks = {c["file"]: c["digest"] for c in manifest.get("chunks", [])}
+    chunks = []
+    rewritten = 0
+    for n, chunk in enumerate(packer.chunks or [{"paths": []}]):
+        target = layout.chunk(n)
+        digests = [new_files[path]["digest"] for path in chunk["paths"]]
+        digest = hashlib.sha256("\n".join(digests).encode()).hexdigest()
+        chunks.append({"file": os.path.basename(target), "digest": digest})
+        if old_chunks.get(os.path.basename(target)) == digest and os.path.exists(target):
+            continue
+        tmp = f"{target}.tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            for i, segment in enumerate(digests):
+                if i:
+                    out.write("\n")
+                with open(os.path.join(layout.segments, segment), encoding="utf-8") as f:
+                    out.write(f.read())
+        os.replace(tmp, target)
+        rewritten += 1
+    live = {e["digest"] for e in new_files.values() if "digest" in e}
+    for name in os.listdir(layout.segments):
+        if name not in live:
+            os.remove(os.path.join(layout.segments, name))
+    _write_json(layout.manifest, {"options": options, "files": new_files, "chunks": chunks})
+    if layout.chunked:
+        _write_index(layout, packer, previous)
+    print(f"  Re-read {reread} changed files; rewrote {rewritten} of {len(chunks)} output files")
+    return written, skipped
+
 
 def concatenate_files(
-    folders_to_search: list[str], file_types: list[str], output_file: str
+    folders_to_search: list[str],
+    file_types: list[str],
+    output_file: str,
+    *,
+    jobs: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    use_gitignore: bool = True,
+    incremental: bool = False,
+    chunk_bytes: int = 0,
+    chunk_tokens: int = 0,
 ):
     """
     Finds and concatenates the content of specified files into a single output file.
@@ -55,49 +532,36 @@ def concatenate_files(
         file_types (list[str]): A list of file extensions to include (e.g., ['.rs', '.toml']).
                                 If empty, includes all files.
         output_file (str): The name of the file to write the concatenated content to.
+        jobs (int | None): Threads reading files (default: the thread pool's default).
+        max_bytes (int): Skip files larger than this; 0 includes files of any size.
+        use_gitignore (bool): Also skip whatever .gitignore files exclude.
+        incremental (bool): Reuse the cached segments of files that have not changed.
+        chunk_bytes (int): Split the output into chunks of at most this many bytes.
+        chunk_tokens (int): Split the output into chunks of at most this many (estimated) tokens.
     """
-    root_path = pathlib.Path(".")
-    all_content = []
-
-    search_paths = (
-        [pathlib.Path(p) for p in folders_to_search]
-        if folders_to_search
-        else [root_path]
-    )
+    search_paths = [str(pathlib.Path(p)) for p in folders_to_search] or ["."]
 
     print("Starting file concatenation...")
-    print(f"Searching in: {', '.join(map(str, search_paths)) or 'current directory'}")
+    print(f"Searching in: {', '.join(search_paths) or 'current directory'}")
     print(f"Looking for file types: {', '.join(file_types) or 'all'}")
 
-    for search_path in search_paths:
-        for path in sorted(search_path.rglob("*")):  # rglob searches recursively
-            if path.is_file():
-                # --- Filtering Logic ---
-                if (
-                    any(d in path.parts for d in DEFAULT_IGNORE_DIRS)
-                    or path.name in DEFAULT_IGNORE_FILES
-                ):
-                    continue
-
-                if file_types and path.suffix not in file_types:
-                    continue
-
-                # --- File Processing ---
-                try:
-                    with open(path, encoding="utf-8") as f:
-                        content = f.read()
-                    header = f"\n--- START OF FILE: {path} ---\n"
-                    footer = f"\n--- END OF FILE: {path} ---\n"
-                    all_content.append(header + content + footer)
-                    print(f"  ✓ Added: {path}")
-                except Exception as e:
-                    print(f"  ✗ Could not read file {path}: {e}")
-
-    # --- Write Output File ---
+    layout = Layout(output_file, chunked=bool(chunk_bytes or chunk_tokens))
+    packer = Packer(chunk_bytes, chunk_tokens)
+    files = (
+        (path, st)
+        for search_path in search_paths
+        for path, st in iter_files(search_path, file_types, use_gitignore)
+        if not layout.owns(path)
+    )
+    concatenate = _concatenate_incremental if incremental else _concatenate_streaming
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write("\n".join(all_content))
-        print(f"\n✅ Successfully concatenated all code into '{output_file}'")
+        os.makedirs(os.path.dirname(layout.output), exist_ok=True)
+        # ThreadPoolExecutor's own default, worked out here so the read-ahead window can use it.
+        workers = jobs or min(32, (os.cpu_count() or 1) + 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            written, skipped = concatenate(files, layout, packer, pool, READ_AHEAD_PER_JOB * workers, max_bytes)
+        target = f"{len(packer.chunks)} chunks of '{output_file}'" if layout.chunked else f"'{output_file}'"
+        print(f"\n✅ Successfully concatenated {written} files into {target} ({skipped} skipped)")
     except Exception as e:
         print(f"\n❌ Failed to write output file: {e}")
 
@@ -123,10 +587,54 @@ if __name__ == "__main__":
         default="all_code_boot_python.txt",
         help="The name of the output file.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of threads reading files in parallel.",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help="Skip files larger than this many bytes (0 for no limit).",
+    )
+    parser.add_argument(
+        "--no-gitignore",
+        action="store_true",
+        help="Include files that .gitignore excludes.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Keep a manifest and per-file cache next to the output; only re-read changed files.",
+    )
+    parser.add_argument(
+        "--chunk-bytes",
+        type=int,
+        default=0,
+        help="Split the output into numbered chunk files of at most this many bytes.",
+    )
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=0,
+        help="Split the output into numbered chunk files of at most this many estimated tokens.",
+    )
 
     args = parser.parse_args()
 
     # Ensure file types have a leading dot if they don't already
     sanitized_types = [f".{t.lstrip('.')}" for t in args.types if t]
 
-    concatenate_files(args.folders, sanitized_types, args.output)
+    concatenate_files(
+        args.folders,
+        sanitized_types,
+        args.output,
+        jobs=args.jobs,
+        max_bytes=args.max_bytes,
+        use_gitignore=not args.no_gitignore,
+        incremental=args.incremental,
+        chunk_bytes=args.chunk_bytes,
+        chunk_tokens=args.chunk_tokens,
+    )
@@ -0,0 +1,14 @@
+from boot_python.bench import make_specs, run_bench
+
+
+def test_make_specs_mixes():
+    assert len(set(make_specs("same", 10, 256))) == 1
+    assert len(set(make_specs("unique", 10, 256))) == 10
+    assert all(len(s) >= 256 for s in make_specs("mixed", 4, 256))
+
+
+def test_bench_against_real_server():
+    report = run_bench(requests=40, concurrency=2, warmup=2)
+    assert report["completed"] == 40 and report["errors"] == 0
+    assert report["rps"] > 0
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
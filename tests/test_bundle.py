@@ -0,0 +1,132 @@
+import hashlib
+import os
+import sys
+import sysconfig
+
+import pytest
+
+import boot_python.bundle as bundle_module
+from boot_python.bundle import (
+    BUNDLE_NAME,
+    BundleError,
+    build_bundle,
+    is_fresh,
+    is_installed,
+    pack,
+    read_bundle,
+    scan_prompt_files,
+    unpack,
+)
+from boot_python.prompt_store import PromptStore
+
+
+def test_pack_roundtrip_dedupes_identical_payloads():
+    files = {"a.txt": "same text", "b.txt": "same text", "c.template": "# {{ spec.project.name }} ✓"}
+    data = pack(files)
+    texts, digests = unpack(data)
+    assert texts == files
+    assert digests["c.template"] == hashlib.sha256(files["c.template"].encode()).hexdigest()
+    assert data.count(b"same text") == 1
+    with pytest.raises(BundleError):
+        unpack(b"nope")
+    with pytest.raises(BundleError):
+        unpack(data[:20])
+
+
+@pytest.fixture
+def prompts_pkg(tmp_path, monkeypatch):
+    pkg = tmp_path / "bundled_prompts"
+    pkg.mkdir()
+    (pkg / "base_instructions.txt").write_text("base v1", encoding="utf-8")
+    (pkg / "README.md.template").write_text("# {{ spec.project.name }}", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield pkg
+    sys.modules.pop("bundled_prompts", None)
+
+
+def _fake_bundle(pkg):
+    """A bundle whose text differs from the files, so the test can tell which one was used."""
+    texts = {"base_instructions.txt": "from bundle", "README.md.template": "# {{ spec.project.name }}"}
+    (pkg / BUNDLE_NAME).write_bytes(pack(texts, scan_prompt_files(pkg)))
+
+
+def _base():
+    return PromptStore("bundled_prompts").snapshot.components["base_instructions.txt"]
+
+
+def test_store_prefers_fresh_bundle_and_falls_back_when_stale(prompts_pkg):
+    bundle = build_bundle(prompts_pkg)
+    assert bundle == prompts_pkg / BUNDLE_NAME
+    assert read_bundle(bundle)[0]["base_instructions.txt"] == "base v1"
+
+    _fake_bundle(prompts_pkg)
+    snap = PromptStore("bundled_prompts").snapshot
+    assert snap.components["base_instructions.txt"] == "from bundle"
+    assert "README.md.template" in snap.templates
+
+    # An edit in place leaves the directory alone but changes the file's stat.
+    fp = prompts_pkg / "base_instructions.txt"
+    st = os.stat(fp)
+    fp.write_text("base v2!", encoding="utf-8")
+    os.utime(fp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert _base() == "base v2!"  # same mtime, different size
+
+    _fake_bundle(prompts_pkg)
+    fp.write_text("base v3!", encoding="utf-8")
+    os.utime(fp, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert _base() == "base v3!"  # same size, different mtime
+
+    # A file the bundle does not know about wins too, and so does one that is gone.
+    _fake_bundle(prompts_pkg)
+    (prompts_pkg / "extra.txt").write_text("extra", encoding="utf-8")
+    assert "extra.txt" in PromptStore("bundled_prompts").snapshot.components
+    _fake_bundle(prompts_pkg)
+    (prompts_pkg / "extra.txt").unlink()
+    assert "extra.txt" not in PromptStore("bundled_prompts").snapshot.components
+
+
+def test_installed_bundle_survives_new_mtimes_and_skips_stats(prompts_pkg, monkeypatch):
+    _fake_bundle(prompts_pkg)
+    # Installers write every file anew, so none keeps the mtime recorded at build time.
+    for path in prompts_pkg.iterdir():
+        os.utime(path, ns=(0, 1_000_000_000))
+    assert _base() == "base v1"
+
+    monkeypatch.setattr(sysconfig, "get_paths", lambda: {"purelib": str(prompts_pkg.parent), "platlib": "/nowhere"})
+    assert is_installed(prompts_pkg)
+
+    scan = bundle_module.scan_prompt_files
+
+    def scan_names_only(root, stat=True):
+        assert not stat, "an installed bundle must not stat the prompt files"
+        return scan(root, stat)
+
+    monkeypatch.setattr(bundle_module, "scan_prompt_files", scan_names_only)
+    assert _base() == "from bundle"
+    (prompts_pkg / "extra.txt").write_text("extra", encoding="utf-8")
+    assert "extra.txt" in PromptStore("bundled_prompts").snapshot.components
+
+
+def test_reload_reads_the_files_not_the_bundle(prompts_pkg):
+    _fake_bundle(prompts_pkg)
+    store = PromptStore("bundled_prompts")
+    assert store.snapshot.components["base_instructions.txt"] == "from bundle"
+    store.reload()
+    assert store.snapshot.components["base_instructions.txt"] == "base v1"
+
+
+def test_bundle_from_another_version_is_ignored(prompts_pkg):
+    bundle = build_bundle(prompts_pkg)
+    bundle.write_bytes(b"BPB2" + bundle.read_bytes()[4:])
+    assert not is_fresh(bundle, prompts_pkg)
+    assert _base() == "base v1"
+
+
+def test_bundle_carries_overlay_packs(prompts_pkg):
+    pack_dir = prompts_pkg / "overlays" / "type" / "cli"
+    pack_dir.mkdir(parents=True)
+    (pack_dir / "base_instructions.txt").write_text("cli only", encoding="utf-8")
+    texts, _ = read_bundle(build_bundle(prompts_pkg))
+    assert texts["overlays/type/cli/base_instructions.txt"] == "cli only"
+    snap = PromptStore("bundled_prompts").snapshot
+    assert snap.select("python", "cli").components["base_instructions.txt"] == "base v1\n\ncli only"
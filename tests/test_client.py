@@ -0,0 +1,115 @@
+import asyncio
+from concurrent import futures
+
+import grpc
+import pytest
+
+from boot_python.client import (
+    AsyncPluginClient,
+    PluginClient,
+    _batches,
+    get_prompt_components_batch,
+    parse_handshake,
+)
+from boot_python.server import BootPluginServicer, add_BootPluginServicer_to_server
+
+
+@pytest.fixture
+def target():
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    add_BootPluginServicer_to_server(BootPluginServicer(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    yield f"127.0.0.1:{port}"
+    server.stop(None)
+
+
+@pytest.fixture
+def channel(target):
+    with grpc.insecure_channel(target) as ch:
+        yield ch
+
+
+def test_batch_helper_returns_one_result_per_spec(channel):
+    specs = [f'[project]\nname = "p{i % 40}"\n' for i in range(100)] + ["not: toml", ""]
+    resp = get_prompt_components_batch(channel, specs, max_batch_size=30)
+
+    assert len(resp.results) == len(specs)
+    assert "p7" in resp.results[7].user_spec_prompt
+    assert resp.results[100].error and "(unavailable)" in resp.results[100].user_spec_prompt
+    assert not resp.results[101].error
+    assert "base_instructions.txt" in resp.components
+    assert set(resp.digests) == set(resp.components)
+
+
+def test_batches_are_cut_by_count_and_by_bytes(channel):
+    assert _batches([], 500, 100) == [[]]
+    assert _batches(["a" * 40] * 5, 2, 100) == [["a" * 40] * 2] * 2 + [["a" * 40]]
+    assert _batches(["a" * 40, "b" * 70, "c" * 200, "d"], 500, 100) == [["a" * 40], ["b" * 70], ["c" * 200], ["d"]]
+
+    # 300 specs of ~20 KiB exceed 4 MiB together; the byte limit keeps each request under it.
+    specs = [f'[project]\nname = "p{i}"\ndescription = "{"x" * 20_000}"\n' for i in range(300)]
+    resp = get_prompt_components_batch(channel, specs)
+    assert len(resp.results) == len(specs) and "p299" in resp.results[299].user_spec_prompt
+
+
+def test_parse_handshake():
+    hs = parse_handshake("1|1|tcp|127.0.0.1:50051|grpc\n")
+    assert hs.target == "127.0.0.1:50051"
+    assert parse_handshake("1|1|unix|/run/bp.sock|grpc").target == "unix:/run/bp.sock"
+    with pytest.raises(ValueError):
+        parse_handshake("")
+    with pytest.raises(ValueError):
+        parse_handshake("1|1|tcp|127.0.0.1:1|netrpc")
+
+
+def test_client_caches_components_and_shares_the_channel(target):
+    spec = '[project]\nname = "p"\nlanguage = "python"\ntype = "cli"\n'
+    with PluginClient.attach(f"1|1|tcp|{target}|grpc") as client, PluginClient.attach(target) as other:
+        assert client.channel is other.channel
+
+        first = client.get_prompt_components(spec)
+        second = client.get_prompt_components(spec)
+        assert (client.cache.misses, client.cache.hits) == (1, 1)
+        assert dict(second.components) == dict(first.components)
+        assert second.set_digest == first.set_digest and not second.not_modified
+        assert "base_instructions.txt" in second.components
+
+        # A spec selecting other overlays only transfers the components that differ.
+        web = client.get_prompt_components('[project]\nname = "w"\ntype = "fastapi_web_service"\n')
+        assert web.set_digest != first.set_digest
+        assert web.components["base_instructions.txt"] == first.components["base_instructions.txt"]
+        assert client.cache.hits == 2
+
+
+def test_async_client_round_trip(target):
+
+    async def scenario():
+        async with AsyncPluginClient.attach(target) as client:
+            first = await client.get_prompt_components('[project]\nname = "a"\n')
+            second = await client.get_prompt_components('[project]\nname = "b"\n')
+            batch = await client.get_prompt_components_batch(["", "x = 1"], max_batch_size=1)
+            return first, second, batch, client.cache.hits
+
+    first, second, batch, hits = asyncio.run(scenario())
+    assert dict(second.components) == dict(first.components)
+    assert "b" in second.user_spec_prompt
+    assert hits == 1
+    assert len(batch.results) == 2 and batch.components
+
+
+def test_spawned_plugin_is_stopped_on_close():
+    client = PluginClient.spawn(["--wait-ready"])
+    try:
+        assert client.get_prompt_components().components
+    finally:
+        client.close()
+    assert client.process.poll() is not None
+
+
+def test_client_assembles_prompts(target):
+    with PluginClient.attach(target) as client:
+        response = client.assemble_prompt('[project]\nname = "p"\n', max_tokens=400)
+    assert response.segments[-1].name == "user_spec_prompt"
+    assert response.prompt.encode("utf-8")[response.prefix_length :].startswith(b"User requests")
+    assert response.estimated_tokens <= 400 and response.trimmed
@@ -0,0 +1,181 @@
+import importlib.util
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "concat_files.py"
+_spec = importlib.util.spec_from_file_location("concat_files", SCRIPT)
+concat_files = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(concat_files)
+
+
+def _write(root: Path, files: dict) -> None:
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, bytes):
+            path.write_bytes(content)
+        else:
+            path.write_text(content, encoding="utf-8")
+
+
+def _paths(search_path=".", file_types=(), use_gitignore=True):
+    return [path for path, _ in concat_files.iter_files(search_path, list(file_types), use_gitignore)]
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_walk_order_matches_sorted_rglob(tree):
+    _write(tree, {"a/x.py": "x", "a-b.py": "b", "a-b/c.py": "c", "a.txt": "t", "z/e.py": "e", "B.py": "B"})
+    expected = [str(p.relative_to(tree)) for p in sorted(tree.rglob("*")) if p.is_file()]
+    assert _paths() == expected
+    assert _paths(file_types=[".py"]) == [p for p in expected if p.endswith(".py")]
+
+
+def test_ignored_directories_are_never_entered(tree, monkeypatch):
+    _write(tree, {"keep/a.py": "a", "__pycache__/x.pyc": "x", "out/big.py": "b", ".gitignore": "out/\n"})
+    listed = []
+    scandir = os.scandir
+
+    def recording_scandir(path="."):
+        listed.append(os.path.normpath(path))
+        return scandir(path)
+
+    monkeypatch.setattr(concat_files.os, "scandir", recording_scandir)
+    assert _paths() == [".gitignore", os.path.join("keep", "a.py")]
+    assert sorted(listed) == [".", "keep"]
+
+
+def test_gitignore_negation_directory_only_and_anchored_rules(tree):
+    _write(
+        tree,
+        {
+            ".gitignore": "*.log\n!keep.log\nbuild/\n/root_only.py\n",
+            "a.log": "",
+            "keep.log": "",
+            "sub/b.log": "",
+            "sub/keep.log": "",
+            "build/x.py": "",
+            "sub/build": "a file, not a directory",
+            "root_only.py": "",
+            "sub/root_only.py": "",
+            "sub/.gitignore": "!b.log\n",
+        },
+    )
+    assert _paths() == [
+        ".gitignore",
+        "keep.log",
+        os.path.join("sub", ".gitignore"),
+        os.path.join("sub", "b.log"),
+        os.path.join("sub", "build"),
+        os.path.join("sub", "keep.log"),
+        os.path.join("sub", "root_only.py"),
+    ]
+    assert len(_paths(use_gitignore=False)) == 10
+
+
+def test_bracket_classes_only_negate_on_a_leading_bang(tree):
+    rules = concat_files.GitIgnore(str(tree), ["[a!b].txt\n", "[!x]y.txt\n"])
+    assert rules.match(str(tree / "!.txt"), False)
+    assert rules.match(str(tree / "a.txt"), False)
+    assert rules.match(str(tree / "^.txt"), False) is None
+    assert rules.match(str(tree / "zy.txt"), False)
+    assert rules.match(str(tree / "xy.txt"), False) is None
+
+
+def test_gitignores_above_a_folders_root_apply(tree):
+    _write(tree, {".git/HEAD": "", ".gitignore": "*.gen.py\nsrc/vendor/\n", "src/a.py": "", "src/b.gen.py": ""})
+    _write(tree, {"src/vendor/v.py": ""})
+    assert _paths("src") == [os.path.join("src", "a.py")]
+    assert _paths(os.path.join("src", "vendor")) == []
+    assert len(_paths("src", use_gitignore=False)) == 3
+
+
+def test_binary_and_oversized_files_are_skipped(tree, capsys):
+    _write(tree, {"a.py": "a\r\nb\n", "bin.dat": b"PK\x00\x01", "big.txt": "x" * 2000})
+    concat_files.concatenate_files([], [], "out.txt", max_bytes=1000, jobs=2)
+    out = (tree / "out.txt").read_text(encoding="utf-8")
+    assert out == "\n--- START OF FILE: a.py ---\na\nb\n\n--- END OF FILE: a.py ---\n"
+    printed = capsys.readouterr().out
+    assert "Skipped bin.dat: binary" in printed
+    assert "Skipped big.txt: larger than 1000 bytes" in printed
+
+
+def test_output_does_not_depend_on_the_number_of_readers(tree):
+    _write(tree, {f"d{i % 7}/f{i:03d}.py": f"{i}\n" * i for i in range(60)})
+    concat_files.concatenate_files([], [".py"], "one.txt", jobs=1)
+    concat_files.concatenate_files([], [".py"], "many.txt", jobs=8)
+    one = (tree / "one.txt").read_text(encoding="utf-8")
+    assert one == (tree / "many.txt").read_text(encoding="utf-8")
+    assert one.index("d0/f000.py") < one.index("d0/f007.py") < one.index("d1/f001.py")
+
+
+def _touch(path: Path, delta_ns: int) -> None:
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + delta_ns))
+
+
+def test_incremental_reuses_unchanged_files_and_rereads_edited_ones(tree, monkeypatch):
+    _write(tree, {"src/a.py": "a\n", "src/b.py": "b\n", "src/c.py": "c\n"})
+    read = []
+    read_file = concat_files.read_file
+
+    def recording_read_file(path, size, max_bytes):
+        read.append(path)
+        return read_file(path, size, max_bytes)
+
+    monkeypatch.setattr(concat_files, "read_file", recording_read_file)
+    concat_files.concatenate_files(["src"], [], "out.txt", incremental=True)
+    assert len(read) == 3
+    first = (tree / "out.txt").read_text(encoding="utf-8")
+
+    read.clear()
+    concat_files.concatenate_files(["src"], [], "out.txt", incremental=True)
+    assert read == []
+    assert (tree / "out.txt").read_text(encoding="utf-8") == first
+
+    (tree / "src/b.py").write_text("b, edited\n", encoding="utf-8")
+    _touch(tree / "src/b.py", 1_000_000)
+    concat_files.concatenate_files(["src"], [], "out.txt", incremental=True)
+    assert read == [os.path.join("src", "b.py")]
+    concat_files.concatenate_files(["src"], [], "full.txt")
+    assert (tree / "out.txt").read_text(encoding="utf-8") == (tree / "full.txt").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_chunks_stay_within_the_budget(tree, incremental):
+    _write(tree, {f"src/f{i:02d}.py": "x" * (17 * i) + "\n" for i in range(30)})
+    concat_files.concatenate_files(["src"], [], "out/all.txt", chunk_bytes=400, incremental=incremental)
+    index = json.loads((tree / "out/all.index.json").read_text(encoding="utf-8"))
+    seen = []
+    for chunk in index["chunks"]:
+        data = (tree / "out" / chunk["file"]).read_bytes()
+        assert chunk["bytes"] == len(data)
+        # Only a single file that is larger than the budget by itself may exceed it.
+        assert len(data) <= 400 or len(chunk["paths"]) == 1
+        for path in chunk["paths"]:
+            assert f"--- START OF FILE: {path} ---".encode() in data
+            assert index["files"][path] == chunk["file"]
+        seen += chunk["paths"]
+    assert seen == sorted(index["files"]) == [os.path.join("src", f"f{i:02d}.py") for i in range(30)]
+    assert any(len(c["paths"]) > 1 for c in index["chunks"])
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_stale_chunks_from_a_longer_run_are_removed(tree, incremental):
+    _write(tree, {f"src/f{i}.py": "x" * 100 for i in range(6)})
+    (tree / "all.999.txt").write_text("not ours to delete", encoding="utf-8")
+    concat_files.concatenate_files(["src"], [], "all.txt", chunk_tokens=40, incremental=incremental)
+    assert sorted(p.name for p in tree.glob("all.0*.txt")) == [f"all.00{i}.txt" for i in range(1, 7)]
+
+    concat_files.concatenate_files(["src"], [], "all.txt", chunk_tokens=200, incremental=incremental)
+    index = json.loads((tree / "all.index.json").read_text(encoding="utf-8"))
+    assert len(index["chunks"]) == 2
+    assert sorted(p.name for p in tree.glob("all.0*.txt")) == [c["file"] for c in index["chunks"]]
+    assert (tree / "all.999.txt").exists()
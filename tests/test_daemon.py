@@ -0,0 +1,77 @@
+import os
+import signal
+import time
+
+import grpc
+import pytest
+
+from boot_python import daemon
+from boot_python.generated import plugin_pb2, plugin_pb2_grpc
+from boot_python.health import SERVING, health_pb2, health_pb2_grpc
+
+
+def test_daemon_is_started_once_and_reused(tmp_path, monkeypatch):
+    monkeypatch.setenv(daemon.RUNTIME_DIR_ENV, str(tmp_path))
+    args = daemon.daemon_server_args(False, 1024, idle_timeout=30)
+    path = daemon.ensure_daemon(args)
+    lock = daemon.lock_path(daemon.config_key(args))
+    pid = int(lock.read_text())
+    try:
+        assert daemon.ensure_daemon(args) == path  # second call attaches, no new process
+        assert int(lock.read_text()) == pid
+
+        with grpc.insecure_channel(f"unix:{path}") as channel:
+            stub = plugin_pb2_grpc.BootCodePluginStub(channel)
+            resp = stub.GetPromptComponents(plugin_pb2.GetPromptComponentsRequest())
+        assert "base_instructions.txt" in resp.components
+
+        # SERVING is only reported once the daemon's own warmup RPC went through the socket.
+        with grpc.insecure_channel(f"unix:{path}") as channel:
+            watch = health_pb2_grpc.HealthStub(channel).Watch(health_pb2.HealthCheckRequest(), timeout=10)
+            assert any(update.status == SERVING for update in watch)
+    finally:
+        os.kill(pid, signal.SIGTERM)
+    _wait_until_gone(path)
+
+
+def _wait_until_gone(path, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not path.exists()
+
+
+def test_idle_daemon_stays_up_while_a_session_is_attached(tmp_path, monkeypatch):
+    monkeypatch.setenv(daemon.RUNTIME_DIR_ENV, str(tmp_path))
+    args = daemon.daemon_server_args(False, 1024, idle_timeout=0.5)
+    session = daemon.join_session(daemon.config_key(args))
+    path = daemon.ensure_daemon(args)
+    try:
+        time.sleep(2.0)  # four idle timeouts without a single RPC
+        assert daemon.daemon_alive(path)
+    finally:
+        os.close(session)
+    _wait_until_gone(path)
+
+
+def test_daemon_with_other_settings_is_not_reused(tmp_path, monkeypatch):
+    monkeypatch.setenv(daemon.RUNTIME_DIR_ENV, str(tmp_path))
+    default = daemon.ensure_daemon(daemon.daemon_server_args(False, 1024, idle_timeout=30))
+    small = daemon.ensure_daemon(daemon.daemon_server_args(False, 10, idle_timeout=30))
+    try:
+        assert small != default
+        spec = '[project]\nname = "demo"\n'
+        with grpc.insecure_channel(f"unix:{default}") as channel:
+            plugin_pb2_grpc.BootCodePluginStub(channel).GetPromptComponents(
+                plugin_pb2.GetPromptComponentsRequest(spec_toml_content=spec), timeout=10
+            )
+        with grpc.insecure_channel(f"unix:{small}") as channel:
+            stub = plugin_pb2_grpc.BootCodePluginStub(channel)
+            with pytest.raises(grpc.RpcError) as err:
+                stub.GetPromptComponents(plugin_pb2.GetPromptComponentsRequest(spec_toml_content=spec), timeout=10)
+        assert err.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+    finally:
+        for path in (default, small):
+            os.kill(int(path.with_suffix(".lock").read_text()), signal.SIGTERM)
+    _wait_until_gone(default)
+    _wait_until_gone(small)
@@ -0,0 +1,69 @@
+import asyncio
+
+import grpc
+import pytest
+
+from boot_python.generated import health_pb2, health_pb2_grpc
+from boot_python.health import (
+    NOT_SERVING,
+    SERVICE_NAME,
+    SERVING,
+    AsyncHealthServicer,
+    HealthServicer,
+    add_HealthServicer_to_server,
+    validate_prompts,
+    warm_up,
+)
+from boot_python.main import _bind_ephemeral_port
+from boot_python.prompt_store import PromptStore, build_prompt_set
+
+
+def test_warmup_flips_health_to_serving():
+    health = HealthServicer()
+    store = PromptStore(lazy=True)
+    server, port = _bind_ephemeral_port(store=store, health=health)
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = health_pb2_grpc.HealthStub(channel)
+            check = health_pb2.HealthCheckRequest
+            assert stub.Check(check(service=SERVICE_NAME)).status == NOT_SERVING
+            watch = stub.Watch(check())
+            assert next(watch).status == NOT_SERVING
+
+            assert warm_up(store, f"127.0.0.1:{port}", health)
+            assert store.loaded
+            assert stub.Check(check()).status == SERVING
+            assert next(watch).status == SERVING
+            watch.cancel()
+            with pytest.raises(grpc.RpcError) as err:
+                stub.Check(check(service="nope"))
+            assert err.value.code() == grpc.StatusCode.NOT_FOUND
+    finally:
+        server.stop(None)
+
+
+def test_validation_keeps_broken_prompts_out_of_service():
+    assert validate_prompts(PromptStore().snapshot) == []
+    broken = build_prompt_set({"base_instructions.txt": "  "}, {"README.md.template": "{% if x %}never closed"})
+    problems = validate_prompts(broken)
+    assert len(problems) == 2 and "base_instructions.txt is empty" in problems
+
+
+def test_async_watch_sees_changes_made_from_other_threads():
+    async def scenario():
+        health = AsyncHealthServicer()
+        server = grpc.aio.server()
+        add_HealthServicer_to_server(health, server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                call = health_pb2_grpc.HealthStub(channel).Watch(health_pb2.HealthCheckRequest())
+                assert (await call.read()).status == NOT_SERVING
+                await asyncio.to_thread(health.set, SERVING)
+                assert (await call.read()).status == SERVING
+                call.cancel()
+        finally:
+            await server.stop(None)
+
+    asyncio.run(scenario())
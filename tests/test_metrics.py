@@ -0,0 +1,73 @@
+import json
+import urllib.request
+
+from boot_python.metrics import Counter, Histogram, Registry, start_http_server, write_snapshot
+
+
+def test_registry_renders_prometheus_text_and_json(tmp_path):
+    registry = Registry()
+    hits = registry.register(Counter("t_hits_total", "Hits.", ["cache"]))
+    latency = registry.register(Histogram("t_seconds", "Latency.", ["method"], buckets=(0.1, 1.0)))
+    hits.inc(cache="spec")
+    hits.inc(2, cache="spec")
+    latency.observe(0.05, method="Get")
+    latency.observe(0.5, method="Get")
+
+    text = registry.render()
+    assert 't_hits_total{cache="spec"} 3' in text
+    assert 't_seconds_bucket{method="Get",le="0.1"} 1' in text
+    assert 't_seconds_bucket{method="Get",le="+Inf"} 2' in text
+    assert 't_seconds_count{method="Get"} 2' in text
+
+    out = tmp_path / "metrics.json"
+    write_snapshot(str(out), registry)
+    snap = json.loads(out.read_text())
+    assert snap["t_hits_total"]["samples"] == [{"labels": {"cache": "spec"}, "value": 3.0}]
+    assert snap["t_seconds"]["samples"][0]["count"] == 2
+
+
+def test_interceptor_records_rpcs_and_errors():
+    import grpc
+
+    from boot_python.generated import plugin_pb2, plugin_pb2_grpc
+    from boot_python.main import _build_server
+    from boot_python.metrics import RPC_DURATION, RPC_ERRORS, RPC_IN_FLIGHT, RPC_RESPONSE_BYTES
+    from boot_python.spec import SpecParser
+
+    method = "GetPromptComponents"
+    calls_before = RPC_DURATION.count(method=method)
+    responses_before = RPC_RESPONSE_BYTES.count(method=method)
+    errors_before = RPC_ERRORS.value(method=method, code="INVALID_ARGUMENT")
+
+    server = _build_server(spec_parser=SpecParser(max_bytes=64))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = plugin_pb2_grpc.BootCodePluginStub(channel)
+            stub.GetPromptComponents(plugin_pb2.GetPromptComponentsRequest(spec_toml_content='[project]\nname = "m"\n'))
+            try:
+                stub.GetPromptComponents(plugin_pb2.GetPromptComponentsRequest(spec_toml_content="x" * 100))
+            except grpc.RpcError as e:
+                assert e.code() == grpc.StatusCode.INVALID_ARGUMENT
+    finally:
+        server.stop(None)
+
+    assert RPC_DURATION.count(method=method) == calls_before + 2
+    assert RPC_RESPONSE_BYTES.count(method=method) == responses_before + 1
+    assert RPC_ERRORS.value(method=method, code="INVALID_ARGUMENT") == errors_before + 1
+    assert RPC_IN_FLIGHT.value(method=method) == 0
+
+
+def test_http_endpoint_serves_metrics():
+    registry = Registry()
+    registry.register(Counter("t_up", "Up.")).inc()
+    httpd = start_http_server(0, registry=registry)
+    try:
+        port = httpd.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+            body = resp.read().decode()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert "t_up 1" in body
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+from boot_python.prompt_store import PromptStore
+
+
+@pytest.fixture
+def prompts_pkg(tmp_path, monkeypatch):
+    pkg = tmp_path / "fake_prompts"
+    pkg.mkdir()
+    (pkg / "base_instructions.txt").write_text("base v1", encoding="utf-8")
+    (pkg / "notes.md").write_text("ignored", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield pkg
+    sys.modules.pop("fake_prompts", None)
+
+
+def test_store_loads_once_and_is_immutable(prompts_pkg):
+    store = PromptStore("fake_prompts")
+    snap = store.snapshot
+    assert dict(snap.components) == {"base_instructions.txt": "base v1"}
+    assert snap.version
+    with pytest.raises(TypeError):
+        snap.components["x"] = "y"  # type: ignore[index]
+
+    # Without auto-reload, edits are only seen after an explicit reload().
+    (prompts_pkg / "base_instructions.txt").write_text("base v2", encoding="utf-8")
+    assert store.snapshot is snap
+    assert store.reload().components["base_instructions.txt"] == "base v2"
+    assert store.snapshot.version != snap.version
+
+
+def test_store_auto_reload_on_mtime_change(prompts_pkg):
+    store = PromptStore("fake_prompts", auto_reload=True, check_interval=0.0)
+    snap = store.snapshot
+    assert store.snapshot is snap  # unchanged files keep the same snapshot
+
+    fp = prompts_pkg / "base_instructions.txt"
+    fp.write_text("base v2, longer", encoding="utf-8")
+    st = os.stat(fp)
+    os.utime(fp, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert store.snapshot.components["base_instructions.txt"] == "base v2, longer"
+
+
+def test_lazy_store_loads_on_first_access(prompts_pkg):
+    store = PromptStore("fake_prompts", lazy=True)
+    assert not store.loaded
+    assert store.snapshot.components["base_instructions.txt"] == "base v1"
+    assert store.loaded
+    assert store.snapshot.components["base_instructions.txt"] == "base v1"
+
+
+def test_overlay_packs_are_merged_per_selection(prompts_pkg):
+    packs = prompts_pkg / "overlays"
+    (packs / "type" / "web").mkdir(parents=True)
+    (packs / "type" / "web" / "base_instructions.txt").write_text("web rules\n", encoding="utf-8")
+    (packs / "type" / "cli").mkdir()
+    (packs / "type" / "cli" / "cli_rules.txt").write_text("cli rules", encoding="utf-8")
+    (packs / "language" / "rust").mkdir(parents=True)
+    (packs / "language" / "rust" / "base_instructions.txt").write_text("rust rules", encoding="utf-8")
+
+    snap = PromptStore("fake_prompts").snapshot
+    # No field given: every pack, base first, then language, then type (sorted by value).
+    assert dict(snap.components) == {
+        "base_instructions.txt": "base v1\n\nrust rules\n\nweb rules\n",
+        "cli_rules.txt": "cli rules",
+    }
+    web = snap.select("python", "web")
+    assert dict(web.components) == {"base_instructions.txt": "base v1\n\nweb rules\n"}
+    assert snap.select("rust", "cli").components["base_instructions.txt"] == "base v1\n\nrust rules"
+    # A value without a pack gets none of that field's packs.
+    assert dict(snap.select("go", "notebook").components) == {"base_instructions.txt": "base v1"}
+    assert snap.select("python", "web") is web
+    assert len({snap.version, web.version, snap.select("go", "").version}) == 3
@@ -0,0 +1,17 @@
+from boot_python.response_cache import ResponseCache, spec_cache_key
+
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(maxsize=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"  # "a" is now most recently used
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("c") == b"3"
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 2}
+
+
+def test_key_changes_with_prompt_version():
+    assert spec_cache_key("spec", "v1") != spec_cache_key("spec", "v2")
+    assert spec_cache_key("spec", "v1") == spec_cache_key("spec", "v1")
@@ -1,10 +1,47 @@
-from boot_python.server import _derive_user_spec_prompt, _load_prompts
+import asyncio
+import threading
+import time
+from concurrent import futures
+
+import grpc
+import pytest
+
+import boot_python.spec
+from boot_python.generated import plugin_pb2, plugin_pb2_grpc
+from boot_python.server import (
+    AsyncBootPluginServicer,
+    BootPluginServicer,
+    _derive_user_spec_prompt,
+    _load_prompts,
+    add_BootPluginServicer_to_server,
+)
+from boot_python.spec import SpecParser
+
+
+@pytest.fixture
+def servicer():
+    return BootPluginServicer()
+
+
+@pytest.fixture
+def stub(servicer):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    add_BootPluginServicer_to_server(servicer, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            yield plugin_pb2_grpc.BootCodePluginStub(channel)
+    finally:
+        server.stop(None)
+
 
 def test_prompts_load():
     comps = _load_prompts()
     assert "base_instructions.txt" in comps
     assert isinstance(comps["base_instructions.txt"], str)
 
+
 def test_spec_prompt_parse_ok():
     toml = """
 [project]
@@ -15,6 +52,235 @@ language = "python"
     s = _derive_user_spec_prompt(toml)
     assert "demo" in s and "python" in s
 
+
 def test_spec_prompt_parse_bad():
     s = _derive_user_spec_prompt("not: toml")
     assert "Description" in s
+
+
+def test_serialized_responses_are_cached(servicer, stub):
+    req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content='[project]\nname = "demo"\n')
+    first = stub.GetPromptComponents(req)
+    second = stub.GetPromptComponents(req)
+    assert first == second
+    assert "base_instructions.txt" in first.components
+    assert "demo" in first.user_spec_prompt
+    assert servicer.response_cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_async_servicer_over_aio_server():
+    async def scenario():
+        server = grpc.aio.server()
+        add_BootPluginServicer_to_server(AsyncBootPluginServicer(), server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = plugin_pb2_grpc.BootCodePluginStub(channel)
+                req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content='[project]\nname = "demo"\n')
+                return await asyncio.gather(*(stub.GetPromptComponents(req) for _ in range(8)))
+        finally:
+            await server.stop(None)
+
+    responses = asyncio.run(scenario())
+    assert len({r.SerializeToString() for r in responses}) == 1
+    assert "demo" in responses[0].user_spec_prompt
+
+
+def test_async_servicer_parses_and_renders_off_the_event_loop(monkeypatch):
+    decoded_on = []
+    toml_loads = boot_python.spec._toml_loads
+
+    def recording_loads(text):
+        decoded_on.append(threading.current_thread())
+        return toml_loads(text)
+
+    monkeypatch.setattr(boot_python.spec, "_toml_loads", recording_loads)
+    servicer = AsyncBootPluginServicer()
+    spec = '[project]\nname = "demo"\n'
+    req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content=spec)
+
+    async def scenario():
+        first = await servicer.GetPromptComponentsSerialized(req, None)
+        second = await servicer.GetPromptComponentsSerialized(req, None)
+        assembled = await servicer.AssemblePrompt(plugin_pb2.AssemblePromptRequest(spec_toml_content=spec), None)
+        return threading.current_thread(), first, second, assembled
+
+    loop_thread, first, second, assembled = asyncio.run(scenario())
+    assert decoded_on and loop_thread not in decoded_on
+    assert first == second
+    assert "demo" in assembled.prompt
+    assert servicer.response_cache.stats() == {"hits": 1, "misses": 2, "size": 2}
+
+
+def test_stream_yields_sorted_chunks_that_reassemble():
+    servicer = BootPluginServicer(stream_chunk_chars=1000)
+    req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content='[project]\nname = "demo"\n')
+    messages = list(servicer.GetPromptComponentsStream(req, None))
+
+    *chunks, tail = messages
+    assert "demo" in tail.user_spec_prompt and not tail.name
+    names = [c.name for c in chunks if c.last_chunk]
+    assert names == sorted(names)
+
+    rebuilt = {}
+    for c in chunks:
+        assert len(c.content) <= 1000
+        rebuilt[c.name] = rebuilt.get(c.name, "") + c.content
+    assert rebuilt == dict(servicer.store.snapshot.components)
+    assert any(not c.last_chunk for c in chunks)  # language_rules.txt is > 1000 chars
+
+
+def test_conditional_fetch_omits_known_components(servicer):
+    full = plugin_pb2.GetPromptComponentsResponse.FromString(
+        servicer.GetPromptComponentsSerialized(plugin_pb2.GetPromptComponentsRequest(), None)
+    )
+    assert full.set_digest and set(full.digests) == set(full.components)
+
+    known = dict(full.digests)
+    known["language_rules.txt"] = "stale"
+    partial = servicer.GetPromptComponents(plugin_pb2.GetPromptComponentsRequest(known_digests=known), None)
+    assert list(partial.components) == ["language_rules.txt"]
+    assert not partial.not_modified
+
+    unchanged = plugin_pb2.GetPromptComponentsResponse.FromString(
+        servicer.GetPromptComponentsSerialized(
+            plugin_pb2.GetPromptComponentsRequest(known_set_digest=full.set_digest), None
+        )
+    )
+    assert unchanged.not_modified
+    assert not unchanged.components and not unchanged.digests
+    assert unchanged.user_spec_prompt == full.user_spec_prompt
+
+
+@pytest.mark.parametrize("servicer", [BootPluginServicer(spec_parser=SpecParser(max_bytes=128))])
+def test_oversized_spec_is_rejected_with_invalid_argument(stub):
+    req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content="#" * 1024)
+    with pytest.raises(grpc.RpcError) as err:
+        stub.GetPromptComponents(req)
+    assert err.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+def test_project_type_selects_overlay_pack(servicer):
+    def rules(spec):
+        req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content=spec)
+        return plugin_pb2.GetPromptComponentsResponse.FromString(
+            servicer.GetPromptComponentsSerialized(req, None)
+        ).components["language_rules.txt"]
+
+    web = rules('[project]\nname = "api"\ntype = "fastapi_web_service"\n')
+    assert "WEB APIS (FastAPI)" in web and "DATA SCIENCE" not in web
+    cli = rules('[project]\nname = "tool"\ntype = "cli"\n')
+    assert "WEB APIS" not in cli and "DATA SCIENCE" not in cli
+    full = rules('[project]\nname = "demo"\n')
+    assert "WEB APIS (FastAPI)" in full and "DATA SCIENCE" in full
+
+    stream_req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content='[project]\ntype = "data_script"\n')
+    streamed = "".join(
+        c.content for c in servicer.GetPromptComponentsStream(stream_req, None) if c.name == "language_rules.txt"
+    )
+    assert "DATA SCIENCE" in streamed and "WEB APIS" not in streamed
+
+
+def test_max_tokens_trims_components_to_the_budget(servicer):
+    full = servicer.GetPromptComponents(plugin_pb2.GetPromptComponentsRequest(), None)
+    assert not full.estimated_tokens and not full.trimmed
+
+    req = plugin_pb2.GetPromptComponentsRequest(max_tokens=400)
+    trimmed = plugin_pb2.GetPromptComponentsResponse.FromString(servicer.GetPromptComponentsSerialized(req, None))
+    assert 0 < trimmed.estimated_tokens <= 400
+    assert "language_rules.txt" in trimmed.trimmed
+    assert trimmed.components["base_instructions.txt"] == full.components["base_instructions.txt"]
+    assert full.components["language_rules.txt"].startswith(trimmed.components.get("language_rules.txt", "").rstrip())
+    assert trimmed.set_digest != full.set_digest
+    assert trimmed.digests["base_instructions.txt"] == full.digests["base_instructions.txt"]
+
+    # The trimmed set is cached per budget and works with conditional fetches.
+    again = servicer.GetPromptComponents(
+        plugin_pb2.GetPromptComponentsRequest(max_tokens=400, known_set_digest=trimmed.set_digest), None
+    )
+    assert again.not_modified and again.estimated_tokens == trimmed.estimated_tokens
+
+
+def test_serialized_response_splices_cached_components(servicer):
+    for name in ("a", "b"):
+        req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content=f'[project]\nname = "{name}"\n', max_tokens=5000)
+        spliced = plugin_pb2.GetPromptComponentsResponse.FromString(servicer.GetPromptComponentsSerialized(req, None))
+        assert spliced == servicer._build_response(req)
+    assert servicer._static_cache.stats()["hits"] == 1
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_identical_concurrent_requests_are_coalesced(servicer):
+    release = threading.Event()
+    spec_fields = servicer._spec_fields
+    calls = []
+
+    def slow_spec_fields(request, prompts):
+        calls.append(1)
+        release.wait(5)
+        return spec_fields(request, prompts)
+
+    servicer._spec_fields = slow_spec_fields
+    req = plugin_pb2.GetPromptComponentsRequest(spec_toml_content='[project]\nname = "herd"\n')
+    with futures.ThreadPoolExecutor(max_workers=8) as pool:
+        results = [pool.submit(servicer._serialized_response, req) for _ in range(8)]
+        coalesced = _wait_for(lambda: servicer._inflight.coalesced == 7)
+        release.set()
+        assert coalesced, "identical requests were not coalesced"
+        payloads = {r.result(timeout=5) for r in results}
+    assert len(payloads) == 1 and len(calls) == 1
+    assert servicer._serialized_response(req) in payloads
+
+
+def test_assemble_prompt_reuses_a_byte_identical_prefix(servicer, stub):
+    responses = [
+        stub.AssemblePrompt(plugin_pb2.AssemblePromptRequest(spec_toml_content=f'[project]\nname = "{n}"\n'))
+        for n in ("démo", "other")
+    ]
+    review = stub.AssemblePrompt(plugin_pb2.AssemblePromptRequest(components=["review_instructions.txt", "missing.txt"]))
+
+    first, second = responses
+    comps = servicer.store.snapshot.components
+    data = first.prompt.encode("utf-8")
+    assert [s.name for s in first.segments] == ["base_instructions.txt", "language_rules.txt", "user_spec_prompt"]
+    for seg in first.segments[:2]:
+        assert data[seg.offset : seg.offset + seg.length].decode("utf-8") == comps[seg.name].strip()
+    spec = first.segments[2]
+    assert spec.offset == first.prefix_length and spec.offset + spec.length == len(data)
+    assert "démo" in data[spec.offset :].decode("utf-8")
+
+    assert second.prefix_digest == first.prefix_digest
+    assert second.prompt.encode("utf-8")[: second.prefix_length] == data[: first.prefix_length]
+    # Built once per component list: the default one and the review one.
+    assert servicer._prefix_cache.stats()["misses"] == 2
+
+    assert [s.name for s in review.segments] == ["review_instructions.txt", "user_spec_prompt"]
+    assert review.prompt.startswith(comps["review_instructions.txt"].strip() + "\n\n")
+
+
+def test_assemble_prompt_fits_the_budget_to_the_requested_components(servicer):
+    snap = servicer.store.snapshot
+    review = snap.components["review_instructions.txt"]
+    budget = snap.tokens[snap.digests["review_instructions.txt"]].total
+    req = plugin_pb2.AssemblePromptRequest(components=["review_instructions.txt"], max_tokens=budget)
+    fitted = plugin_pb2.AssemblePromptResponse.FromString(servicer.AssemblePromptSerialized(req, None))
+    assert [s.name for s in fitted.segments] == ["review_instructions.txt", "user_spec_prompt"]
+    assert fitted.prompt.startswith(review.strip())
+    assert fitted.estimated_tokens == budget and not fitted.trimmed
+
+    # Request order decides which component gets the budget first.
+    req = plugin_pb2.AssemblePromptRequest(
+        components=["review_instructions.txt", "base_instructions.txt"], max_tokens=budget
+    )
+    fitted = plugin_pb2.AssemblePromptResponse.FromString(servicer.AssemblePromptSerialized(req, None))
+    assert [s.name for s in fitted.segments] == ["review_instructions.txt", "user_spec_prompt"]
+    assert list(fitted.trimmed) == ["base_instructions.txt"]
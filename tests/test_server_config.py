@@ -0,0 +1,112 @@
+import threading
+from concurrent import futures
+
+import grpc
+import pytest
+
+from boot_python.generated import plugin_pb2, plugin_pb2_grpc
+from boot_python.main import _build_server
+from boot_python.prompt_store import build_prompt_set
+from boot_python.server import CompressionInterceptor
+from boot_python.server_config import MAX_WORKERS_ENV, ServerConfig, default_max_workers, flag_from_env
+
+
+@pytest.fixture
+def server_kwargs():
+    return {}
+
+
+@pytest.fixture
+def stub(server_kwargs):
+    server = _build_server(**server_kwargs)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            yield plugin_pb2_grpc.BootCodePluginStub(channel)
+    finally:
+        server.stop(None)
+
+
+def test_config_defaults_and_env(monkeypatch):
+    monkeypatch.delenv(MAX_WORKERS_ENV, raising=False)
+    config = ServerConfig.from_env()
+    assert config.max_workers == default_max_workers() >= 4
+    assert config.concurrency_limit == config.max_workers * 4
+    assert ServerConfig(max_workers=2, max_concurrent_rpcs=0).concurrency_limit is None
+
+    monkeypatch.setenv(MAX_WORKERS_ENV, "3")
+    assert ServerConfig.from_env().max_workers == 3
+    assert dict(ServerConfig(max_workers=1, keepalive_time_ms=0).grpc_options()).get("grpc.keepalive_time_ms") is None
+
+
+@pytest.mark.parametrize(
+    "raw, expected", [("1", True), ("True", True), ("on", True), ("0", False), ("false", False), ("", False)]
+)
+def test_flag_from_env(monkeypatch, raw, expected):
+    monkeypatch.setenv("BOOT_PYTHON_TEST_FLAG", raw)
+    assert flag_from_env("BOOT_PYTHON_TEST_FLAG") is expected
+
+
+class _BlockingStore:
+    def __init__(self) -> None:
+        self.entered = threading.Semaphore(0)
+        self.release = threading.Event()
+        self._snapshot = build_prompt_set({"base_instructions.txt": "base"})
+
+    @property
+    def snapshot(self):
+        self.entered.release()
+        self.release.wait(10)
+        return self._snapshot
+
+
+@pytest.mark.parametrize(
+    "server_kwargs", [{"store": _BlockingStore(), "config": ServerConfig(max_workers=2, max_concurrent_rpcs=1)}]
+)
+def test_rpcs_over_the_limit_are_shed_with_resource_exhausted(server_kwargs, stub):
+    store = server_kwargs["store"]
+    req = plugin_pb2.GetPromptComponentsRequest()
+    with futures.ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(stub.GetPromptComponents, req, timeout=10)
+        assert store.entered.acquire(timeout=5)  # first RPC holds the only slot
+        try:
+            stub.GetPromptComponents(req, timeout=5)
+            raise AssertionError("second RPC should have been shed")
+        except grpc.RpcError as e:
+            assert e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+        finally:
+            store.release.set()
+        assert "base_instructions.txt" in first.result().components
+
+
+@pytest.mark.parametrize(
+    "server_kwargs", [{"config": ServerConfig(max_workers=2, compression="gzip", compression_min_bytes=64)}]
+)
+def test_compression_skips_small_messages(stub):
+    with pytest.raises(ValueError):
+        ServerConfig(max_workers=1, compression="brotli")
+    assert ServerConfig(max_workers=1, compression="gzip").cli_args()[-4:] == [
+        "--compression",
+        "gzip",
+        "--compression-min-bytes",
+        "1024",
+    ]
+
+    class Context:
+        disabled = 0
+
+        def disable_next_message_compression(self):
+            self.disabled += 1
+
+    handler = grpc.unary_unary_rpc_method_handler(lambda request, context: request)
+    wrapped = CompressionInterceptor(min_bytes=10).intercept_service(lambda details: handler, None)
+    context = Context()
+    assert wrapped.unary_unary(b"small", context) == b"small" and context.disabled == 1
+    wrapped.unary_unary(b"large enough to compress", context)
+    assert context.disabled == 1
+
+    full = stub.GetPromptComponents(plugin_pb2.GetPromptComponentsRequest())
+    assert "base_instructions.txt" in full.components
+    small = stub.GetPromptComponents(plugin_pb2.GetPromptComponentsRequest(known_set_digest=full.set_digest))
+    assert small.not_modified
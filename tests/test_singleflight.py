@@ -0,0 +1,83 @@
+import threading
+import time
+from concurrent import futures
+
+import pytest
+
+from boot_python.metrics import COALESCED_REQUESTS
+from boot_python.singleflight import Cancelled, SingleFlight
+
+
+def _run_concurrently(flight, fn, n, **kwargs):
+    """Starts ``n`` callers; the first becomes the leader and blocks until released."""
+    with futures.ThreadPoolExecutor(max_workers=n) as pool:
+        calls = [pool.submit(flight.do, "k", fn, **kwargs)]
+        assert _wait_for(lambda: len(flight) == 1), "leader never started"
+        calls += [pool.submit(flight.do, "k", fn, **kwargs) for _ in range(n - 1)]
+        assert _wait_for(lambda: flight.coalesced == n - 1), "callers were not coalesced"
+        yield calls
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_identical_calls_share_one_computation():
+    flight = SingleFlight(name="test")
+    before = COALESCED_REQUESTS.value(group="test")
+    release = threading.Event()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        release.wait(5)
+        return b"payload"
+
+    for calls in _run_concurrently(flight, compute, 5):
+        release.set()
+        assert [c.result(timeout=5) for c in calls] == [b"payload"] * 5
+    assert len(runs) == 1
+    assert flight.coalesced == 4 and COALESCED_REQUESTS.value(group="test") == before + 4
+    assert not len(flight)
+    # Nothing is remembered once the flight has landed.
+    assert flight.do("k", lambda: b"again") == b"again"
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("boom")
+
+    for calls in _run_concurrently(flight, fail, 3):
+        release.set()
+        errors = [c.exception(timeout=5) for c in calls]
+    assert all(isinstance(e, ValueError) and str(e) == "boom" for e in errors)
+    # Waiters get their own copy, chained to the leader's error.
+    assert errors[1] is not errors[0] and errors[1].__cause__ is errors[0]
+    assert flight.do("k", lambda: 1) == 1
+
+
+def test_cancelled_waiter_stops_waiting_without_disturbing_the_flight():
+    flight = SingleFlight()
+    release = threading.Event()
+    active = threading.Event()
+    active.set()
+
+    def compute():
+        release.wait(5)
+        return "ok"
+
+    for calls in _run_concurrently(flight, compute, 2, is_active=active.is_set):
+        active.clear()
+        with pytest.raises(Cancelled):
+            calls[1].result(timeout=5)
+        release.set()
+        assert calls[0].result(timeout=5) == "ok"
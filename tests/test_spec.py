@@ -0,0 +1,37 @@
+import pytest
+
+from boot_python.spec import SpecError, SpecParser, SpecTooLargeError
+
+SPEC = """
+[project]
+name = "demo"
+language = "python"
+description = "Test"
+type = "cli"
+dependencies = ["click>=8", "rich"]
+"""
+
+
+def test_parse_extracts_fields_and_memoizes():
+    parser = SpecParser()
+    spec = parser.parse(SPEC)
+    assert (spec.name, spec.language, spec.project_type) == ("demo", "python", "cli")
+    assert spec.dependencies == ("click>=8", "rich")
+    assert spec.data["project"]["description"] == "Test"
+    assert parser.parse(SPEC) is spec
+    assert parser.cache.stats()["hits"] == 1
+
+
+def test_parse_errors_are_cached_too():
+    parser = SpecParser()
+    for _ in range(2):
+        with pytest.raises(SpecError):
+            parser.parse("not: toml")
+    assert parser.cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_oversized_spec_fails_fast():
+    parser = SpecParser(max_bytes=64)
+    with pytest.raises(SpecTooLargeError):
+        parser.parse("# " + "é" * 40)  # 40 characters, but 82 bytes
+    assert len(parser.cache) == 0
@@ -0,0 +1,13 @@
+from boot_python.startup import _parse_importtime
+
+
+def test_parse_importtime_lines():
+    lines = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        300 | grpc",
+        "import time:        80 |        180 |   grpc._cython",
+        "INFO boot-python stopped",
+    ]
+    rows = _parse_importtime(lines)
+    assert [(r["module"], r["depth"]) for r in rows] == [("grpc", 0), ("grpc._cython", 1)]
+    assert rows[0]["cumulative_ms"] == 0.3
@@ -0,0 +1,61 @@
+import pytest
+
+from boot_python.templates import TemplateError, TemplateRenderer, compile_template
+
+SPEC = {
+    "project": {
+        "name": "demo",
+        "type": "cli",
+        "dependencies": ["click", "rich"],
+    }
+}
+
+
+def test_variables_conditionals_and_loops():
+    template = compile_template(
+        "# {{ spec.project.name }}\n"
+        "{% if spec.project.description %}\n{{ spec.project.description }}\n"
+        "{% elif spec.project.type == 'cli' %}\nA command-line tool.\n"
+        "{% else %}\nA project.\n{% endif %}\n"
+        "{% for dep in spec.project.dependencies %}\n"
+        "{{ loop.index }}. {{ dep | upper }}\n"
+        "{% else %}\nNo dependencies.\n{% endfor %}\n"
+        "{{ spec.project.dependencies | join(' + ') }} {{ spec.missing.key | default('n/a') }}"
+    )
+    assert template.render({"spec": SPEC}) == (
+        "# demo\nA command-line tool.\n1. CLICK\n2. RICH\nclick + rich n/a"
+    )
+    assert template.render({"spec": {}}) == "# \nA project.\nNo dependencies.\n n/a"
+
+
+@pytest.mark.parametrize(
+    "source",
+    ["{% if x %}open", "{% endfor %}", "{{ x | nope }}", "{{ a b }}", "{% for 1 in x %}{% endfor %}"],
+)
+def test_syntax_errors(source):
+    with pytest.raises(TemplateError):
+        compile_template(source)
+
+
+def test_renderer_compiles_once_and_caches_renders_per_spec():
+    renderer = TemplateRenderer()
+    source = "{{ spec.project.name }}"
+    assert renderer.render(source, "t1", {"spec": SPEC}, "spec-a") == "demo"
+    assert renderer.render(source, "t1", {"spec": {"project": {"name": "other"}}}, "spec-a") == "demo"  # cached
+    assert renderer.render(source, "t1", {"spec": {"project": {"name": "other"}}}, "spec-b") == "other"
+    assert renderer._compiled.stats()["misses"] == 1
+    with pytest.raises(TemplateError):
+        renderer.render("{% if %}", "t2", {}, "spec-a")
+
+
+def test_servicer_renders_readme_template():
+    from boot_python.generated import plugin_pb2
+    from boot_python.server import BootPluginServicer
+
+    servicer = BootPluginServicer()
+    spec = '[project]\nname = "demo"\ndescription = "A demo"\n'
+    resp = servicer._build_response(plugin_pb2.GetPromptComponentsRequest(spec_toml_content=spec))
+    assert resp.rendered["README.md"].startswith("# demo\n\nA demo\n")
+    assert "README.md.template" not in resp.components
+    bad = servicer._build_response(plugin_pb2.GetPromptComponentsRequest(spec_toml_content="not: toml"))
+    assert not bad.rendered
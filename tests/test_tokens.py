@@ -0,0 +1,41 @@
+from boot_python.prompt_store import build_prompt_set
+from boot_python.tokens import estimate_tokens, fit_components, index_component, index_prompt_set, section_bounds
+
+RULES = "INTRO\nkeep me\n\nWEB APIS (FastAPI)\n" + "fastapi " * 20 + "\n\nTESTING\nAVOID flaky tests.\n"
+
+
+def test_sections_start_at_heading_lines():
+    ends = section_bounds(RULES)
+    sections = [RULES[s:e] for s, e in zip([0, *ends], ends)]
+    assert [s.splitlines()[0] for s in sections] == ["INTRO", "WEB APIS (FastAPI)", "TESTING"]
+    tokens = index_component(RULES)
+    assert tokens.total == sum(estimate_tokens(s) for s in sections)
+    assert tokens.prefix(tokens.cumulative[0]) == (ends[0], tokens.cumulative[0])
+    assert tokens.prefix(0) == (0, 0)
+
+
+def test_fit_keeps_priority_components_and_cuts_at_sections():
+    words = []
+    prompts = index_prompt_set(
+        build_prompt_set({"base_instructions.txt": "base " * 8, "language_rules.txt": RULES, "zz.txt": "z" * 8}),
+        estimator=lambda text: words.append(text) or len(text.split()),
+    )
+    indexed_calls = len(words)
+
+    assert fit_components(prompts, 1000).trimmed == ()
+    fit = fit_components(prompts, 8 + 3 + 1)  # base, the INTRO section and zz.txt
+    assert dict(fit.components) == {
+        "base_instructions.txt": "base " * 8,
+        "language_rules.txt": "INTRO\nkeep me\n",
+        "zz.txt": "z" * 8,
+    }
+    assert fit.trimmed == ("language_rules.txt",) and fit.tokens == 12
+    # base no longer fits at all, yet the smaller sections and components after it do.
+    assert fit_components(prompts, 5).components.keys() == {"language_rules.txt", "zz.txt"}
+    assert len(words) == indexed_calls  # fitting never calls the estimator again
+
+
+def test_fit_counts_unindexed_components_with_the_given_estimator():
+    prompts = build_prompt_set({"a.txt": "one two three"})
+    assert fit_components(prompts, 3, estimator=lambda text: len(text.split())).trimmed == ()
+    assert fit_components(prompts, 3).trimmed == ("a.txt",)  # 13 characters are 4 default tokens
@@ -0,0 +1,64 @@
+import sys
+import time
+
+import pytest
+
+from boot_python.metrics import PROMPT_RELOADS
+from boot_python.prompt_store import PromptStore
+from boot_python.watcher import PromptWatcher
+
+
+@pytest.fixture
+def prompts_pkg(tmp_path, monkeypatch):
+    pkg = tmp_path / "watched_prompts"
+    pkg.mkdir()
+    (pkg / "base_instructions.txt").write_text("base v1", encoding="utf-8")
+    (pkg / "language_rules.txt").write_text("rules v1", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield pkg
+    sys.modules.pop("watched_prompts", None)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_extra_dirs_are_layered_over_the_package(prompts_pkg, tmp_path):
+    extra = tmp_path / "extra"
+    extra.mkdir()
+    (extra / "language_rules.txt").write_text("local rules", encoding="utf-8")
+    (extra / "team.txt").write_text("team notes", encoding="utf-8")
+    snap = PromptStore("watched_prompts", extra_dirs=[extra]).snapshot
+    assert dict(snap.components) == {
+        "base_instructions.txt": "base v1",
+        "language_rules.txt": "local rules",
+        "team.txt": "team notes",
+    }
+
+
+@pytest.mark.parametrize("mode", ["inotify", "poll"])
+def test_watcher_reloads_off_the_request_path(prompts_pkg, tmp_path, mode):
+    if mode == "inotify" and not sys.platform.startswith("linux"):
+        pytest.skip("inotify is Linux-only")
+    extra = tmp_path / "extra"
+    extra.mkdir()
+    store = PromptStore("watched_prompts", extra_dirs=[extra])
+    before = store.snapshot
+    ok_before = PROMPT_RELOADS.value(result="ok")
+    watcher = PromptWatcher(store, mode=mode, poll_interval=0.05).start()
+    try:
+        assert watcher.mode == mode
+        (prompts_pkg / "language_rules.txt").write_text("rules v2, edited", encoding="utf-8")
+        assert _wait_for(lambda: store.snapshot.components["language_rules.txt"] == "rules v2, edited")
+        (extra / "new.txt").write_text("new", encoding="utf-8")
+        assert _wait_for(lambda: "new.txt" in store.snapshot.components)
+    finally:
+        watcher.stop()
+    assert before.components["language_rules.txt"] == "rules v1"  # old snapshot never mutated
+    assert watcher.reloads >= 2
+    assert PROMPT_RELOADS.value(result="ok") >= ok_before + 2
@@ -0,0 +1,111 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import grpc
+
+from boot_python import workers
+from boot_python.generated import plugin_pb2, plugin_pb2_grpc
+
+
+def _children(pid):
+    out = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True).stdout
+    return [int(x) for x in out.split()]
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_workers_share_one_port_restart_and_stop_on_sigterm():
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "boot_python.main", "--workers", "2"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        handshake = proc.stdout.readline().strip()
+        assert handshake.startswith("1|1|tcp|127.0.0.1:")
+        workers = _children(proc.pid)
+        assert len(workers) == 2
+
+        os.kill(workers[0], signal.SIGKILL)
+        assert _wait_for(lambda: len(_children(proc.pid)) == 2 and workers[0] not in _children(proc.pid))
+
+        with grpc.insecure_channel(handshake.split("|")[3]) as channel:
+            stub = plugin_pb2_grpc.BootCodePluginStub(channel)
+            resp = stub.GetPromptComponents(plugin_pb2.GetPromptComponentsRequest(), timeout=10)
+        assert "base_instructions.txt" in resp.components
+
+        workers = _children(proc.pid)
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=15) == 0
+        assert proc.stdout.read() == ""  # exactly one handshake line
+        assert not [pid for pid in workers if os.path.exists(f"/proc/{pid}")]
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+
+def test_restarted_worker_handshake_is_polled_without_blocking():
+    expected = "127.0.0.1:1"
+    w = workers._Worker(0, [sys.executable, "-c", "import time; time.sleep(1); print('1|1|tcp|127.0.0.1:9|grpc')"])
+    w.spawn()
+    try:
+        t0 = time.monotonic()
+        workers._tend(w, expected, time.monotonic())
+        assert time.monotonic() - t0 < 0.5
+        assert w.proc is not None and not w.ready
+
+        # A wrong handshake gets the worker killed and backed off, not treated as serving.
+        assert _wait_for(lambda: workers._tend(w, expected, time.monotonic()) or w.proc is None)
+        assert not w.ready
+        assert w.restart_delay > 0
+    finally:
+        if w.proc is not None:
+            w.proc.kill()
+
+
+def test_worker_that_misses_the_ready_timeout_is_killed():
+    w = workers._Worker(0, [sys.executable, "-c", "import time; time.sleep(30)"])
+    w.spawn()
+    proc = w.proc
+    try:
+        workers._tend(w, "127.0.0.1:1", w.started + 1)
+        assert w.proc is proc
+        workers._tend(w, "127.0.0.1:1", w.started + workers.READY_TIMEOUT)
+        assert w.proc is None and proc.returncode is not None
+        assert w.restart_delay > 0
+    finally:
+        proc.kill()
+
+
+def test_every_worker_warms_itself_up(tmp_path):
+    dump = tmp_path / "metrics.json"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "boot_python.main", "--workers", "3", "--wait-ready", "--metrics-dump", str(dump)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        assert proc.stdout.readline().startswith("1|1|tcp|")
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=15) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+    for index in range(3):
+        snapshot = json.loads((tmp_path / f"metrics.worker{index}.json").read_text(encoding="utf-8"))
+        samples = snapshot["boot_python_rpc_duration_seconds"]["samples"]
+        # Exactly its own warmup RPC: none routed to (or from) a sibling.
+        assert [(s["labels"]["method"], s["count"]) for s in samples] == [("GetPromptComponents", 1.0)]